@@ -0,0 +1,121 @@
+""" A response shaped like a page of a real API response: repository issues of the GitHub GraphQL API,
+with nullable fields, enums, nested lists and items of uneven sizes.
+
+The response is generated from a fixed seed, so that results of different runs are comparable.
+"""
+import random
+from enum import Enum
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+
+class IssueState(Enum):
+    OPEN = 'OPEN'
+    CLOSED = 'CLOSED'
+
+
+class Actor(NamedTuple):
+    login: str
+    url: str
+
+
+class Label(NamedTuple):
+    name: str
+    color: str
+
+
+class Labels(NamedTuple):
+    nodes: Sequence[Label]
+
+
+class Comment(NamedTuple):
+    id: str
+    body: str
+    author: Optional[Actor]
+
+
+class Comments(NamedTuple):
+    totalCount: int
+    nodes: Sequence[Comment]
+
+
+class Issue(NamedTuple):
+    number: int
+    title: str
+    body: Optional[str]
+    state: IssueState
+    author: Optional[Actor]
+    closedAt: Optional[str]
+    labels: Labels
+    comments: Comments
+
+
+class PageInfo(NamedTuple):
+    hasNextPage: bool
+    endCursor: Optional[str]
+
+
+class Issues(NamedTuple):
+    totalCount: int
+    pageInfo: PageInfo
+    nodes: Sequence[Issue]
+
+
+class Repository(NamedTuple):
+    issues: Issues
+
+
+class ListIssues(NamedTuple):
+    repository: Repository
+
+
+class Input(NamedTuple):
+    owner: str
+    name: str
+    first: int
+
+
+_WORDS = ('query', 'schema', 'type', 'field', 'resolver', 'decode', 'cache', 'list', 'error', 'null',
+          'enum', 'input', 'nested', 'fragment', 'variable', 'release', 'crash', 'regression')
+_LABELS = ('bug', 'enhancement', 'documentation', 'good first issue', 'performance', 'wontfix')
+
+
+def _text(rnd: random.Random, words: int) -> str:
+    return ' '.join(rnd.choice(_WORDS) for _ in range(words))
+
+
+def _actor(rnd: random.Random) -> Optional[Dict[str, Any]]:
+    # authors of deleted accounts are null
+    if rnd.random() < 0.05:
+        return None
+    login = f'user{rnd.randrange(10000)}'
+    return {'login': login, 'url': f'https://github.com/{login}'}
+
+
+def mk_issues_response(items: int, seed: int = 0) -> Dict[str, Any]:
+    """ Wire data of ``ListIssues`` with a page of ``items`` issues.
+    """
+    rnd = random.Random(seed)
+    nodes = []
+    for n in range(items):
+        closed = rnd.random() < 0.4
+        comments = [
+            {'id': f'IC_{n}_{k}', 'body': _text(rnd, rnd.randrange(3, 60)), 'author': _actor(rnd)}
+            for k in range(min(int(rnd.expovariate(1 / 4)), 40))
+        ]
+        nodes.append({
+            'number': items - n,
+            'title': _text(rnd, rnd.randrange(3, 12)),
+            'body': _text(rnd, rnd.randrange(0, 300)) if rnd.random() < 0.85 else None,
+            'state': 'CLOSED' if closed else 'OPEN',
+            'author': _actor(rnd),
+            'closedAt': f'2024-{rnd.randrange(1, 13):02}-{rnd.randrange(1, 29):02}T12:00:00Z' if closed else None,
+            'labels': {'nodes': [{'name': x, 'color': f'{rnd.randrange(1 << 24):06x}'}
+                                 for x in rnd.sample(_LABELS, rnd.randrange(0, 4))]},
+            'comments': {'totalCount': len(comments) + rnd.randrange(0, 3), 'nodes': comments},
+        })
+    return {'data': {'repository': {'issues': {
+        'totalCount': items * 20,
+        'pageInfo': {'hasNextPage': True, 'endCursor': f'Y3Vyc29yOnYyOpHO{items:08}'},
+        'nodes': nodes,
+    }}}}
+
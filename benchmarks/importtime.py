@@ -0,0 +1,78 @@
+""" Measures import times of the package entry points with ``python -X importtime``
+and fails when any of them exceeds its budget.
+
+    $ python -m benchmarks.importtime [--repeat 5] [--scale 1.0]
+"""
+import argparse
+import re
+import subprocess
+import sys
+from typing import Dict, Mapping, NamedTuple, Tuple
+
+
+class Budget(NamedTuple):
+    # cumulative import time of the module, in milliseconds
+    millis: float
+    # top-level packages that the module should never import
+    forbidden: Tuple[str, ...] = ()
+
+
+HEAVY = ('typeit', 'colander', 'pyrsistent', 'inflection', 'infix', 'pkg_resources', 'graphql')
+
+BUDGETS: Mapping[str, Budget] = {
+    # the runtime path of ahead-of-time compiled queries
+    'graphql_dsl': Budget(5.0, HEAVY),
+    'graphql_dsl.query': Budget(40.0, HEAVY),
+    # asyncio, ssl and http.client take most of it
+    'graphql_dsl.executor': Budget(180.0, HEAVY),
+    'graphql_dsl.cli': Budget(80.0, HEAVY),
+    # the query constructor
+    'graphql_dsl.dsl': Budget(400.0),
+}
+
+_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure(module: str) -> Tuple[float, Dict[str, float]]:
+    """ Returns the cumulative import time of a module in milliseconds, and cumulative times
+    of all modules it has imported.
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          capture_output=True, text=True, check=True)
+    imported = {}
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            imported[match.group(4)] = int(match.group(2)) / 1000
+    return imported[module], imported
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier of all budgets, for slow machines.')
+    args = parser.parse_args()
+
+    failures = []
+    for module, budget in BUDGETS.items():
+        timings = []
+        for _ in range(args.repeat):
+            millis, imported = measure(module)
+            timings.append(millis)
+            heavy = sorted(x for x in imported if x.split('.')[0] in budget.forbidden)
+            if heavy:
+                failures.append(f'{module} imports {", ".join(heavy)}')
+                break
+        best = min(timings)
+        limit = budget.millis * args.scale
+        status = 'ok' if best <= limit else 'OVER BUDGET'
+        print(f'{module:<24} {best:8.1f} ms  (budget {limit:.0f} ms)  {status}')
+        if best > limit:
+            failures.append(f'{module} takes {best:.1f} ms, the budget is {limit:.0f} ms')
+
+    if failures:
+        sys.exit('\n'.join(failures))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+""" Measures throughput and memory of query construction, translation, payload encoding
+and result decoding on synthetic query types, decoding of a response shaped like a real one
+(see benchmarks.fixtures), and emits the results as JSON.
+
+    $ python -m benchmarks.suite [--depth 4] [--width 8] [--bindings 4] [--items 50] [--output results.json]
+    $ python -m benchmarks.suite --compare baseline.json
+
+Results of different commits are comparable when they are produced with the same parameters.
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Type
+
+from graphql_dsl import GQL, QUERY, WITH, PASS, TO, AS
+from graphql_dsl.columns import column_builder
+from graphql_dsl.decoder import ResultDecoding, mk_result_decoder, mk_value_decoder
+from graphql_dsl.streaming import iter_sequence
+from graphql_dsl.translator import translate
+from graphql_dsl.typeinfo import construct
+
+from . import fixtures
+
+
+class Params(NamedTuple):
+    depth: int
+    width: int
+    bindings: int
+    # elements of every list in the response
+    items: int
+
+
+class Result(NamedTuple):
+    name: str
+    ops_per_second: float
+    # peak of memory allocated by a single operation
+    peak_bytes: int
+
+
+def mk_level_types(depth: int, width: int) -> Type[Any]:
+    """ Level0 { s0 ... sN children { s0 ... sN children { ... } } }
+    """
+    scalars = [(f's{n}', (int, str)[n % 2]) for n in range(width)]
+    typ = NamedTuple(f'Level{depth}', scalars)
+    for level in reversed(range(depth)):
+        typ = NamedTuple(f'Level{level}', scalars + [('children', Sequence[typ])])
+    return typ
+
+
+def mk_query(params: Params) -> Tuple[Type[Any], Type[Any], Any]:
+    """ A query with a root field per binding, and an input that is bound to all of them.
+    """
+    level = mk_level_types(params.depth, params.width)
+    root = NamedTuple('Root', [(f'nodes{n}', Sequence[level]) for n in range(max(params.bindings, 1))])
+    input_type = NamedTuple('Input', [(f'first{n}', int) for n in range(params.bindings)])
+    expr = QUERY | root | WITH | input_type
+    for n in range(params.bindings):
+        expr = expr | PASS | getattr(input_type, f'first{n}') * TO * getattr(root, f'nodes{n}') * AS * 'first'
+    return root, input_type, expr
+
+
+_VALUES = {int: 42, str: 'value'}
+
+
+def mk_response(typ: Type[Any], items: int) -> Any:
+    """ Wire data of ``typ`` with ``items`` elements in every list.
+    """
+    rv = {}
+    for name, field_type in typ.__annotations__.items():
+        if field_type in _VALUES:
+            rv[name] = _VALUES[field_type]
+        else:
+            rv[name] = [mk_response(field_type.__args__[0], items) for _ in range(items)]
+    return rv
+
+
+def measure(name: str, op: Callable[[], Any], min_time: float = 0.5) -> Result:
+    op()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed * 4 > min_time else 10
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        op()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Result(name, number / elapsed, peak)
+
+
+def run(params: Params, min_time: float) -> List[Result]:
+    root, input_type, expr = mk_query(params)
+    query_input = input_type(*range(params.bindings))
+    response = {'data': mk_response(root, params.items)}
+    uncached = GQL._replace(cache=None)
+    bindings = uncached.prepare_bindings(expr)
+
+    results = [
+        measure('construct', lambda: uncached(expr), min_time),
+        measure('construct-cached', lambda: GQL(expr), min_time),
+        measure('prepare_bindings', lambda: uncached.prepare_bindings(expr), min_time),
+        measure('translate', lambda: translate(root, bindings, uncached.typer), min_time),
+    ]
+    for decoding in ResultDecoding:
+        query = uncached._replace(decoding=decoding)(expr)
+        results.extend([
+            measure(f'request_payload[{decoding.value}]', lambda: query.request_payload(query_input), min_time),
+            measure(f'get_result[{decoding.value}]', lambda: query.get_result(response), min_time),
+        ])
+    results.extend(run_issues(params, min_time))
+    return results
+
+
+def run_issues(params: Params, min_time: float) -> List[Result]:
+    """ Decoding of a page of GitHub issues. The tokenizer doesn't accept nullable fields and enums
+    in selection sets, so the decoders are made the same way as those of compiled queries,
+    rather than taken from a query.
+    """
+    response = fixtures.mk_issues_response(params.items)
+    raw = json.dumps(response).encode('utf-8')
+    wire_path = ('data', 'repository', 'issues', 'nodes')
+    typer = GQL.typer
+    mk_result, _ = construct(typer, fixtures.ListIssues)
+    results = []
+    for decoding in ResultDecoding:
+        get_result = mk_result_decoder(fixtures.ListIssues, typer, decoding, mk_result)
+        decode_issue = mk_value_decoder(fixtures.Issue, typer, decoding)
+        results.extend([
+            measure(f'issues.get_result[{decoding.value}]', lambda: get_result(response), min_time),
+            measure(f'issues.iter_results[{decoding.value}]',
+                    lambda: sum(1 for _ in iter_sequence(raw, wire_path, decode_issue)), min_time),
+        ])
+    builder = column_builder(fixtures.Issue, typer)
+    rows = response['data']['repository']['issues']['nodes']
+    results.extend([
+        measure('issues.columns', lambda: builder.build(rows), min_time),
+        measure('issues.columns[streamed]', lambda: builder.build(iter_sequence(raw, wire_path, lambda x: x)),
+                min_time),
+    ])
+    return results
+
+
+def commit() -> Optional[str]:
+    try:
+        proc = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return proc.stdout.strip()
+
+
+def compare(baseline: Mapping[str, Any], current: Mapping[str, Any]) -> None:
+    if baseline['params'] != current['params']:
+        print(f'Warning: the baseline was measured with {baseline["params"]}', file=sys.stderr)
+    before = {x['name']: x for x in baseline['results']}
+    for x in current['results']:
+        old = before.get(x['name'])
+        if old is None:
+            continue
+        print(f'{x["name"]:<28} {x["ops_per_second"] / old["ops_per_second"]:>6.2f}x ops/s  '
+              f'{x["peak_bytes"] / max(old["peak_bytes"], 1):>6.2f}x peak memory')
+
+
+def main(args: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--width', type=int, default=8)
+    parser.add_argument('--bindings', type=int, default=4)
+    parser.add_argument('--items', type=int, default=50, help='Elements of every list in the response.')
+    parser.add_argument('--min-time', type=float, default=0.5, help='Seconds per measurement.')
+    parser.add_argument('-o', '--output', help='Write the results to a file rather than stdout.')
+    parser.add_argument('--compare', help='Results of a previous run to compare with.')
+    ns = parser.parse_args(args)
+
+    params = Params(depth=ns.depth, width=ns.width, bindings=ns.bindings, items=ns.items)
+    report: Dict[str, Any] = {
+        'commit': commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': params._asdict(),
+        'results': [x._asdict() for x in run(params, ns.min_time)],
+    }
+    if ns.compare:
+        with open(ns.compare) as f:
+            compare(json.load(f), report)
+    if ns.output:
+        with open(ns.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    elif not ns.compare:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
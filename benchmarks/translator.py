@@ -0,0 +1,62 @@
+""" Compares the single-pass fragment translator with the token-by-token one.
+
+    $ python -m benchmarks.translator [--depth 30] [--width 200] [--number 200]
+"""
+import argparse
+import timeit
+from typing import NamedTuple, Sequence, Type, Any, Mapping
+
+from graphql_dsl import GQL
+from graphql_dsl.dsl import ResolvedBinding
+from graphql_dsl.translator import translate, translate_tokens_to_graphql
+
+
+def mk_deep_type(depth: int) -> Type[Any]:
+    """ Level0 { value child { value child { ... } } }
+    """
+    typ = NamedTuple(f'Level{depth}', [('value', int), ('name', str)])
+    for level in reversed(range(depth)):
+        typ = NamedTuple(f'Level{level}', [('value', int), ('name', str), ('child', typ)])
+    return typ
+
+
+def mk_wide_type(width: int) -> Type[Any]:
+    """ A root type with ``width`` attributes that share a handful of nested types.
+    """
+    leaf = NamedTuple('Leaf', [(f'attr{n}', str) for n in range(10)])
+    node = NamedTuple('Node', [('id', str), ('leaves', Sequence[leaf]), ('leaf', leaf)])
+    fields = []
+    for n in range(width):
+        fields.append((f'field{n}', (int, str, node, Sequence[node])[n % 4]))
+    return NamedTuple('Wide', fields)
+
+
+def run(name: str, typ: Type[Any], number: int, bindings: Mapping[str, Any]) -> None:
+    typer = GQL.typer
+    reference = ''.join(translate_tokens_to_graphql(typ, bindings, typer))
+    assert translate(typ, bindings, typer) == reference
+
+    tokenwise = min(timeit.repeat(lambda: ''.join(translate_tokens_to_graphql(typ, bindings, typer)),
+                                  number=number, repeat=3))
+    fragments = min(timeit.repeat(lambda: translate(typ, bindings, typer), number=number, repeat=3))
+    print(f'{name:<12} query length: {len(reference):>7} | '
+          f'token translator: {tokenwise / number * 1e6:>10.1f} us | '
+          f'fragment translator: {fragments / number * 1e6:>8.1f} us | '
+          f'speedup: {tokenwise / fragments:>7.1f}x')
+
+
+def main(args=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depth', type=int, default=30)
+    parser.add_argument('--width', type=int, default=200)
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args(args)
+    # a binding that applies at every level of the deep type
+    bound = {'child': [ResolvedBinding(input_attr_name='first', attr_name='first', type_name='Int', is_optional=False)]}
+    run('deep', mk_deep_type(args.depth), args.number, {})
+    run('deep+bound', mk_deep_type(args.depth), args.number, bound)
+    run('wide', mk_wide_type(args.width), args.number, {})
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,27 @@
-from .dsl import *
-from .types import ID
+""" The query DSL is imported on first access to its names, so that importing
+ahead-of-time compiled queries doesn't load the type constructor.
+"""
+from typing import Any
 
 
 __all__ = (
     'QUERY',
     'WITH',
     'PASS',
+    'DEFAULT',
     'MUTATE',
     'TO',
     'AS',
     'GQL',
     'ID',
 )
+
+
+def __getattr__(name: str) -> Any:
+    if name == 'ID':
+        from .scalars import ID
+        return ID
+    if name in __all__:
+        from . import dsl
+        return getattr(dsl, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
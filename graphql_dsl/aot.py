@@ -0,0 +1,153 @@
+""" Ahead-of-time compilation of queries into importable Python modules.
+
+A generated module contains precomputed query strings and straight-line (de)serializers,
+so that importing it doesn't involve the type constructor and its dependencies.
+"""
+import ast
+import importlib
+from enum import Enum
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Iterator, List, Tuple, Union, get_type_hints
+
+from typeit.utils import get_global_name_overrider
+
+from .compiler import Emitter
+from .index import field_index
+from .dsl import GraphQLQuery, GraphQLQueryConstructor, GQL, mk_payload_prefix
+from .persisted import dump_manifest, query_hash
+
+
+__all__ = (
+    'find_queries',
+    'compile_module',
+    'write_module',
+    'compile_manifest',
+)
+
+
+def find_queries(module: ModuleType) -> Iterator[Tuple[str, GraphQLQuery]]:
+    """ Yields top-level module attributes that hold queries built with a query constructor.
+    """
+    for name, value in vars(module).items():
+        if isinstance(value, GraphQLQuery) and value.expr is not None:
+            yield name, value
+
+
+def compile_module(module: Union[str, ModuleType], constructor: GraphQLQueryConstructor = GQL) -> str:
+    """ Returns the source code of a module with frozen versions of all queries found in ``module``.
+    """
+    if isinstance(module, str):
+        module = importlib.import_module(module)
+
+    emitter = Emitter(constructor.typer, validate=True)
+    definitions = []
+    exported = []
+    wire_names: Dict[str, str] = {}
+    for attr_name, query in find_queries(module):
+        wire_names.update(_wire_names(query, constructor))
+        encoder = emitter.encoder(query.expr.input)
+        decoder = emitter.decoder(query.expr.query)
+        result = emitter.unique_name(f'_result_{query.name}')
+        emitter.add_function([
+            f'def {result}(response):',
+            '    try:',
+            f'        return {decoder}(response["data"])',
+            '    except DecodingError:',
+            '        raise',
+            '    except (KeyError, TypeError, AttributeError, ValueError) as e:',
+            f'        raise DecodingError(f"Malformed {query.name} result: {{e!r}}") from e',
+        ])
+        definitions.extend([
+            f'{attr_name} = GraphQLQuery(',
+            f'    query={query.query!r},',
+            f'    name={query.name!r},',
+            f'    get_input_vars={encoder},',
+            f'    get_result={result},',
+            f'    sha256={query.sha256 or query_hash(query.query)!r},',
+            f'    payload_prefix={query.payload_prefix or mk_payload_prefix(query.name, query.query)!r},',
+            f'    defaults={query.defaults!r},',
+            ')',
+            '',
+        ])
+        exported.append(attr_name)
+
+    header = [
+        f'""" Generated by graphql-dsl from ``{module.__name__}``. Do not edit.',
+        '"""',
+        'from graphql_dsl.query import GraphQLQuery',
+    ]
+    header.extend(_render_namespace(emitter))
+    exports = ''.join(f'\n    {name!r},' for name in exported)
+    names = ''.join(f'\n    {k!r}: {v!r},' for k, v in sorted(wire_names.items()))
+    return '\n'.join(
+        header
+        + ['', '', f'__all__ = ({exports}\n)', '']
+        + ['# field names of the compiled queries, for seeding graphql_dsl.names.WIRE_NAMES']
+        + [f'__wire_names__ = {{{names}\n}}', '', '']
+        + emitter.lines
+        + definitions
+    )
+
+
+def write_module(module: Union[str, ModuleType],
+                 target: Path,
+                 constructor: GraphQLQueryConstructor = GQL) -> None:
+    target.write_text(compile_module(module, constructor))
+
+
+def compile_manifest(module: Union[str, ModuleType]) -> str:
+    """ Returns a JSON manifest of hashes and texts of all queries found in ``module``,
+    for servers that accept only whitelisted persisted queries.
+    """
+    if isinstance(module, str):
+        module = importlib.import_module(module)
+    return dump_manifest(query for _, query in find_queries(module))
+
+
+def _wire_names(query: GraphQLQuery, constructor: GraphQLQueryConstructor) -> Dict[str, str]:
+    overrider = get_global_name_overrider(constructor.typer.overrides)
+    index = field_index(constructor.typer)
+    rv = {}
+    for root in (query.expr.input, query.expr.query):
+        for typ in index.register_tree(root):
+            for python_name in get_type_hints(typ):
+                rv[python_name] = overrider(python_name)
+    return rv
+
+
+def _render_namespace(emitter: Emitter) -> List[str]:
+    imports = []
+    assignments = []
+    for name, obj in emitter.namespace.items():
+        if isinstance(obj, Enum):
+            imports.extend(_render_import(type(obj), f'{name}_type'))
+            assignments.append(f'{name} = {name}_type.{obj.name}')
+        elif isinstance(obj, type) or callable(obj):
+            imports.extend(_render_import(obj, name))
+        elif _is_literal(obj):
+            assignments.append(f'{name} = {obj!r}')
+        else:
+            raise TypeError(f'Cannot reference {obj!r} from a generated module')
+    return imports + assignments
+
+
+def _render_import(obj: Any, name: str) -> List[str]:
+    module = getattr(obj, '__module__', None)
+    qualname = getattr(obj, '__qualname__', '')
+    if not module or module == '__main__' or '<locals>' in qualname:
+        raise TypeError(
+            f'Cannot reference {obj!r} from a generated module: it should be defined at the top level '
+            f'of an importable module.'
+        )
+    root, _, rest = qualname.partition('.')
+    if rest:
+        return [f'from {module} import {root} as {name}_root', f'{name} = {name}_root.{rest}']
+    return [f'from {module} import {root} as {name}']
+
+
+def _is_literal(obj: Any) -> bool:
+    try:
+        return ast.literal_eval(repr(obj)) == obj
+    except (ValueError, SyntaxError):
+        return False
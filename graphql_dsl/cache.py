@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, NamedTuple, Hashable, Callable, TypeVar, Generic
+from weakref import WeakSet
+
+from .sync import after_fork_in_child
+
+
+__all__ = (
+    'CacheInfo',
+    'QueryCache',
+)
+
+
+V = TypeVar('V')
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class QueryCache(Generic[V]):
+    """ A bounded thread-safe LRU mapping of structural expression fingerprints
+    to compiled queries.
+
+    Compilation happens outside of the lock, so that concurrent callers don't serialize on
+    a slow translation. When two threads race on the same key, the value that was stored first
+    wins and is returned to both, which means a hit always yields the same instance.
+
+    Entries that are compiled before ``os.fork()`` are shared with the child processes,
+    the lock is replaced in a child, as it might have been held by another thread of the parent.
+    """
+    def __init__(self, maxsize: int = 256) -> None:
+        if maxsize < 1:
+            raise ValueError(f'Cache size should be a positive number, got {maxsize}')
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[Hashable, V]' = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        _caches.add(self)
+
+    def get_or_compile(self, key: Hashable, compile: Callable[[], V]) -> V:
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self._misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return value
+
+        value = compile()
+
+        with self._lock:
+            try:
+                # somebody else has compiled the same key while we were busy
+                return self._entries[key]
+            except KeyError:
+                pass
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(hits=self._hits,
+                             misses=self._misses,
+                             maxsize=self.maxsize,
+                             currsize=len(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_caches: 'WeakSet[QueryCache[Any]]' = WeakSet()
+
+
+@after_fork_in_child
+def _reset_locks() -> None:
+    for cache in list(_caches):
+        cache._lock = Lock()
@@ -1,16 +1,17 @@
 import argparse
 import sys
 
-from pkg_resources import get_distribution
+from importlib.metadata import version
 
 from . import gen
+from . import compile
 from ..info import DISTRIBUTION_NAME
 
 
 def main(args=None, in_channel=sys.stdin, out_channel=sys.stdout):
     parser = argparse.ArgumentParser(description='GraphQL DSL')
     parser.add_argument('-V', '--version', action='version',
-                        version=f'{DISTRIBUTION_NAME} {get_distribution(DISTRIBUTION_NAME).version}')
+                        version=f'{DISTRIBUTION_NAME} {version(DISTRIBUTION_NAME)}')
     subparsers = parser.add_subparsers(title='sub-commands',
                                        description='valid sub-commands',
                                        help='additional help',
@@ -22,6 +23,10 @@ def main(args=None, in_channel=sys.stdin, out_channel=sys.stdout):
     # ---------------------------
     gen.setup(subparsers)
 
+    # $ <cmd> compile
+    # ---------------------------
+    compile.setup(subparsers)
+
     # Parse arguments and config
     # --------------------------
     if args is None:
@@ -0,0 +1,40 @@
+import argparse
+import sys
+from pathlib import Path
+
+
+def setup(subparsers: argparse._SubParsersAction) -> argparse.ArgumentParser:
+    sub = subparsers.add_parser('compile', help='Compile queries of a Python module into an importable module '
+                                                'that does not depend on the query constructor.')
+    sub.add_argument('-m', '--module', required=True,
+                     help="Dotted name of a module with queries built by GQL(...).")
+    sub.add_argument('-o', '--out', help="Path to a generated module. "
+                                         "If not specified, the source will be written to stdout.")
+    sub.add_argument('-M', '--manifest', help="Path to a JSON manifest of persisted query hashes "
+                                              "and query texts, for whitelisting queries on the server.")
+    sub.add_argument('-f', '--force-overwrite', required=False, action='store_true',
+                     help="Overwrite the generated module if it already exists")
+    sub.set_defaults(run_cmd=main)
+    return sub
+
+
+def main(args: argparse.Namespace, in_channel=sys.stdin, out_channel=sys.stdout) -> None:
+    """ $ <cmd-prefix> compile -m <module> -o <target> [-M <manifest>]
+    """
+    targets = [Path(x) for x in (args.out, args.manifest) if x is not None]
+    for target in targets:
+        if target.exists() and not args.force_overwrite:
+            raise FileExistsError(f'{target} already exists, use --force-overwrite to replace it.')
+
+    # the compiler depends on the query constructor, which is imported only when it's needed
+    from .. import aot
+    src = aot.compile_module(args.module)
+    if args.manifest is not None:
+        Path(args.manifest).write_text(aot.compile_manifest(args.module))
+    if args.out is None:
+        out_channel.write(src)
+        return
+
+    target = Path(args.out)
+    target.write_text(src)
+    out_channel.write(f'Successfully compiled {args.module} into {target}.\n')
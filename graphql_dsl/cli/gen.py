@@ -1,12 +1,11 @@
 import argparse
+import hashlib
 import json
 import sys
 from pathlib import Path
 from typing import Mapping
 from itertools import islice
 
-from .. import parser
-
 
 def is_empty_dir(p: Path) -> bool:
     return p.is_dir() and not bool(list(islice(p.iterdir(), 1)))
@@ -23,6 +22,14 @@ def setup(subparsers: argparse._SubParsersAction) -> argparse.ArgumentParser:
     sub.add_argument('-f', '--force-overwrite', required=False, action='store_true',
                      help="Overwrite existing files and directories if they already exist"
                      )
+    sub.add_argument('-m', '--modules', type=int, default=16,
+                     help="Number of modules that definitions are distributed among.")
+    sub.add_argument('-j', '--jobs', type=int, default=0,
+                     help="Number of rendering processes, all available CPUs by default.")
+    sub.add_argument('--cache', required=False,
+                     help="Path to the cache of rendered definitions, a file in the user cache directory by default.")
+    sub.add_argument('--schema-cache', required=False,
+                     help="Path to the cache of the parsed schema, a file in the user cache directory by default.")
     sub.set_defaults(run_cmd=main)
     return sub
 
@@ -36,8 +43,24 @@ def main(args: argparse.Namespace, in_channel=sys.stdin, out_channel=sys.stdout)
         # source is None, read from stdin
         src = in_channel.read()
 
-    spec = parser.parse(src)
-
-
-    out_channel.write('Successfully parsed.\n')
+    # the parser depends on graphql-core, which is imported only when it's needed
+    from .. import parser
+    from .. import codegen
+    target = Path(args.out_dir) / args.name
+    if args.schema_cache:
+        schema_cache = Path(args.schema_cache)
+    else:
+        # a cache per package, as it holds a single schema
+        package_id = hashlib.sha256(str(target.resolve()).encode('utf-8')).hexdigest()[:16]
+        schema_cache = codegen.cache_dir() / f'schema-{package_id}'
+        schema_cache.parent.mkdir(parents=True, exist_ok=True)
+    with parser.load(src, schema_cache) as spec:
+        report = codegen.generate(spec, target,
+                                  force=args.force_overwrite,
+                                  modules=args.modules,
+                                  jobs=args.jobs or None,
+                                  cache_path=args.cache)
+    out_channel.write(f'Successfully generated {report.types} types into {target}: '
+                      f'{report.rendered} rendered, '
+                      f'{len(report.written)} files written, {len(report.unchanged)} unchanged.\n')
 
@@ -0,0 +1,494 @@
+""" Generator of Python client packages from GraphQL schema definitions.
+
+Definitions are distributed among a fixed number of modules by hashes of their names, so that
+a definition renders the same way regardless of the rest of the schema. Rendered definitions are cached
+on disk, and only the new or changed ones are rendered again, in parallel processes.
+Files whose content hasn't changed since the previous run are left untouched.
+"""
+import hashlib
+import json
+import keyword
+import os
+import sqlite3
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Set, Tuple, Union
+
+import graphql
+import inflection
+
+from .names import camelize
+from .parser import Schema
+from .scalars import GQL_SCALARS, ID
+
+
+__all__ = (
+    'MANIFEST_NAME',
+    'CACHE_NAME',
+    'SCHEMA_CACHE_NAME',
+    'GenerationReport',
+    'cache_dir',
+    'PackageWriter',
+    'RenderCache',
+    'generate',
+)
+
+
+# hashes of generated files, to tell them apart from files modified by hand
+MANIFEST_NAME = '.graphql-dsl.json'
+# rendered definitions of previous runs, shared by all generated packages
+CACHE_NAME = 'rendered.sqlite3'
+# the parsed schema of the previous run
+SCHEMA_CACHE_NAME = '.graphql-dsl-schema'
+# caches that packages generated by earlier versions may contain
+CACHE_FILES = frozenset({'.graphql-dsl-cache.sqlite3', SCHEMA_CACHE_NAME})
+
+BUILTIN_SCALARS: Mapping[str, str] = {
+    **{graphql_name: python_type.__name__ for python_type, graphql_name in GQL_SCALARS.items()},
+    'ID': ID.__name__,
+}
+
+HEADER = '""" Generated by graphql-dsl. Do not edit.\n"""\n'
+
+# changes whenever rendering changes, to invalidate caches of rendered definitions
+FORMAT_VERSION = 1
+
+
+class GenerationReport(NamedTuple):
+    types: int
+    written: Tuple[str, ...]
+    unchanged: Tuple[str, ...]
+    removed: Tuple[str, ...]
+    # definitions that were rendered rather than taken from the cache
+    rendered: int = 0
+
+
+def _file_hash(path: Path) -> Optional[str]:
+    try:
+        f = path.open('rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        h = hashlib.sha256()
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            h.update(chunk)
+        return h.hexdigest()
+
+
+class _ModuleFile:
+    """ A module that is written to a temporary file and hashed on the fly.
+    """
+    def __init__(self, writer: 'PackageWriter', name: str) -> None:
+        self.name = name
+        self.path = writer.root / name
+        self.tmp_path = writer.root / f'.{name}.tmp'
+        self._hash = hashlib.sha256()
+        self._f = self.tmp_path.open('w', encoding='utf-8', newline='\n')
+
+    def write(self, text: str) -> None:
+        self._f.write(text)
+        self._hash.update(text.encode('utf-8'))
+
+    def close(self) -> str:
+        self._f.close()
+        return self._hash.hexdigest()
+
+
+class PackageWriter:
+    """ Replaces files of a package only when their content changes.
+
+    Files that were neither generated by a previous run nor are identical to the new ones
+    are overwritten only when ``force`` is set, the same applies to removal of stale generated files.
+    """
+    def __init__(self, root: Path, force: bool = False) -> None:
+        self.root = root
+        self.force = force
+        self.written: List[str] = []
+        self.unchanged: List[str] = []
+        self.removed: List[str] = []
+        self._previous: Dict[str, str] = {}
+        self._current: Dict[str, str] = {}
+        self._open: Dict[str, _ModuleFile] = {}
+
+        manifest = root / MANIFEST_NAME
+        if manifest.exists():
+            self._previous = json.loads(manifest.read_text())
+        elif root.exists() and any(x.name not in CACHE_FILES for x in root.iterdir()) and not force:
+            raise FileExistsError(f'{root} already exists and was not generated by graphql-dsl, '
+                                  f'use --force-overwrite to replace its content.')
+        root.mkdir(parents=True, exist_ok=True)
+
+    def open(self, name: str) -> _ModuleFile:
+        f = self._open[name] = _ModuleFile(self, name)
+        return f
+
+    def commit(self, f: _ModuleFile) -> None:
+        del self._open[f.name]
+        new_hash = f.close()
+        existing = _file_hash(f.path)
+        self._current[f.name] = new_hash
+        if existing == new_hash:
+            f.tmp_path.unlink()
+            self.unchanged.append(f.name)
+            return
+        if existing is not None and existing != self._previous.get(f.name) and not self.force:
+            f.tmp_path.unlink()
+            raise FileExistsError(f'{f.path} was modified after it had been generated, '
+                                  f'use --force-overwrite to replace it.')
+        os.replace(f.tmp_path, f.path)
+        self.written.append(f.name)
+
+    def write(self, name: str, content: str) -> None:
+        f = self.open(name)
+        f.write(content)
+        self.commit(f)
+
+    def finish(self) -> None:
+        """ Removes stale generated files and records hashes of the current ones.
+        """
+        for name in sorted(set(self._previous) - set(self._current)):
+            path = self.root / name
+            existing = _file_hash(path)
+            if existing is None:
+                continue
+            if existing != self._previous[name] and not self.force:
+                raise FileExistsError(f'{path} is no longer generated, but it was modified after it had been '
+                                      f'generated, use --force-overwrite to remove it.')
+            path.unlink()
+            self.removed.append(name)
+        manifest = json.dumps(self._current, indent=2, sort_keys=True)
+        (self.root / MANIFEST_NAME).write_text(manifest)
+
+    def abort(self) -> None:
+        for f in list(self._open.values()):
+            f.close()
+            f.tmp_path.unlink()
+        self._open.clear()
+
+
+def _safe_name(name: str) -> str:
+    return f'{name}_' if keyword.iskeyword(name) else name
+
+
+def python_field_name(wire_name: str) -> str:
+    return _safe_name(inflection.underscore(wire_name))
+
+
+def _docstring(description: Optional[graphql.StringValueNode], indent: str) -> str:
+    if description is None or not description.value.strip():
+        return ''
+    text = description.value.strip().replace('\\', '\\\\').replace('"""', '\\"\\"\\"')
+    text = text.replace('\n', f'\n{indent}')
+    return f'{indent}""" {text}\n{indent}"""\n'
+
+
+def shard_of(name: str, modules: int) -> int:
+    """ Module of a definition. It depends on the name only, so that references to other definitions
+    can be rendered without knowing anything but their names.
+    """
+    return zlib.crc32(name.encode('utf-8')) % modules
+
+
+def shard_name(shard: int, modules: int) -> str:
+    return f'_defs_{shard:0{len(str(modules - 1))}d}'
+
+
+class Rendered(NamedTuple):
+    kind: str
+    name: str
+    text: str
+    # other modules that the definition refers to
+    shards: Tuple[int, ...]
+    # (python name, wire name) of fields whose names don't survive the round trip through camelization
+    overrides: Tuple[Tuple[str, str], ...]
+
+
+class _Context:
+    __slots__ = ('shard', 'modules', 'shards')
+
+    def __init__(self, shard: int, modules: int) -> None:
+        self.shard = shard
+        self.modules = modules
+        self.shards: Set[int] = set()
+
+    def ref(self, name: str) -> str:
+        python_name = _safe_name(name)
+        shard = shard_of(name, self.modules)
+        if shard == self.shard:
+            return python_name
+        self.shards.add(shard)
+        return f'{shard_name(shard, self.modules)}.{python_name}'
+
+
+_Overrides = Tuple[Tuple[str, str], ...]
+# kind, text and overrides of a definition
+_Output = Tuple[str, str, _Overrides]
+
+
+def _type_expr(node: graphql.TypeNode, ctx: _Context, nullable: bool = True) -> str:
+    if isinstance(node, graphql.NonNullTypeNode):
+        return _type_expr(node.type, ctx, nullable=False)
+    if isinstance(node, graphql.ListTypeNode):
+        expr = f'Sequence[{_type_expr(node.type, ctx)}]'
+    else:
+        name = node.name.value
+        expr = BUILTIN_SCALARS.get(name) or ctx.ref(name)
+    return f'Optional[{expr}]' if nullable else expr
+
+
+def _render_scalar(node: graphql.ScalarTypeDefinitionNode, ctx: _Context) -> _Output:
+    return 'scalar', f'{_safe_name(node.name.value)} = NewType({node.name.value!r}, str)\n\n\n', ()
+
+
+def _render_enum(node: graphql.EnumTypeDefinitionNode, ctx: _Context) -> _Output:
+    lines = [f'class {_safe_name(node.name.value)}(Enum):\n', _docstring(node.description, '    ')]
+    for value in node.values or ():
+        lines.append(f'    {_safe_name(value.name.value)} = {value.name.value!r}\n')
+    if not node.values:
+        lines.append('    pass\n')
+    lines.append('\n\n')
+    return 'enum', ''.join(lines), ()
+
+
+def _render_input(node: graphql.InputObjectTypeDefinitionNode,
+                  ctx: _Context) -> _Output:
+    fields = node.fields or ()
+    # nullable fields are optional, and optional fields should follow the required ones
+    required = [x for x in fields if isinstance(x.type, graphql.NonNullTypeNode)]
+    optional = [x for x in fields if not isinstance(x.type, graphql.NonNullTypeNode)]
+    text, overrides = _render_named_tuple(node, [(x, '') for x in required] + [(x, ' = None') for x in optional], ctx)
+    return 'input', text, overrides
+
+
+def _render_object(node: Any, ctx: _Context) -> _Output:
+    text, overrides = _render_named_tuple(node, [(x, '') for x in node.fields or ()], ctx)
+    return 'type', text, overrides
+
+
+def _render_named_tuple(node: Any,
+                        fields: List[Tuple[Any, str]],
+                        ctx: _Context) -> Tuple[str, _Overrides]:
+    lines = [f'class {_safe_name(node.name.value)}(NamedTuple):\n', _docstring(node.description, '    ')]
+    overrides = []
+    for field, default in fields:
+        wire_name = field.name.value
+        python_name = python_field_name(wire_name)
+        if camelize(python_name) != wire_name:
+            overrides.append((python_name, wire_name))
+        lines.append(f'    {python_name}: {_type_expr(field.type, ctx)!r}{default}\n')
+    if not fields:
+        lines.append('    pass\n')
+    lines.append('\n\n')
+    return ''.join(lines), tuple(overrides)
+
+
+def _render_union(node: graphql.UnionTypeDefinitionNode, ctx: _Context) -> _Output:
+    members = ', '.join(repr(ctx.ref(x.name.value)) for x in node.types or ())
+    return 'union', f'{_safe_name(node.name.value)} = Union[{members}]\n\n\n', ()
+
+
+_RENDERERS: Mapping[Any, Callable[[Any, _Context], _Output]] = {
+    graphql.ScalarTypeDefinitionNode: _render_scalar,
+    graphql.EnumTypeDefinitionNode: _render_enum,
+    graphql.InputObjectTypeDefinitionNode: _render_input,
+    graphql.ObjectTypeDefinitionNode: _render_object,
+    graphql.InterfaceTypeDefinitionNode: _render_object,
+    graphql.UnionTypeDefinitionNode: _render_union,
+}
+
+
+def render_definition(node: graphql.DefinitionNode, modules: int) -> Rendered:
+    name = node.name.value
+    ctx = _Context(shard_of(name, modules), modules)
+    kind, text, overrides = _RENDERERS[node.__class__](node, ctx)
+    return Rendered(kind=kind, name=_safe_name(name), text=text, shards=tuple(sorted(ctx.shards)), overrides=overrides)
+
+
+def _render_unit(unit: Tuple[int, List[str]]) -> List[Rendered]:
+    """ Renders a work unit of a process pool. Definitions are passed as SDL text,
+    which is much cheaper to transfer than the AST.
+    """
+    modules, sources = unit
+    return [render_definition(graphql.parse(sdl, no_location=True).definitions[0], modules) for sdl in sources]
+
+
+# schema definitions, directives and type extensions don't define types of their own
+_RENDERABLE_KINDS = frozenset(x.kind for x in _RENDERERS)
+
+
+def _source_text(node: graphql.DefinitionNode) -> str:
+    """ The source span of a definition, which is much cheaper than printing it.
+    Only documents that were parsed without locations are printed.
+    """
+    if node.loc is None:
+        return graphql.print_ast(node)
+    return node.loc.source.body[node.loc.start:node.loc.end]
+
+
+def _definitions(document: Union[graphql.DocumentNode, Schema]) -> Iterator[Tuple[str, str]]:
+    """ Names and SDL of renderable definitions.
+    """
+    if isinstance(document, Schema):
+        items: Iterable[Tuple[str, Optional[str], Any]] = document.definitions
+    else:
+        items = ((x.kind, getattr(x, 'name', None) and x.name.value, x) for x in document.definitions)
+    for kind, name, definition in items:
+        # built-in scalars are defined by graphql-dsl
+        if kind in _RENDERABLE_KINDS and name not in BUILTIN_SCALARS:
+            yield name, definition if isinstance(definition, str) else _source_text(definition)
+
+
+class RenderCache:
+    """ On-disk cache of rendered definitions, keyed by hashes of their SDL.
+    """
+    def __init__(self, path: Union[Path, str] = ':memory:') -> None:
+        self._db = sqlite3.connect(str(path))
+        self._db.execute('CREATE TABLE IF NOT EXISTS rendered (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+
+    def get(self, key: str) -> Optional[Rendered]:
+        row = self._db.execute('SELECT value FROM rendered WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        kind, name, text, shards, overrides = json.loads(row[0])
+        return Rendered(kind, name, text, tuple(shards), tuple(tuple(x) for x in overrides))
+
+    def __contains__(self, key: str) -> bool:
+        return self._db.execute('SELECT 1 FROM rendered WHERE key = ?', (key,)).fetchone() is not None
+
+    def put_many(self, items: Iterable[Tuple[str, Rendered]]) -> None:
+        with self._db:
+            self._db.executemany('INSERT OR REPLACE INTO rendered VALUES (?, ?)',
+                                 ((key, json.dumps(value)) for key, value in items))
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def cache_dir() -> Path:
+    """ The per-user directory of caches of the generator, which keeps them out of generated packages,
+    e.g. ``~/.cache/graphql-dsl``.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or (os.environ.get('LOCALAPPDATA') if os.name == 'nt' else None)
+    return (Path(base) if base else Path.home() / '.cache') / 'graphql-dsl'
+
+
+def _cache_key(sdl: str, modules: int) -> str:
+    return hashlib.sha256(f'{FORMAT_VERSION}:{modules}:{sdl}'.encode('utf-8')).hexdigest()
+
+
+def generate(document: Union[graphql.DocumentNode, Schema],
+             target: Path,
+             force: bool = False,
+             modules: int = 16,
+             jobs: Optional[int] = 1,
+             cache_path: Union[Path, str, None] = None) -> GenerationReport:
+    """ Generates a client package in the ``target`` directory.
+
+    Definitions are distributed among ``modules`` modules by their names, and rendered across ``jobs``
+    processes (all available CPUs when ``None``). Rendered definitions are cached in ``cache_path``
+    (a file in ``cache_dir()`` by default, ``':memory:'`` disables caching), so that only changed definitions
+    are rendered again.
+    """
+    if modules < 1:
+        raise ValueError('The number of modules should be a positive number')
+    writer = PackageWriter(target, force)
+    if cache_path is None:
+        cache_path = cache_dir() / CACHE_NAME
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache = RenderCache(cache_path)
+    try:
+        # the only pass over the document: definitions that aren't cached yet are grouped
+        # into work units, one unit per module
+        keys: Dict[int, List[str]] = {}
+        pending: Dict[int, List[Tuple[str, str]]] = {}
+        for name, sdl in _definitions(document):
+            shard = shard_of(name, modules)
+            key = _cache_key(sdl, modules)
+            keys.setdefault(shard, []).append(key)
+            if key not in cache:
+                pending.setdefault(shard, []).append((key, sdl))
+
+        units = list(pending.values())
+        work = [(modules, [sdl for _, sdl in unit]) for unit in units]
+        for unit, rendered in zip(units, _render(work, jobs)):
+            cache.put_many(zip((key for key, _ in unit), rendered))
+
+        count = _assemble(writer, cache, keys, modules)
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        cache.close()
+    writer.finish()
+    return GenerationReport(types=count,
+                            written=tuple(writer.written),
+                            unchanged=tuple(writer.unchanged),
+                            removed=tuple(writer.removed),
+                            rendered=sum(len(x) for x in pending.values()))
+
+
+def _render(work: List[Tuple[int, List[str]]], jobs: Optional[int]) -> Iterator[List[Rendered]]:
+    if jobs == 1 or len(work) < 2:
+        yield from map(_render_unit, work)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(_render_unit, work)
+
+
+SHARD_HEADER = (
+    f'{HEADER}from enum import Enum\n'
+    f'from typing import NamedTuple, NewType, Optional, Sequence, Union\n\n'
+    f'from graphql_dsl.scalars import ID\n'
+)
+
+
+def _assemble(writer: PackageWriter, cache: RenderCache, keys: Mapping[int, List[str]], modules: int) -> int:
+    scalars: List[Tuple[str, str]] = list(BUILTIN_SCALARS.items())
+    overrides: List[Tuple[str, str, str, str]] = []
+    shards = sorted(keys)
+    count = 0
+    for shard in shards:
+        module = shard_name(shard, modules)
+        entries = [cache.get(key) for key in keys[shard]]
+        refs = sorted(set().union(*(x.shards for x in entries)))
+        f = writer.open(f'{module}.py')
+        f.write(SHARD_HEADER)
+        if refs:
+            f.write(f'from . import {", ".join(shard_name(x, modules) for x in refs)}\n')
+        f.write('\n\n')
+        for entry in entries:
+            f.write(entry.text)
+            if entry.kind == 'scalar':
+                scalars.append((entry.name, entry.name))
+            overrides.extend((module, entry.name, python_name, wire_name) for python_name, wire_name in entry.overrides)
+        exports = ''.join(f'\n    {x.name!r},' for x in entries)
+        f.write(f'__all__ = ({exports}\n)\n')
+        writer.commit(f)
+        count += len(entries)
+
+    scalar_modules = sorted({shard_name(shard_of(name, modules), modules) for name, _ in scalars[len(BUILTIN_SCALARS):]})
+    items = ''.join(f'\n    {k!r}: {v},' for k, v in scalars)
+    writer.write('scalars.py', ''.join([
+        HEADER,
+        'from typing import Any, Mapping\n\n',
+        'from graphql_dsl.scalars import ID\n',
+        ''.join(f'from .{x} import *\n' for x in scalar_modules),
+        f'\n\nSCALARS: Mapping[str, Any] = {{{items}\n}}\n',
+    ]))
+
+    items = ''.join(f'\n    {name}.{python_name}: {wire_name!r},' for _, name, python_name, wire_name in overrides)
+    writer.write('overrides.py', ''.join([
+        HEADER,
+        ''.join(f'from .{x} import *\n' for x in sorted({module for module, *_ in overrides})),
+        '\n\n',
+        '# fields whose wire names differ from the camelized Python names, e.g. GQL.typer & OVERRIDES\n',
+        f'OVERRIDES = {{{items}\n}}\n',
+    ]))
+    writer.write('__init__.py', ''.join([
+        HEADER,
+        ''.join(f'from .{shard_name(x, modules)} import *\n' for x in shards),
+        'from .scalars import SCALARS\n',
+        'from .overrides import OVERRIDES\n',
+    ]))
+    return count
@@ -0,0 +1,134 @@
+""" Columnar export of sequences of structures.
+
+Rows are read straight from wire objects into a buffer per field, without building an instance
+of the row type for every element. Numeric fields are collected into ``array.array`` buffers,
+which NumPy arrays share memory with, other fields are collected into lists.
+"""
+from array import array
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Tuple, Type
+from weakref import WeakKeyDictionary
+
+from typeit.combinator.constructor import _TypeConstructor
+
+from .scalars import ID
+from .typeinfo import NO_DEFAULT, is_structure, struct_fields, unwrap_optional
+
+
+__all__ = (
+    'Column',
+    'ColumnBuilder',
+    'column_builder',
+)
+
+
+# typecodes of array.array and dtypes of numpy for non-nullable numeric fields
+_NUMERIC: Dict[Any, Tuple[str, str]] = {
+    int: ('q', 'int64'),
+    float: ('d', 'float64'),
+    bool: ('b', 'bool'),
+}
+
+
+class Column(NamedTuple):
+    # dot-separated Python names of the field, e.g. author.login
+    name: str
+    wire_path: Tuple[str, ...]
+    # array.array typecode, or None for columns that are collected into lists
+    typecode: Any = None
+    dtype: str = 'object'
+    # converts wire values of list columns, e.g. into enums
+    convert: Any = None
+    nullable: bool = False
+    # the value of fields that are absent on the wire
+    default: Any = NO_DEFAULT
+
+
+class ColumnBuilder(NamedTuple):
+    columns: Tuple[Column, ...]
+    fill: Callable[..., None]
+
+    def build(self, rows: Iterable[Any], numpy: bool = False) -> Dict[str, Any]:
+        """ Returns a mapping of column names to ``array.array`` or lists, or to NumPy arrays.
+        """
+        buffers: List[Any] = [array(x.typecode) if x.typecode else [] for x in self.columns]
+        self.fill(rows, *(x.append for x in buffers))
+        if not numpy:
+            return {c.name: b for c, b in zip(self.columns, buffers)}
+
+        import numpy as np
+        return {
+            # numeric buffers are shared rather than copied
+            c.name: np.frombuffer(b, dtype=c.dtype) if c.typecode else np.array(b, dtype=object)
+            for c, b in zip(self.columns, buffers)
+        }
+
+
+def _columns(typ: Type[Any], typer: _TypeConstructor, prefix: str, wire_prefix: Tuple[str, ...]) -> List[Column]:
+    rv = []
+    for field in struct_fields(typ, typer):
+        name = f'{prefix}{field.python_name}'
+        wire_path = wire_prefix + (field.wire_name,)
+        python_type = getattr(field.python_type, '__supertype__', field.python_type)
+        inner, is_optional = unwrap_optional(python_type)
+        if is_structure(inner) and not is_optional:
+            # nested objects are flattened
+            rv.extend(_columns(inner, typer, f'{name}.', wire_path))
+        elif python_type in _NUMERIC:
+            typecode, dtype = _NUMERIC[python_type]
+            rv.append(Column(name, wire_path, typecode, dtype, default=field.default))
+        elif (isinstance(inner, type) and issubclass(inner, Enum)) or inner is ID:
+            rv.append(Column(name, wire_path, convert=inner, nullable=is_optional, default=field.default))
+        else:
+            # strings, nullable numbers, nullable objects and sequences are collected as they are on the wire
+            rv.append(Column(name, wire_path, nullable=is_optional, default=field.default))
+    return rv
+
+
+def _mk_fill(columns: Tuple[Column, ...]) -> Callable[..., None]:
+    """ Generates a loop that appends values of every row to the buffers.
+    """
+    ns: Dict[str, Any] = {}
+    args = ', '.join(f'a{n}' for n in range(len(columns)))
+    lines = [f'def fill(rows, {args}):', '    for d in rows:']
+    for n, column in enumerate(columns):
+        *parents, key = column.wire_path
+        value = 'd' + ''.join(f'[{x!r}]' for x in parents)
+        if column.default is not NO_DEFAULT:
+            ns[f'default{n}'] = column.default
+            value += f'.get({key!r}, default{n})'
+        elif column.nullable:
+            value += f'.get({key!r})'
+        else:
+            value += f'[{key!r}]'
+        if column.convert is None:
+            lines.append(f'        a{n}({value})')
+            continue
+        ns[f'c{n}'] = column.convert
+        if column.nullable or column.default is not NO_DEFAULT:
+            lines.append(f'        v = {value}')
+            lines.append(f'        a{n}(None if v is None else c{n}(v))')
+        else:
+            lines.append(f'        a{n}(c{n}({value}))')
+    if not columns:
+        lines.append('        pass')
+    exec(compile('\n'.join(lines), '<graphql-dsl columns>', 'exec'), ns)
+    return ns['fill']
+
+
+_builders: 'WeakKeyDictionary[_TypeConstructor, Dict[Any, ColumnBuilder]]' = WeakKeyDictionary()
+
+
+def column_builder(typ: Type[Any], typer: _TypeConstructor) -> ColumnBuilder:
+    """ Returns a builder of columns of the scalar fields of ``typ`` and its nested structures.
+    """
+    try:
+        builders = _builders[typer]
+    except KeyError:
+        builders = _builders.setdefault(typer, {})
+    try:
+        return builders[typ]
+    except KeyError:
+        pass
+    columns = tuple(_columns(typ, typer, '', ()))
+    return builders.setdefault(typ, ColumnBuilder(columns, _mk_fill(columns)))
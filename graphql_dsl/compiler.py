@@ -0,0 +1,355 @@
+""" Generator of straight-line Python source code of serializers and deserializers
+for query types.
+
+The generated functions rely only on the field lists and wire names that the typer has already
+computed for a type, therefore they can be executed either in-process, or written down as
+an importable module that doesn't need the typer at all.
+"""
+import re
+from enum import Enum
+from typing import Type, Any, Dict, List, Tuple, Optional, Callable
+
+from typeit.combinator.constructor import _TypeConstructor
+
+from .errors import DecodingError
+from .scalars import ID
+from .typeinfo import NO_DEFAULT, struct_fields, is_structure, unwrap_optional, sequence_item
+from .views import ViewSequence
+
+
+__all__ = (
+    'DecodingError',
+    'Emitter',
+)
+
+
+# Constructor and serializer of a type that the emitter cannot handle on its own
+Fallback = Callable[[Any], Tuple[Callable[[Any], Any], Callable[[Any], Any]]]
+
+_PRIMITIVES = frozenset([str, int, float, bool])
+
+
+def _type_label(typ: Any) -> str:
+    return getattr(typ, '__name__', None) or repr(typ)
+
+
+def _type_ident(typ: Any) -> str:
+    return re.sub(r'\W+', '_', _type_label(typ)).strip('_')
+
+
+class Emitter:
+    """ Accumulates generated function definitions and the namespace they refer to.
+
+    Every external object (user types, default values, fallback callables) is referenced
+    via a generated name that is stored in ``namespace``, so that the source can be either
+    executed against the namespace directly, or rendered along with import statements.
+    """
+    def __init__(self,
+                 typer: _TypeConstructor,
+                 validate: bool = True,
+                 fallback: Optional[Fallback] = None) -> None:
+        self.typer = typer
+        self.validate = validate
+        self.fallback = fallback
+        self.namespace: Dict[str, Any] = {'DecodingError': DecodingError}
+        self.lines: List[str] = []
+        self._refs: Dict[int, str] = {}
+        self._decoders: Dict[Any, str] = {}
+        self._encoders: Dict[Any, str] = {}
+        self._views: Dict[Any, str] = {}
+        self._fallbacks: Dict[Any, Tuple[str, str]] = {}
+        self._counter = 0
+
+    def unique_name(self, prefix: str) -> str:
+        self._counter += 1
+        return f'{prefix}_{self._counter}'
+
+    def ref(self, obj: Any) -> str:
+        try:
+            return self._refs[id(obj)]
+        except KeyError:
+            pass
+        name = self.unique_name('_r')
+        self._refs[id(obj)] = name
+        self.namespace[name] = obj
+        return name
+
+    def source(self) -> str:
+        return '\n'.join(self.lines)
+
+    def add_function(self, lines: List[str]) -> None:
+        self.lines.extend(lines)
+        self.lines.append('')
+        self.lines.append('')
+
+    def execute(self) -> Dict[str, Any]:
+        """ Compiles the accumulated source in-process and returns the populated namespace
+        """
+        ns = dict(self.namespace)
+        exec(compile(self.source(), '<graphql-dsl>', 'exec'), ns)
+        return ns
+
+    # Deserializers
+    # -------------
+
+    def decoder(self, typ: Any) -> str:
+        """ Returns the name of a generated function that decodes wire values of ``typ``.
+        """
+        try:
+            return self._decoders[typ]
+        except KeyError:
+            pass
+        if is_structure(typ):
+            return self._struct_decoder(typ)
+
+        name = self.unique_name(f'_decode_{_type_ident(typ)}')
+        self._decoders[typ] = name
+        conds, expr = self._decode_value(typ, 'v', _type_label(typ))
+        self.add_function(
+            [f'def {name}(v):']
+            + self._raise_if(conds, _type_label(typ), typ, '    ')
+            + [f'    return {expr}']
+        )
+        return name
+
+    def _struct_decoder(self, typ: Type[Any]) -> str:
+        name = self.unique_name(f'_decode_{typ.__name__}')
+        # register before emitting the body to support recursive types
+        self._decoders[typ] = name
+        fields = struct_fields(typ, self.typer)
+        body = []
+        if self.validate:
+            body.append( '    if d.__class__ is not dict:')
+            body.append(f'        raise DecodingError({typ.__name__ + ": an object is expected"!r})')
+        args = []
+        for n, field in enumerate(fields):
+            var = f'v{n}'
+            path = f'{typ.__name__}.{field.wire_name}'
+            _, is_optional = unwrap_optional(field.python_type)
+            conds, expr = self._decode_value(field.python_type, var, path)
+            if field.default is NO_DEFAULT:
+                if is_optional:
+                    body.append(f'    {var} = d.get({field.wire_name!r})')
+                else:
+                    body.append(f'    {var} = d[{field.wire_name!r}]')
+                body.extend(self._raise_if(conds, path, field.python_type, '    '))
+                args.append((field.python_name, expr))
+            else:
+                body.append(f'    if {field.wire_name!r} in d:')
+                body.append(f'        {var} = d[{field.wire_name!r}]')
+                body.extend(self._raise_if(conds, path, field.python_type, '        '))
+                if expr != var:
+                    body.append(f'        {var} = {expr}')
+                body.append( '    else:')
+                body.append(f'        {var} = {self.ref(field.default)}')
+                args.append((field.python_name, var))
+
+        if hasattr(typ, '_fields'):
+            call_args = ', '.join(expr for _, expr in args)
+        else:
+            call_args = ', '.join(f'{attr}={expr}' for attr, expr in args)
+        body.append(f'    return {self.ref(typ)}({call_args})')
+        self.add_function([f'def {name}(d):'] + body)
+        return name
+
+    def _raise_if(self, conds: List[str], path: str, typ: Any, indent: str) -> List[str]:
+        rv = []
+        for cond in conds:
+            rv.append(f'{indent}if {cond}:')
+            rv.append(f'{indent}    raise DecodingError({path + ": unexpected value for " + _type_label(typ)!r})')
+        return rv
+
+    def _decode_value(self, typ: Any, src: str, path: str) -> Tuple[List[str], str]:
+        """ Returns a list of conditions that indicate an invalid value, and an expression
+        that decodes a valid value.
+        """
+        typ = getattr(typ, '__supertype__', typ)  # NewType
+        inner, is_optional = unwrap_optional(typ)
+        if is_optional:
+            conds, expr = self._decode_value(inner, src, path)
+            conds = [f'{src} is not None and {c}' for c in conds]
+            if expr != src:
+                expr = f'None if {src} is None else {expr}'
+            return conds, expr
+
+        if typ in _PRIMITIVES:
+            return ([f'{src}.__class__ is not {typ.__name__}'] if self.validate else []), src
+
+        if typ is ID:
+            return ([f'{src}.__class__ is not str'] if self.validate else []), f'{self.ref(ID)}({src})'
+
+        if isinstance(typ, type) and issubclass(typ, Enum):
+            return [], f'{self.ref(typ)}({src})'
+
+        if is_structure(typ):
+            return [], f'{self.decoder(typ)}({src})'
+
+        item = sequence_item(typ)
+        if item is not None:
+            conds = [f'{src}.__class__ is not list'] if self.validate else []
+            item_conds, item_expr = self._decode_value(item, 'item', path)
+            if not item_conds and item_expr == 'item':
+                return conds, f'list({src})'
+            return conds, f'[{self.decoder(item)}(item) for item in {src}]'
+
+        decode, _ = self._fallback(typ)
+        return [], f'{decode}({src})'
+
+    def _fallback(self, typ: Any) -> Tuple[str, str]:
+        try:
+            return self._fallbacks[typ]
+        except KeyError:
+            pass
+        if self.fallback is None:
+            raise TypeError(f'Cannot generate (de)serializers for {typ}: the type is not supported')
+        decode, encode = self.fallback(typ)
+        rv = self._fallbacks[typ] = (self.ref(decode), self.ref(encode))
+        return rv
+
+    # Serializers
+    # -----------
+
+    def encoder(self, typ: Any) -> str:
+        """ Returns the name of a generated function that encodes values of ``typ`` to their wire form.
+        """
+        try:
+            return self._encoders[typ]
+        except KeyError:
+            pass
+        name = self.unique_name(f'_encode_{_type_ident(typ)}')
+        self._encoders[typ] = name
+        if is_structure(typ):
+            items = ', '.join(
+                f'{field.wire_name!r}: {self._encode_value(field.python_type, "x." + field.python_name)}'
+                for field in struct_fields(typ, self.typer)
+            )
+            self.add_function([f'def {name}(x):', f'    return {{{items}}}'])
+        else:
+            self.add_function([f'def {name}(x):', f'    return {self._encode_value(typ, "x")}'])
+        return name
+
+    def _encode_value(self, typ: Any, src: str) -> str:
+        typ = getattr(typ, '__supertype__', typ)  # NewType
+        inner, is_optional = unwrap_optional(typ)
+        if is_optional:
+            expr = self._encode_value(inner, src)
+            if expr == src:
+                return expr
+            # complex source expressions are evaluated by a dedicated function only once
+            if not src.isidentifier():
+                return f'{self.encoder(typ)}({src})'
+            return f'None if {src} is None else {expr}'
+
+        if typ in _PRIMITIVES:
+            return src
+
+        if typ is ID:
+            return f'str({src})'
+
+        if isinstance(typ, type) and issubclass(typ, Enum):
+            return f'{src}.value'
+
+        if is_structure(typ):
+            return f'{self.encoder(typ)}({src})'
+
+        item = sequence_item(typ)
+        if item is not None:
+            if self._encode_value(item, 'item') == 'item':
+                return f'list({src})'
+            return f'[{self.encoder(item)}(item) for item in {src}]'
+
+        _, encode = self._fallback(typ)
+        return f'{encode}({src})'
+
+    # Views
+    # -----
+
+    def view(self, typ: Type[Any]) -> str:
+        """ Returns the name of a generated ``__slots__`` class that wraps a wire object of a structure,
+        and decodes its fields on first access. Values are not validated, ``_materialize()`` decodes
+        the entire object into an instance of ``typ`` with the regular decoder.
+        """
+        try:
+            return self._views[typ]
+        except KeyError:
+            pass
+        name = self.unique_name(f'{typ.__name__}View')
+        # register before emitting the body to support recursive types
+        self._views[typ] = name
+        fields = struct_fields(typ, self.typer)
+        cached = []
+        body = []
+        for field in fields:
+            expr = self._view_value(field.python_type, 'v')
+            if field.default is not NO_DEFAULT:
+                get = f'self._d.get({field.wire_name!r}, {self.ref(field.default)})'
+            elif unwrap_optional(field.python_type)[1]:
+                get = f'self._d.get({field.wire_name!r})'
+            else:
+                get = f'self._d[{field.wire_name!r}]'
+            body.append( '    @property')
+            body.append(f'    def {field.python_name}(self):')
+            if expr == 'v':
+                # primitive values are returned as they are
+                body.append(f'        return {get}')
+                body.append('')
+                continue
+            slot = f'_c_{field.python_name}'
+            cached.append(slot)
+            body.append( '        try:')
+            body.append(f'            return self.{slot}')
+            body.append( '        except AttributeError:')
+            body.append( '            pass')
+            body.append(f'        v = {get}')
+            body.append(f'        v = self.{slot} = {expr}')
+            body.append( '        return v')
+            body.append( '')
+
+        attrs = ', '.join(repr(x.python_name) for x in fields)
+        self.add_function([
+            f'class {name}:',
+            f'    __slots__ = {tuple(["_d"] + cached)!r}',
+            f'    __view_of__ = {self.ref(typ)}',
+            f'    _fields = ({attrs}{"," if len(fields) == 1 else ""})',
+             '',
+             '    def __init__(self, d):',
+             '        self._d = d',
+             '',
+             '    def _materialize(self):',
+            f'        return {self.decoder(typ)}(self._d)',
+             '',
+             '    def __eq__(self, other):',
+             # views of the same type may be generated more than once, e.g. for streaming
+             "        if getattr(other, '__view_of__', None) is self.__view_of__:",
+             '            return self._d == other._d',
+             '        return NotImplemented',
+             '',
+             '    __hash__ = None',
+             '',
+             '    def __repr__(self):',
+            f'        return {typ.__name__ + "View"!r} + "(" + ", ".join('
+            f'f"{{k}}={{getattr(self, k)!r}}" for k in self._fields) + ")"',
+             '',
+        ] + body)
+        return name
+
+    def _view_value(self, typ: Any, src: str) -> str:
+        typ = getattr(typ, '__supertype__', typ)  # NewType
+        inner, is_optional = unwrap_optional(typ)
+        if is_optional:
+            expr = self._view_value(inner, src)
+            return src if expr == src else f'None if {src} is None else {expr}'
+
+        if is_structure(typ):
+            return f'{self.view(typ)}({src})'
+
+        item = sequence_item(typ)
+        if item is not None:
+            item_type = unwrap_optional(getattr(item, '__supertype__', item))[0]
+            if is_structure(item_type):
+                return f'{self.ref(ViewSequence)}({self.view(item_type)}, {src})'
+            item_expr = self._view_value(item, 'item')
+            return src if item_expr == 'item' else f'[{item_expr} for item in {src}]'
+
+        _, expr = self._decode_value(typ, src, _type_label(typ))
+        return expr
@@ -0,0 +1,133 @@
+""" Static estimation of the cost of queries, in the spirit of the rate limits of public GraphQL APIs.
+
+The estimate is computed from the selection set of a query: every list contributes as many nodes
+as its page size, which is taken from the ``first``/``last`` argument bound to the list or to its connection,
+and which is multiplied by the page sizes of the enclosing lists.
+"""
+from functools import lru_cache
+from itertools import chain
+from typing import Any, Iterable, Mapping, NamedTuple, Optional, Tuple, Type
+
+from typeit.combinator.constructor import _TypeConstructor
+
+from .translator import TypeFragment
+from .typeinfo import sequence_item, struct_fields, unwrap_optional
+
+
+__all__ = (
+    'PAGE_SIZE_ARGUMENTS',
+    'CostEstimator',
+    'QueryCost',
+    'estimate_cost',
+)
+
+
+PAGE_SIZE_ARGUMENTS = frozenset({'first', 'last'})
+
+
+class QueryCost(NamedTuple):
+    # the deepest level of nested selection sets
+    depth: int
+    # selected fields, regardless of list sizes
+    fields: int
+    # the upper bound of objects that the server may return
+    nodes: int
+
+
+class _Walker:
+    def __init__(self,
+                 bindings: Mapping[str, Iterable[Any]],
+                 page_sizes: Mapping[str, Optional[int]],
+                 typer: _TypeConstructor,
+                 default_list_size: int) -> None:
+        self.bindings = bindings
+        self.page_sizes = page_sizes
+        self.typer = typer
+        self.default_list_size = default_list_size
+        self.fields = 0
+        self.nodes = 0
+
+    def page_size(self, wire_name: str) -> Optional[int]:
+        for binding in self.bindings.get(wire_name, ()):
+            if binding.input_attr_name in PAGE_SIZE_ARGUMENTS:
+                size = self.page_sizes.get(binding.attr_name)
+                return self.default_list_size if size is None else size
+        return None
+
+    def walk(self, fragment: TypeFragment, multiplier: int, page_size: Optional[int]) -> int:
+        """ Returns the depth of the selection set
+        """
+        types = {}
+        for field in struct_fields(fragment.python_type, self.typer):
+            # the tokenizer doesn't apply name overrides to nested types, their attributes may carry Python names
+            types[field.python_name] = types[field.wire_name] = field.python_type
+        depth = 1
+        for attr in fragment.attributes:
+            self.fields += 1
+            if attr.fragment is None:
+                continue
+            own_size = self.page_size(attr.wire_name)
+            # the page size of a connection applies to the lists it contains
+            pending = page_size if own_size is None else own_size
+            m = multiplier
+            if sequence_item(unwrap_optional(types[attr.wire_name])[0]) is not None:
+                m *= self.default_list_size if pending is None else pending
+                pending = None
+            self.nodes += m
+            depth = max(depth, 1 + self.walk(attr.fragment, m, pending))
+        return depth
+
+
+class CostEstimator:
+    """ Estimates the cost of a query for the given values of its literal variables.
+    Everything that doesn't depend on the literals is resolved once, and the estimates are memoized
+    per tuple of literal page sizes, so that queries that differ only in literals don't walk
+    the selection set again.
+    """
+    def __init__(self,
+                 fragment: TypeFragment,
+                 bindings: Mapping[str, Iterable[Any]],
+                 input_type: Type[Any],
+                 typer: _TypeConstructor,
+                 default_list_size: int = 100,
+                 maxsize: int = 64) -> None:
+        self.fragment = fragment
+        self.bindings = {k: tuple(v) for k, v in bindings.items()}
+        self.typer = typer
+        self.default_list_size = default_list_size
+        self.page_sizes = {}
+        if input_type is not None and getattr(input_type, '__annotations__', None):
+            for field in struct_fields(input_type, typer):
+                self.page_sizes[field.wire_name] = field.default if isinstance(field.default, int) else None
+        # variables that literal page sizes may be bound to
+        self.literal_names = frozenset(
+            x.attr_name for x in chain.from_iterable(self.bindings.values())
+            if x.input_attr_name in PAGE_SIZE_ARGUMENTS
+        )
+        self._estimate = lru_cache(maxsize=maxsize)(self._walk)
+
+    def __call__(self, literals: Mapping[str, Any]) -> QueryCost:
+        key = tuple(sorted(
+            (k, v) for k, v in literals.items() if k in self.literal_names and isinstance(v, int)
+        ))
+        return self._estimate(key)
+
+    def _walk(self, literal_page_sizes: Tuple[Tuple[str, int], ...]) -> QueryCost:
+        page_sizes = dict(self.page_sizes)
+        page_sizes.update(literal_page_sizes)
+        walker = _Walker(self.bindings, page_sizes, self.typer, self.default_list_size)
+        depth = walker.walk(self.fragment, 1, None)
+        return QueryCost(depth=depth, fields=walker.fields, nodes=walker.nodes)
+
+
+def estimate_cost(fragment: TypeFragment,
+                  bindings: Mapping[str, Iterable[Any]],
+                  input_type: Type[Any],
+                  typer: _TypeConstructor,
+                  default_list_size: int = 100) -> QueryCost:
+    """ Estimates the cost of a query. Bound page sizes are taken from the defaults of the input fields,
+    lists without a page size or with a page size that has no default are assumed to have ``default_list_size`` elements.
+    """
+    # literal page sizes, see graphql_dsl.dsl.DEFAULT
+    literals = {x.attr_name: x.default for x in chain.from_iterable(bindings.values())}
+    return CostEstimator(fragment, bindings, input_type, typer, default_list_size)(literals)
@@ -0,0 +1,152 @@
+""" Compiled decoders of query results and encoders of query inputs.
+"""
+from enum import Enum
+from typing import Type, Any, Callable, Mapping, Dict, Tuple, Optional
+from weakref import WeakKeyDictionary
+
+from typeit.combinator.constructor import _TypeConstructor
+
+from .compiler import Emitter
+from .typeinfo import construct, is_structure
+
+
+__all__ = (
+    'ResultDecoding',
+    'compile_decoder',
+    'compile_view',
+    'mk_value_decoder',
+    'mk_result_decoder',
+    'compile_encoder',
+    'mk_input_encoder',
+)
+
+
+class ResultDecoding(Enum):
+    """ Selects the decoder of results, and the encoder of query inputs, see ``mk_input_encoder``.
+    """
+    # colander-based type constructor of typeit
+    TYPEIT = 'typeit'
+    # generated decoder that validates values and falls back to typeit on errors
+    COMPILED = 'compiled'
+    # generated decoder without validation, suitable for trusted servers only
+    TRUSTED = 'trusted'
+    # generated __slots__ views over the response that decode fields on first access, without validation
+    LAZY = 'lazy'
+
+
+_encoders: 'WeakKeyDictionary[_TypeConstructor, Dict[Any, Callable[[Any], Any]]]' = WeakKeyDictionary()
+_views: 'WeakKeyDictionary[_TypeConstructor, Dict[Any, Callable[[Any], Any]]]' = WeakKeyDictionary()
+_decoders: 'WeakKeyDictionary[_TypeConstructor, Dict[Tuple[Any, bool], Callable[[Any], Any]]]' = WeakKeyDictionary()
+
+
+def compile_decoder(typ: Type[Any], typer: _TypeConstructor, validate: bool = True) -> Callable[[Any], Any]:
+    """ Generates a function that builds instances of ``typ`` directly from decoded JSON values.
+    Types that the generator doesn't know about are delegated to the typer.
+    """
+    try:
+        decoders = _decoders[typer]
+    except KeyError:
+        decoders = _decoders.setdefault(typer, {})
+    try:
+        return decoders[(typ, validate)]
+    except KeyError:
+        pass
+    emitter = Emitter(typer, validate=validate, fallback=lambda t: construct(typer, t))
+    name = emitter.decoder(typ)
+    return decoders.setdefault((typ, validate), emitter.execute()[name])
+
+
+def compile_view(typ: Type[Any], typer: _TypeConstructor) -> Callable[[Any], Any]:
+    """ Generates a view class of ``typ``, which wraps wire objects and decodes their fields on first access.
+    Types that aren't structures are decoded eagerly.
+    """
+    try:
+        views = _views[typer]
+    except KeyError:
+        views = _views.setdefault(typer, {})
+    try:
+        return views[typ]
+    except KeyError:
+        pass
+    emitter = Emitter(typer, validate=True, fallback=lambda t: construct(typer, t))
+    if is_structure(typ):
+        name = emitter.view(typ)
+    else:
+        name = emitter.decoder(typ)
+    return views.setdefault(typ, emitter.execute()[name])
+
+
+def mk_value_decoder(typ: Type[Any],
+                     typer: _TypeConstructor,
+                     decoding: ResultDecoding,
+                     mk_value: Optional[Callable[[Any], Any]] = None) -> Callable[[Any], Any]:
+    """ Returns a function that builds instances of ``typ`` from decoded JSON values.
+    """
+    if mk_value is None:
+        mk_value, _ = construct(typer, typ)
+    if decoding is ResultDecoding.TYPEIT:
+        return mk_value
+    if decoding is ResultDecoding.LAZY:
+        return compile_view(typ, typer)
+
+    decode = compile_decoder(typ, typer, validate=decoding is ResultDecoding.COMPILED)
+    if decoding is ResultDecoding.TRUSTED:
+        return decode
+
+    def decode_or_fallback(value: Any) -> Any:
+        try:
+            return decode(value)
+        except (LookupError, TypeError, ValueError, AttributeError):
+            # the typer either reports the problem in its usual way,
+            # or handles a case that the compiled decoder is stricter about
+            return mk_value(value)
+    return decode_or_fallback
+
+
+def mk_result_decoder(typ: Type[Any],
+                      typer: _TypeConstructor,
+                      decoding: ResultDecoding,
+                      mk_result: Callable[[Any], Any]) -> Callable[[Mapping[str, Any]], Any]:
+    """ Returns a function that extracts a typed result from a GraphQL response.
+    """
+    decode = mk_value_decoder(typ, typer, decoding, mk_result)
+    return lambda x: decode(x['data'])
+
+
+def compile_encoder(typ: Type[Any], typer: _TypeConstructor) -> Callable[[Any], Any]:
+    """ Generates a function that serializes instances of ``typ`` into JSON-compatible values,
+    with wire names of fields resolved at generation time.
+    """
+    try:
+        encoders = _encoders[typer]
+    except KeyError:
+        encoders = _encoders.setdefault(typer, {})
+    try:
+        return encoders[typ]
+    except KeyError:
+        pass
+    emitter = Emitter(typer, validate=False, fallback=lambda t: construct(typer, t))
+    name = emitter.encoder(typ)
+    return encoders.setdefault(typ, emitter.execute()[name])
+
+
+def mk_input_encoder(typ: Type[Any],
+                     typer: _TypeConstructor,
+                     decoding: ResultDecoding,
+                     dict_value: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """ Returns a function that serializes query inputs of ``typ``. All modes but ``TYPEIT`` use
+    a generated serializer, which falls back to typeit on errors unless the mode is ``TRUSTED``.
+    """
+    if decoding is ResultDecoding.TYPEIT:
+        return dict_value
+
+    encode = compile_encoder(typ, typer)
+    if decoding is ResultDecoding.TRUSTED:
+        return encode
+
+    def encode_or_fallback(value: Any) -> Any:
+        try:
+            return encode(value)
+        except (LookupError, TypeError, ValueError, AttributeError):
+            return dict_value(value)
+    return encode_or_fallback
@@ -1,8 +1,11 @@
+import gc
 from collections import defaultdict
+from itertools import chain
+from contextlib import nullcontext
 from enum import Enum
-from typing import NamedTuple, Type, Any, Union, Callable, Mapping, Tuple, get_type_hints, Iterable, Optional, TypeVar
+from typing import NamedTuple, Type, Any, Dict, Union, Callable, Mapping, Tuple, Iterable, Optional, Sequence, ContextManager, \
+    TYPE_CHECKING
 
-import inflection
 from pyrsistent import pmap, pvector
 from pyrsistent.typing import PMap, PVector
 from typeit.combinator.constructor import _TypeConstructor, TypeConstructor, flags
@@ -10,16 +13,31 @@ from typeit.combinator.constructor import _TypeConstructor, TypeConstructor, fla
 from infix import or_infix as infix
 from infix import mul_infix
 
-from typeit.parser import inner_type_boundaries
-from typeit.utils import get_global_name_overrider
+from .cache import QueryCache
+from .columns import ColumnBuilder, column_builder
+from .cost import CostEstimator, QueryCost
+from .errors import CostLimitExceeded
+from .decoder import ResultDecoding, mk_result_decoder, mk_value_decoder, mk_input_encoder
+from .names import WIRE_NAMES
+from .persisted import persisted_payload, query_hash
+from .query import GraphQLQuery, mk_payload_prefix, wire_value
+from .instrumentation import BINDINGS, CACHE_HIT, CACHE_MISS, TRANSLATION, TYPER, Instrument, \
+    instrument_query, timed
+from .index import AttrNotFound, FieldReference, IndexedField, field_index, resolve_path
+from .typeinfo import NO_DEFAULT, construct, is_structure, unwrap_optional, sequence_item
 from .translator import *
-from .types import NewIDType
+from .translator import type_fragment
+from .types import ID, NewIDType, GQL_SCALARS
+
+if TYPE_CHECKING:
+    from .validation import SchemaIndex
 
 
 __all__ = (
     'QUERY',
     'WITH',
     'PASS',
+    'DEFAULT',
     'TO',
     'AS',
     'MUTATE',
@@ -34,23 +52,7 @@ class _NamedTupleType(NamedTuple):
 PropertyField = type(_NamedTupleType.property_field)
 
 
-GQL_SCALARS: Mapping[Type[Any], str] = {
-    str: 'String',
-    int: 'Int',
-    float: 'Float',
-    bool: 'Boolean',
-}
-
-
-_DefaultTyper = TypeConstructor & NewIDType & flags.GlobalNameOverride(
-    lambda x: inflection.camelize(x, uppercase_first_letter=False)
-)
-
-
-# NamedTuples allow natural field referencing via its field getters,
-# whereas dataclasses lack this ability, but we provide
-# a conventional pair of (DataClassType, filed_name) for the same purpose.
-FieldReference = Union[property, Tuple[Type[Any], str]]
+_DefaultTyper = TypeConstructor & NewIDType & flags.GlobalNameOverride(WIRE_NAMES)
 
 
 class Binding(NamedTuple):
@@ -95,6 +97,39 @@ class Expr(NamedTuple):
     input: Type[Any] = Unit
     query: Type[Any] = Unit
     bindings: PVector[Binding] = pvector()
+    # bindings of literal values, which become variables of the query
+    defaults: PVector[Binding] = pvector()
+
+    def fingerprint(self) -> Tuple[Any, ...]:
+        """ Structural identity of the expression, suitable as a cache key.
+        Literal values are not a part of it, only their types are.
+        """
+        literals = tuple((x.expr_field, x.variable_alias, type(x.input_field)) for x in self.defaults)
+        return (self.type, self.input, self.query, tuple(self.bindings), literals)
+
+    def __and__(self, other: Union['Expr', 'BatchExpr']) -> 'BatchExpr':
+        if isinstance(other, BatchExpr):
+            return other._replace(exprs=pvector([self]).extend(other.exprs))
+        elif isinstance(other, Expr):
+            return BatchExpr(pvector([self, other]))
+        raise NotImplementedError('Expr???')
+
+
+class BatchExpr(NamedTuple):
+    """ Batch combinator, merges several expressions into a single GraphQL document
+    """
+    exprs: PVector[Expr] = pvector()
+    name: str = 'Batch'
+
+    def __and__(self, other: Union[Expr, 'BatchExpr']) -> 'BatchExpr':
+        if isinstance(other, BatchExpr):
+            return self._replace(exprs=self.exprs.extend(other.exprs))
+        elif isinstance(other, Expr):
+            return self._replace(exprs=self.exprs.append(other))
+        raise NotImplementedError('BatchExpr???')
+
+    def fingerprint(self) -> Tuple[Any, ...]:
+        return (self.name, tuple(x.fingerprint() for x in self.exprs))
 
 
 class ResolvedBinding(NamedTuple):
@@ -102,90 +137,346 @@ class ResolvedBinding(NamedTuple):
     attr_name: str
     type_name: str
     is_optional: bool
+    # the literal value of the variable, see DEFAULT
+    default: Any = NO_DEFAULT
 
 
-T = TypeVar('T')
-
-
-class GraphQLQuery(NamedTuple):
+class GraphQLBatch(NamedTuple):
+    """ Several queries merged into a single GraphQL document. The topmost fields of every query
+    are aliased, and the variables are renamed with a per-query prefix.
+    """
     query: str
     name: str
-    get_input_vars: Callable[[T], Mapping[str, Any]]
-    get_result: Callable[[Mapping[str, Any]], Any]
-
-    def request_payload(self, query_input: Optional[T] = None) -> Mapping[str, Any]:
-        in_ = self.get_input_vars(query_input) if query_input else {}
+    queries: Tuple[GraphQLQuery, ...]
+    prefixes: Tuple[str, ...]
+    # pairs of (wire name, alias) of the topmost fields of every query
+    fields: Tuple[Tuple[Tuple[str, str], ...], ...]
+    sha256: Optional[str] = None
+
+    def request_payload(self, *query_inputs: Any, variables: Optional[Mapping[str, Any]] = None) -> Mapping[str, Any]:
+        """ Accepts inputs of the batched queries in the order of the queries,
+        ``None`` stands for a query without input. ``variables`` override literals of the batched queries
+        by their prefixed names, e.g. ``q0_first``.
+        """
+        if len(query_inputs) > len(self.queries):
+            raise ValueError(f'Batch {self.name} has {len(self.queries)} queries, got {len(query_inputs)} inputs')
+        in_ = {}
+        for n, (query, prefix) in enumerate(zip(self.queries, self.prefixes)):
+            query_input = query_inputs[n] if n < len(query_inputs) else None
+            if query_input:
+                in_.update((f'{prefix}{k}', v) for k, v in query.get_input_vars(query_input).items())
+            if query.defaults:
+                in_.update((f'{prefix}{k}', v) for k, v in query.defaults.items())
+        if variables:
+            unknown = set(variables).difference(
+                f'{prefix}{k}' for query, prefix in zip(self.queries, self.prefixes) for k in query.defaults or ()
+            )
+            if unknown:
+                raise ValueError(f'Batch {self.name} has no literal variables {", ".join(sorted(unknown))}')
+            in_.update((k, wire_value(v)) for k, v in variables.items())
         return { "operationName": self.name
                , "variables":     in_
                , "query":         self.query
                }
 
+    def persisted_payload(self,
+                          *query_inputs: Any,
+                          include_query: bool = False,
+                          variables: Optional[Mapping[str, Any]] = None) -> Mapping[str, Any]:
+        return persisted_payload(self.request_payload(*query_inputs, variables=variables),
+                                 self.sha256 or query_hash(self.query),
+                                 include_query)
+
+    def get_result(self, response: Mapping[str, Any]) -> Tuple[Any, ...]:
+        """ Splits the response into results of the batched queries.
+        """
+        data = response['data']
+        return tuple(
+            query.get_result({'data': {name: data[alias] for name, alias in fields if alias in data}})
+            for query, fields in zip(self.queries, self.fields)
+        )
+
 
 class GraphQLQueryConstructor(NamedTuple):
     query_types: PMap[Type[Any], Any] = pmap()
     typer: _TypeConstructor = _DefaultTyper
+    cache: Optional[QueryCache[Any]] = None
+    decoding: ResultDecoding = ResultDecoding.TYPEIT
+    # extract repeated selection sets into named fragments
+    fragments: bool = False
+    # validate queries against a schema, see graphql_dsl.validation.schema_index
+    schema: Optional['SchemaIndex'] = None
+    # receives timings of construction phases and of (de)serialization of the compiled queries
+    instrument: Optional[Instrument] = None
+    # the highest estimated number of nodes that a query may return, see graphql_dsl.cost
+    cost_limit: Optional[int] = None
+    # the assumed size of lists without a bound page size
+    default_list_size: int = 100
+
+    def __call__(self, expr: Union['Expr', 'BatchExpr']) -> Any:
+        compile = self.compile_batch if isinstance(expr, BatchExpr) else self.compile
+        if self.cache is None:
+            return compile(expr)
+        # constructor settings are a part of the key, so that derived constructors
+        # that share the same cache instance never receive each other's queries
+        key = (self._replace(cache=None), expr.fingerprint())
+        if self.instrument is None:
+            return self.bind_literals(self.cache.get_or_compile(key, lambda: compile(expr)), expr)
+
+        missed = False
+
+        def compile_miss() -> Any:
+            nonlocal missed
+            missed = True
+            return compile(expr)
+
+        rv = self.cache.get_or_compile(key, compile_miss)
+        self.instrument.count(CACHE_MISS if missed else CACHE_HIT)
+        return self.bind_literals(rv, expr)
+
+    def bind_literals(self, compiled: Any, expr: Union['Expr', 'BatchExpr']) -> Any:
+        """ Expressions that differ only in literal values share a compiled query, which is given
+        the literals of ``expr`` here.
+        """
+        if isinstance(expr, BatchExpr):
+            if not any(x.defaults for x in expr.exprs):
+                return compiled
+            queries = tuple(self.bind_literals(q, x) for q, x in zip(compiled.queries, expr.exprs))
+            return compiled._replace(queries=queries)
+        if not expr.defaults:
+            return compiled
+        defaults = _literal_values(expr)
+        if defaults == compiled.defaults:
+            return compiled
+        cost = compiled.cost
+        if compiled.cost_estimator is not None:
+            # literal page sizes affect the cost
+            cost = compiled.cost_estimator(defaults)
+            self.check_cost(expr, cost)
+        return compiled._replace(expr=expr, defaults=defaults, cost=cost)
+
+    def check_cost(self, expr: 'Expr', cost: QueryCost) -> None:
+        if self.cost_limit is not None and cost.nodes > self.cost_limit:
+            raise CostLimitExceeded(expr.query.__name__, cost, self.cost_limit)
+
+    def batch(self, *exprs: Expr, name: str = 'Batch') -> GraphQLBatch:
+        """ Merges several expressions into a single GraphQL document.
+        """
+        return self(BatchExpr(pvector(exprs), name))
+
+    def warm(self, exprs: Iterable[Union['Expr', 'BatchExpr']], freeze: bool = False) -> Tuple[Any, ...]:
+        """ Compiles queries into the cache before the process forks into workers, so that the workers
+        share the compiled queries instead of compiling them in every process.
+        With ``freeze``, every object of the process that exists at that moment, not only the compiled queries,
+        is moved out of the reach of the garbage collector for good, which would otherwise copy the memory pages
+        they occupy by touching their reference counts. It's meant to be used right before forking.
+        """
+        exprs = tuple(exprs)
+        if self.cache is None:
+            raise ValueError('Queries can only be warmed up in a constructor with a cache')
+        if len(exprs) > self.cache.maxsize:
+            raise ValueError(f'{len(exprs)} queries do not fit into a cache of size {self.cache.maxsize}')
+        rv = tuple(self(x) for x in exprs)
+        if freeze:
+            gc.collect()
+            gc.freeze()
+        return rv
 
-    def __call__(self, expr: 'Expr') -> GraphQLQuery:
-        mk_input_vars, dict_input_vars = self.typer ^ expr.input
-        mk_result, dict_result = self.typer ^ expr.query
-        bindings = self.prepare_bindings(expr)
+    def compile_batch(self, batch: BatchExpr) -> GraphQLBatch:
+        if not batch.exprs:
+            raise ValueError('A batch should contain at least one query')
+        query_decl = batch.exprs[0].type
+        if any(x.type is not query_decl for x in batch.exprs):
+            raise ValueError(f'Queries and mutations cannot be mixed in batch {batch.name}')
+
+        queries = []
+        prefixes = []
+        fields = []
+        variables = []
+        selections = []
+        for n, expr in enumerate(batch.exprs):
+            prefix = f'q{n}_'
+            bindings = {
+                wire_name: [x._replace(attr_name=f'{prefix}{x.attr_name}') for x in resolved]
+                for wire_name, resolved in self.prepare_bindings(expr).items()
+            }
+            selection = translate_selection(expr.query, bindings, self.typer, alias_prefix=prefix)
+            queries.append(self(expr))
+            prefixes.append(prefix)
+            fields.append(tuple(
+                (x.wire_name, f'{prefix}{x.wire_name}') for x in type_fragment(expr.query, self.typer).attributes
+            ))
+            variables.append(translate_variables(bindings)[1:-1])
+            selections.append(selection[1:-1])
+
+        vars = ','.join(x for x in variables if x)
+        query = f'{query_decl.value} {batch.name}{f"({vars})" if vars else ""}{{{" ".join(selections)}}}'
+        return GraphQLBatch(
+            query=query,
+            name=batch.name,
+            queries=tuple(queries),
+            prefixes=tuple(prefixes),
+            fields=tuple(fields),
+            sha256=query_hash(query),
+        )
+
+    def compile(self, expr: 'Expr') -> GraphQLQuery:
+        if self.instrument is not None:
+            return instrument_query(self._compile(expr, self.instrument), self.instrument)
+        return self._compile(expr, None)
+
+    def _compile(self, expr: 'Expr', instrument: Optional[Instrument]) -> GraphQLQuery:
+        with _timed(instrument, TYPER):
+            mk_input_vars, dict_input_vars = construct(self.typer, expr.input)
+            mk_result, dict_result = construct(self.typer, expr.query)
+            get_input_vars = mk_input_encoder(expr.input, self.typer, self.decoding, dict_input_vars)
+            get_result = mk_result_decoder(expr.query, self.typer, self.decoding, mk_result)
+        with _timed(instrument, BINDINGS):
+            bindings = self.prepare_bindings(expr)
         query_decl = expr.type.value
-        query_body = translate(expr.query, bindings, self.typer)
+        fragment = type_fragment(expr.query, self.typer)
+        if self.schema is not None:
+            self.schema.validate(query_decl, fragment, bindings)
+        defaults = _literal_values(expr) if expr.defaults else None
+        estimator = CostEstimator(fragment, bindings, expr.input, self.typer, self.default_list_size)
+        cost = estimator(defaults or {})
+        self.check_cost(expr, cost)
+        with _timed(instrument, TRANSLATION):
+            if self.fragments:
+                query_body = translate_with_fragments(expr.query, bindings, self.typer)
+            else:
+                query_body = translate(expr.query, bindings, self.typer)
+        query = f'{query_decl} {query_body}'
         return GraphQLQuery(
             name=expr.query.__name__,
-            query=f'{query_decl} {query_body}',
-            get_input_vars=dict_input_vars,
-            get_result=lambda x: mk_result(x['data']),
+            query=query,
+            get_input_vars=get_input_vars,
+            get_result=get_result,
+            expr=expr,
+            constructor=self,
+            sha256=query_hash(query),
+            payload_prefix=mk_payload_prefix(expr.query.__name__, query),
+            cost=cost,
+            defaults=defaults,
+            cost_estimator=estimator if estimator.literal_names.intersection(defaults or ()) else None,
         )
 
+    def sequence_decoder(self,
+                         root: Type[Any],
+                         path: Sequence[FieldReference]) -> Tuple[Tuple[str, ...], Callable[[Any], Any]]:
+        """ Returns the location of a sequence in a response, and a decoder of its elements.
+        """
+        field_path = resolve_path(root, path, self.typer)
+        inner, _ = unwrap_optional(field_path.python_type)
+        item = sequence_item(inner)
+        if item is None:
+            raise TypeError(f'{".".join(field_path.python_names)} of {root} is not a sequence')
+        return ('data',) + field_path.wire_names, mk_value_decoder(item, self.typer, self.decoding)
+
+    def column_builder(self, root: Type[Any], path: Sequence[FieldReference]) -> Tuple[Tuple[str, ...], ColumnBuilder]:
+        """ Returns the location of a sequence of structures in a response, and a builder of its columns.
+        """
+        field_path = resolve_path(root, path, self.typer)
+        inner, _ = unwrap_optional(field_path.python_type)
+        item = sequence_item(inner)
+        if item is None or not is_structure(unwrap_optional(item)[0]):
+            raise TypeError(f'{".".join(field_path.python_names)} of {root} is not a sequence of structures')
+        return ('data',) + field_path.wire_names, column_builder(unwrap_optional(item)[0], self.typer)
+
     def prepare_bindings(self, expr: Expr) -> Mapping[str, Iterable[ResolvedBinding]]:
         rv = defaultdict(list)
         for binding in expr.bindings:
             resolved_input = self.resolve_binding(expr.input, binding.input_field, binding.variable_alias)
-            try:
-                resolved_expr  = self.resolve_binding(expr.query, binding.expr_field, binding.variable_alias)
-            except AttrNotFound:
-                for typ in self.typer.memo.keys():
-                    try:
-                        resolved_expr  = self.resolve_binding(typ, binding.expr_field, binding.variable_alias)
-                    except (AttributeError, TypeError, AttrNotFound):
-                        continue
-                    else:
-                        break
+            resolved_expr  = self.resolve_nested_binding(expr.query, binding.expr_field, binding.variable_alias)
             rv[resolved_expr.attr_name].append(resolved_input)
+        if expr.defaults:
+            for binding in expr.defaults:
+                resolved_expr = self.resolve_nested_binding(expr.query, binding.expr_field, binding.variable_alias)
+                rv[resolved_expr.attr_name].append(self.resolve_default(binding))
+            _check_variables(rv)
         return rv
 
+    @staticmethod
+    def resolve_default(binding: Binding) -> ResolvedBinding:
+        """ Turns a literal into a variable that is named after the argument, e.g. ``$first:Int!``.
+        """
+        value = binding.input_field
+        if binding.variable_alias is None:
+            raise ValueError(f'Default {value!r} has no argument name, e.g. {value!r} * TO * ... * AS * "first"')
+        if isinstance(value, ID):
+            type_name = 'ID'
+        elif isinstance(value, Enum):
+            type_name = type(value).__name__
+        else:
+            try:
+                type_name = GQL_SCALARS[type(value)]
+            except KeyError:
+                raise TypeError(f'Default {value!r} of "{binding.variable_alias}" is not a scalar or an enum value')
+        return ResolvedBinding(input_attr_name=binding.variable_alias,
+                               attr_name=binding.variable_alias,
+                               type_name=type_name,
+                               is_optional=False,
+                               default=value)
+
+    def resolve_nested_binding(self, root: Type[Any], field: FieldReference, alias: Optional[str]) -> ResolvedBinding:
+        """ Same as ``resolve_binding``, but the field may belong to any type reachable from ``root``.
+        """
+        indexed = field_index(self.typer).find(root, field)
+        if indexed is None:
+            raise AttrNotFound(f"Couldn't find a field of alias \"{alias}\" in {root} and its nested types")
+        return self.mk_resolved_binding(indexed, alias)
+
     def resolve_binding(self, typ: Type[Any], field: FieldReference, alias: Optional[str]) -> ResolvedBinding:
+        index = field_index(self.typer)
         if isinstance(field, PropertyField):
             # NamedTuple
-            for field_name, field_type in get_type_hints(typ).items():
-                if getattr(typ, field_name) is field:
-                    name = field_name
-                    variable_python_type = field_type
-                    break
-            else:
+            indexed = index.lookup(typ, field)
+            if indexed is None:
                 raise AttrNotFound(f"Couldn't find a field of alias \"{alias}\" in {typ}")
 
         elif isinstance(field, tuple):
             # dataclass
             if typ is not field[0]:
                 raise TypeError(f'Field {field[0]} should be an attribute of {typ}')
-            name = field[1]
-            variable_python_type = get_type_hints(field[0])[name]
+            indexed = index.lookup(typ, field)
+            if indexed is None:
+                raise AttrNotFound(f"Couldn't find a field \"{field[1]}\" in {typ}")
         else:
             raise NotImplementedError(f'Unknown field type for {field}: {type(field)}')
-        overrider = get_global_name_overrider(self.typer.overrides)
-        attr_name = overrider(name)
-        is_optional = type(None) in inner_type_boundaries(variable_python_type)
-        try:
-            type_name = GQL_SCALARS.get(variable_python_type, variable_python_type.__name__)
-        except AttributeError:
-            type_name = ''
-        return ResolvedBinding(attr_name=overrider(name),
-                               input_attr_name=alias if alias else attr_name,
-                               type_name=type_name,
-                               is_optional=is_optional)
+        return self.mk_resolved_binding(indexed, alias)
+
+    @staticmethod
+    def mk_resolved_binding(field: IndexedField, alias: Optional[str]) -> ResolvedBinding:
+        return ResolvedBinding(attr_name=field.wire_name,
+                               input_attr_name=alias if alias else field.wire_name,
+                               type_name=field.type_name,
+                               is_optional=field.is_optional)
+
+
+def _check_variables(bindings: Mapping[str, Iterable[ResolvedBinding]]) -> None:
+    """ Variables with the same name are declared once, therefore they should be of the same type,
+    and they can't be bound to both an input field and a literal.
+    """
+    declared = {}
+    for binding in chain.from_iterable(bindings.values()):
+        key = binding._replace(input_attr_name='', default=binding.default is NO_DEFAULT)
+        if declared.setdefault(binding.attr_name, key) != key:
+            raise ValueError(f'Variable ${binding.attr_name} is declared differently by several bindings')
+
 
+def _literal_values(expr: Expr) -> Mapping[str, Any]:
+    """ Wire values of the literals of an expression, by the names of their variables.
+    """
+    rv: Dict[str, Any] = {}
+    for binding in expr.defaults:
+        value = wire_value(binding.input_field)
+        if rv.setdefault(binding.variable_alias, value) != value:
+            raise ValueError(f'Variable ${binding.variable_alias} is bound to different literals')
+    return rv
+
+
+def _timed(instrument: Optional[Instrument], event: str) -> ContextManager[None]:
+    return nullcontext() if instrument is None else timed(instrument, event)
 
 
 class Query(NamedTuple):
@@ -217,6 +508,19 @@ def PASS(a: Expr, b: Union[BindComb, Binding]) -> Expr:
         return a._replace(bindings=a.bindings.append(b))
     return a._replace(bindings=a.bindings.extend(b.bindings))
 
+@infix
+def DEFAULT(a: Expr, b: Union[BindComb, Binding]) -> Expr:
+    """ Passes literal values, e.g. ``expr | DEFAULT | 100 * TO * Query.field * AS * 'first'``.
+
+    Literals are not inlined into the query, they become variables whose values are sent with every request,
+    so that expressions that differ only in literals share the query text and the compiled query.
+    The values may also be overridden per request, see ``GraphQLQuery.request_payload``.
+    """
+    if isinstance(b, Binding):
+        return a._replace(defaults=a.defaults.append(b))
+    return a._replace(defaults=a.defaults.extend(b.bindings))
+
+
 @mul_infix
 def TO(a: property, b: property) -> Binding:
     """ Input.field * TO * Query.field
@@ -232,8 +536,4 @@ def AS(a: Binding, b: str) -> Binding:
     return a._replace(variable_alias=b)
 
 
-GQL = GraphQLQueryConstructor()
-
-
-class AttrNotFound(TypeError):
-    pass
\ No newline at end of file
+GQL = GraphQLQueryConstructor(cache=QueryCache())
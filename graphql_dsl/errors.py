@@ -0,0 +1,29 @@
+from typing import Any, Tuple
+
+
+__all__ = (
+    'CostLimitExceeded',
+    'DecodingError',
+    'ValidationError',
+)
+
+
+class DecodingError(ValueError):
+    pass
+
+
+class ValidationError(ValueError):
+    """ A query doesn't conform to the schema.
+    """
+    def __init__(self, query_name: str, errors: Tuple[str, ...]) -> None:
+        super().__init__('\n'.join((f'Query {query_name} is invalid:',) + errors))
+        self.errors = errors
+
+
+class CostLimitExceeded(ValueError):
+    """ The estimated cost of a query exceeds the limit of the constructor.
+    """
+    def __init__(self, query_name: str, cost: Any, limit: int) -> None:
+        super().__init__(f'Query {query_name} may return up to {cost.nodes} nodes, the limit is {limit}')
+        self.cost = cost
+        self.limit = limit
@@ -0,0 +1,384 @@
+""" HTTP execution of queries over pooled keep-alive connections.
+
+Both executors accept anything that has ``request_payload()`` and ``get_result()``, i.e. queries and batches,
+and depend on the standard library only.
+"""
+import asyncio
+import http.client
+import io
+import json
+import ssl
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, List, Mapping, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from .persisted import asend_persisted, send_persisted, query_hash
+
+
+__all__ = (
+    'ExecutionError',
+    'Executor',
+    'AsyncExecutor',
+)
+
+
+class ExecutionError(RuntimeError):
+    """ The server has either failed to respond with a GraphQL response, or returned no data.
+    """
+    def __init__(self, message: str, status: Optional[int] = None, errors: Any = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.errors = errors
+
+
+# a query or a batch along with its inputs
+Call = Tuple[Any, ...]
+
+_STALE_CONNECTION = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+# the limit of http.client on the length of a line, which applies to the whole head of a response here
+_MAX_LINE = 65536
+
+
+class _Endpoint:
+    __slots__ = ('scheme', 'host', 'port', 'target', 'headers', 'ssl_context', 'authority')
+
+    def __init__(self, url: str, headers: Optional[Mapping[str, str]], ssl_context: Optional[ssl.SSLContext]) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f'Unsupported URL scheme: {url}')
+        self.scheme = parts.scheme
+        self.host = parts.hostname or 'localhost'
+        default_port = 443 if parts.scheme == 'https' else 80
+        self.port = parts.port or default_port
+        # the value of the Host header
+        host = f'[{self.host}]' if ':' in self.host else self.host
+        self.authority = host if self.port == default_port else f'{host}:{self.port}'
+        self.target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        self.headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            **(headers or {}),
+        }
+        self.ssl_context = ssl_context
+        if parts.scheme == 'https' and ssl_context is None:
+            self.ssl_context = ssl.create_default_context()
+
+
+def _decode(status: int, body: bytes) -> Mapping[str, Any]:
+    try:
+        response = json.loads(body)
+    except ValueError as e:
+        raise ExecutionError(f'The server responded with {status} and a malformed body: {body[:200]!r}',
+                             status=status) from e
+    if not isinstance(response, dict) or ('data' not in response and 'errors' not in response):
+        raise ExecutionError(f'The server responded with {status} and not a GraphQL response', status=status)
+    return response
+
+
+def _result(query: Any, status: int, response: Mapping[str, Any]) -> Any:
+    if response.get('data') is None:
+        raise ExecutionError(f'{query.name} failed with {status}: {response.get("errors")}',
+                             status=status,
+                             errors=response.get('errors'))
+    return query.get_result(response)
+
+
+class Executor:
+    """ Synchronous executor. Up to ``concurrency`` keep-alive connections are pooled and reused
+    by subsequent requests, ``execute_all`` runs queries on that many threads at most.
+    """
+    def __init__(self,
+                 url: str,
+                 headers: Optional[Mapping[str, str]] = None,
+                 concurrency: int = 8,
+                 timeout: Optional[float] = 30.0,
+                 persisted: bool = False,
+                 ssl_context: Optional[ssl.SSLContext] = None) -> None:
+        if concurrency < 1:
+            raise ValueError('Concurrency should be a positive number')
+        self.endpoint = _Endpoint(url, headers, ssl_context)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.persisted = persisted
+        self._idle: List[http.client.HTTPConnection] = []
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        # threads of execute_all, created on first use
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def execute(self, query: Any, *query_inputs: Any) -> Any:
+        """ Sends a query with its inputs and returns a typed result.
+        """
+        response, status = self._send_query(query, query_inputs)
+        return _result(query, status, response)
+
+    def execute_all(self, calls: Iterable[Call]) -> List[Any]:
+        """ Executes ``(query, *inputs)`` calls concurrently and returns their results in the same order.
+        """
+        calls = list(calls)
+        if len(calls) < 2:
+            return [self.execute(*call) for call in calls]
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='graphql-dsl')
+            pool = self._pool
+        return list(pool.map(lambda call: self.execute(*call), calls))
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+        for conn in idle:
+            conn.close()
+
+    def __enter__(self) -> 'Executor':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _send_query(self, query: Any, query_inputs: Sequence[Any]) -> Tuple[Mapping[str, Any], int]:
+        if not self.persisted and hasattr(query, 'request_payload_bytes'):
+            status, body = self.post(query.request_payload_bytes(*query_inputs))
+            return _decode(status, body), status
+
+        payload = query.request_payload(*query_inputs)
+        status = 0
+
+        def send(payload: Mapping[str, Any]) -> Mapping[str, Any]:
+            nonlocal status
+            status, body = self.post(json.dumps(payload).encode('utf-8'))
+            return _decode(status, body)
+
+        if self.persisted:
+            response = send_persisted(send, payload, getattr(query, 'sha256', None) or query_hash(query.query))
+        else:
+            response = send(payload)
+        return response, status
+
+    def post(self, body: bytes) -> Tuple[int, bytes]:
+        """ Posts a raw body to the endpoint and returns the status and the raw response body.
+        """
+        with self._slots:
+            conn, reused = self._acquire()
+            try:
+                try:
+                    status, data, keep_alive = self._roundtrip(conn, body)
+                except _STALE_CONNECTION:
+                    if not reused:
+                        raise
+                    # the server has closed an idle keep-alive connection, it's safe to retry once
+                    conn.close()
+                    conn = self._connect()
+                    status, data, keep_alive = self._roundtrip(conn, body)
+            except BaseException:
+                conn.close()
+                raise
+            if keep_alive:
+                with self._lock:
+                    self._idle.append(conn)
+            else:
+                conn.close()
+            return status, data
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connect(), False
+
+    def _connect(self) -> http.client.HTTPConnection:
+        endpoint = self.endpoint
+        if endpoint.scheme == 'https':
+            return http.client.HTTPSConnection(endpoint.host, endpoint.port,
+                                               timeout=self.timeout, context=endpoint.ssl_context)
+        return http.client.HTTPConnection(endpoint.host, endpoint.port, timeout=self.timeout)
+
+    def _roundtrip(self, conn: http.client.HTTPConnection, body: bytes) -> Tuple[int, bytes, bool]:
+        conn.request('POST', self.endpoint.target, body=body, headers=self.endpoint.headers)
+        response = conn.getresponse()
+        data = response.read()
+        return response.status, data, not response.will_close
+
+
+class _AsyncConnection:
+    __slots__ = ('reader', 'writer')
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class AsyncExecutor:
+    """ Asynchronous executor on top of asyncio streams. At most ``concurrency`` requests are in flight,
+    each over its own keep-alive connection that is returned to the pool afterwards.
+    """
+    def __init__(self,
+                 url: str,
+                 headers: Optional[Mapping[str, str]] = None,
+                 concurrency: int = 8,
+                 timeout: Optional[float] = 30.0,
+                 persisted: bool = False,
+                 ssl_context: Optional[ssl.SSLContext] = None) -> None:
+        if concurrency < 1:
+            raise ValueError('Concurrency should be a positive number')
+        self.endpoint = _Endpoint(url, headers, ssl_context)
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.persisted = persisted
+        self._idle: List[_AsyncConnection] = []
+        # created lazily, to bind to the running event loop
+        self._slots: Optional[asyncio.Semaphore] = None
+        head = [f'POST {self.endpoint.target} HTTP/1.1', f'Host: {self.endpoint.authority}']
+        head.extend(f'{k}: {v}' for k, v in self.endpoint.headers.items())
+        self._head = '\r\n'.join(head).encode('latin-1')
+
+    async def execute(self, query: Any, *query_inputs: Any) -> Any:
+        """ Sends a query with its inputs and returns a typed result.
+        """
+        if not self.persisted and hasattr(query, 'request_payload_bytes'):
+            status, body = await self.post(query.request_payload_bytes(*query_inputs))
+            return _result(query, status, _decode(status, body))
+
+        payload = query.request_payload(*query_inputs)
+        status = 0
+
+        async def send(payload: Mapping[str, Any]) -> Mapping[str, Any]:
+            nonlocal status
+            status, body = await self.post(json.dumps(payload).encode('utf-8'))
+            return _decode(status, body)
+
+        if self.persisted:
+            response = await asend_persisted(send, payload, getattr(query, 'sha256', None) or query_hash(query.query))
+        else:
+            response = await send(payload)
+        return _result(query, status, response)
+
+    async def execute_all(self, calls: Iterable[Call]) -> List[Any]:
+        """ Executes ``(query, *inputs)`` calls concurrently and returns their results in the same order.
+        """
+        return list(await asyncio.gather(*(self.execute(*call) for call in calls)))
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+        for conn in idle:
+            try:
+                await conn.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def __aenter__(self) -> 'AsyncExecutor':
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def post(self, body: bytes) -> Tuple[int, bytes]:
+        """ Posts a raw body to the endpoint and returns the status and the raw response body.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        async with self._slots:
+            return await asyncio.wait_for(self._post(body), self.timeout)
+
+    async def _post(self, body: bytes) -> Tuple[int, bytes]:
+        reused = bool(self._idle)
+        conn = self._idle.pop() if reused else await self._connect()
+        try:
+            try:
+                status, data, keep_alive = await self._roundtrip(conn, body)
+            except _STALE_CONNECTION + (asyncio.IncompleteReadError,):
+                if not reused:
+                    raise
+                # the server has closed an idle keep-alive connection, it's safe to retry once
+                conn.close()
+                conn = await self._connect()
+                status, data, keep_alive = await self._roundtrip(conn, body)
+        except BaseException:
+            conn.close()
+            raise
+        if keep_alive:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        return status, data
+
+    async def _connect(self) -> _AsyncConnection:
+        endpoint = self.endpoint
+        reader, writer = await asyncio.open_connection(endpoint.host, endpoint.port,
+                                                       ssl=endpoint.ssl_context, limit=_MAX_LINE)
+        return _AsyncConnection(reader, writer)
+
+    async def _roundtrip(self, conn: _AsyncConnection, body: bytes) -> Tuple[int, bytes, bool]:
+        conn.writer.write(b'%s\r\nContent-Length: %d\r\n\r\n%s' % (self._head, len(body), body))
+        await conn.writer.drain()
+
+        reader = conn.reader
+        while True:
+            version, status, headers = await _read_head(reader)
+            # informational responses, e.g. 100 Continue and 103 Early Hints, precede the final one
+            if not 100 <= status < 200:
+                break
+            if status == 101:
+                raise ExecutionError('The server has switched protocols', status=status)
+
+        keep_alive = headers.get('connection', '').lower() != 'close' and version != 'HTTP/1.0'
+        try:
+            if headers.get('transfer-encoding', '').lower() == 'chunked':
+                data = await _read_chunked(reader)
+            elif 'content-length' in headers:
+                data = await reader.readexactly(int(headers['content-length']))
+            else:
+                data = await reader.read()
+                keep_alive = False
+        except (ValueError, asyncio.LimitOverrunError) as e:
+            raise ExecutionError(f'Malformed HTTP response body: {e}', status=status) from e
+        return status, data, keep_alive
+
+
+async def _read_head(reader: asyncio.StreamReader) -> Tuple[str, int, Mapping[str, str]]:
+    """ Reads the status line and the headers of a response, at most ``_MAX_LINE`` bytes in total.
+    Headers are parsed by ``http.client``, which also limits their number.
+    """
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            raise ConnectionResetError('The server has closed the connection')
+        raise
+    except asyncio.LimitOverrunError as e:
+        raise ExecutionError(f'The head of an HTTP response exceeds {_MAX_LINE} bytes') from e
+    status_line, _, header_lines = head.partition(b'\r\n')
+    try:
+        version, status_code, *_ = status_line.decode('latin-1').split(None, 2)
+        status = int(status_code)
+    except ValueError:
+        raise ExecutionError(f'Malformed HTTP status line: {status_line[:200]!r}')
+    try:
+        message = http.client.parse_headers(io.BytesIO(header_lines))
+    except http.client.HTTPException as e:
+        raise ExecutionError(f'Malformed HTTP headers: {e}', status=status) from e
+    return version, status, {k.lower(): v for k, v in message.items()}
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    chunks = []
+    while True:
+        # lines are limited by the stream, see _MAX_LINE
+        size = int((await reader.readline()).split(b';', 1)[0], 16)
+        if size == 0:
+            # trailers
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            return b''.join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
@@ -0,0 +1,209 @@
+""" Precomputed index of field references that bindings are resolved against.
+"""
+import threading
+from dataclasses import is_dataclass
+from collections import deque
+from typing import NamedTuple, Type, Any, Optional, Set, Tuple, Union, Callable, Sequence, List, \
+    get_type_hints
+from weakref import WeakKeyDictionary, WeakSet
+
+from pyrsistent import pmap, pset
+from pyrsistent.typing import PMap, PSet
+from typeit.combinator.constructor import _TypeConstructor
+from typeit.parser import inner_type_boundaries
+from typeit.utils import get_global_name_overrider
+
+from .sync import after_fork_in_child
+from .typeinfo import FieldInfo, is_structure, unwrap_optional, sequence_item, struct_fields
+from .types import GQL_SCALARS
+
+
+__all__ = (
+    'AttrNotFound',
+    'FieldReference',
+    'IndexedField',
+    'FieldIndex',
+    'field_index',
+    'FieldPath',
+    'resolve_path',
+)
+
+
+# NamedTuples allow natural field referencing via its field getters,
+# whereas dataclasses lack this ability, but we provide
+# a conventional pair of (DataClassType, filed_name) for the same purpose.
+FieldReference = Union[property, Tuple[Type[Any], str]]
+
+
+class IndexedField(NamedTuple):
+    owner: Type[Any]
+    python_name: str
+    wire_name: str
+    python_type: Any
+    type_name: str
+    is_optional: bool
+
+
+class FieldIndex:
+    """ Maps field references to the fields they denote. Every type is introspected only once,
+    subsequent lookups don't depend on the number of types that the index has seen.
+
+    Lookups read immutable snapshots without locking, registrations replace the snapshots
+    under a lock, so that concurrent registrations don't discard each other.
+    """
+    def __init__(self, name_overrider: Callable[[str], str]) -> None:
+        self.name_overrider = name_overrider
+        self._lock = threading.Lock()
+        self._fields: PMap[Any, IndexedField] = pmap()
+        self._types: PSet[Type[Any]] = pset()
+        self._trees: PMap[Type[Any], Set[Type[Any]]] = pmap()
+        _all_indices.add(self)
+
+    def register(self, typ: Type[Any]) -> None:
+        """ Indexes the fields of a single type.
+        """
+        if typ in self._types:
+            return
+        fields = {}
+        for python_name, python_type in get_type_hints(typ).items():
+            if is_dataclass(typ):
+                ref = (typ, python_name)
+            else:
+                ref = getattr(typ, python_name, None)
+                if ref is None:
+                    continue
+            fields[ref] = self._mk_field(typ, python_name, python_type)
+        with self._lock:
+            if typ not in self._types:
+                self._fields = self._fields.update(fields)
+                self._types = self._types.add(typ)
+
+    def register_tree(self, typ: Type[Any]) -> Set[Type[Any]]:
+        """ Indexes the fields of a type and all structures reachable from it,
+        returns the set of those structures.
+        """
+        try:
+            return self._trees[typ]
+        except KeyError:
+            pass
+        reachable: Set[Type[Any]] = set()
+        pending = [typ]
+        while pending:
+            current = pending.pop()
+            if current in reachable or not is_structure(current):
+                continue
+            reachable.add(current)
+            self.register(current)
+            for hint in get_type_hints(current).values():
+                inner, _ = unwrap_optional(hint)
+                pending.append(sequence_item(inner) or inner)
+        with self._lock:
+            self._trees = self._trees.set(typ, reachable)
+        return reachable
+
+    def lookup(self, typ: Type[Any], field: Any) -> Optional[IndexedField]:
+        """ Returns the field only if it belongs to ``typ``.
+        """
+        self.register(typ)
+        rv = self._fields.get(field)
+        if rv is None or rv.owner is not typ:
+            return None
+        return rv
+
+    def find(self, root: Type[Any], field: Any) -> Optional[IndexedField]:
+        """ Returns the field if it belongs to any structure reachable from ``root``.
+        """
+        tree = self.register_tree(root)
+        rv = self._fields.get(field)
+        if rv is None or rv.owner not in tree:
+            return None
+        return rv
+
+    def _mk_field(self, owner: Type[Any], python_name: str, python_type: Any) -> IndexedField:
+        # variables are declared with the named type, nullability is declared separately
+        named_type, _ = unwrap_optional(python_type)
+        try:
+            type_name = GQL_SCALARS.get(named_type, named_type.__name__)
+        except AttributeError:
+            type_name = ''
+        return IndexedField(owner=owner,
+                            python_name=python_name,
+                            wire_name=self.name_overrider(python_name),
+                            python_type=python_type,
+                            type_name=type_name,
+                            is_optional=type(None) in inner_type_boundaries(python_type))
+
+
+_indices: 'WeakKeyDictionary[_TypeConstructor, FieldIndex]' = WeakKeyDictionary()
+_all_indices: 'WeakSet[FieldIndex]' = WeakSet()
+
+
+@after_fork_in_child
+def _reset_locks() -> None:
+    for index in list(_all_indices):
+        index._lock = threading.Lock()
+
+
+def field_index(typer: _TypeConstructor) -> FieldIndex:
+    """ Returns the index that is shared by all users of the same typer.
+    """
+    try:
+        return _indices[typer]
+    except KeyError:
+        return _indices.setdefault(typer, FieldIndex(get_global_name_overrider(typer.overrides)))
+
+
+class AttrNotFound(TypeError):
+    pass
+
+
+class FieldPath(NamedTuple):
+    """ Location of a field in a result, relative to the topmost query type.
+    """
+    python_names: Tuple[str, ...]
+    wire_names: Tuple[str, ...]
+    python_type: Any
+
+
+def resolve_path(root: Type[Any], fields: Sequence[FieldReference], typer: _TypeConstructor) -> FieldPath:
+    """ Finds the location of the last of ``fields``. Every field is looked up among the types reachable from
+    the type of a preceding field, therefore intermediate fields are only needed to disambiguate the path
+    when the same type is reachable in more than one way.
+    Fields that hold sequences can only be at the end of a path.
+    """
+    index = field_index(typer)
+    current = root
+    python_type: Any = root
+    steps: List[FieldInfo] = []
+    for n, field in enumerate(fields):
+        if n > 0:
+            inner, _ = unwrap_optional(python_type)
+            if sequence_item(inner) is not None:
+                raise TypeError(f'Sequences are only supported at the end of a path, {steps[-1].python_name} is not')
+            current = inner
+        target = index.find(current, field)
+        if target is None:
+            raise AttrNotFound(f"Couldn't find {field} in {current} and its nested types")
+        steps.extend(_shortest_path(current, target.owner, typer))
+        steps.extend(x for x in struct_fields(target.owner, typer) if x.python_name == target.python_name)
+        python_type = target.python_type
+    return FieldPath(python_names=tuple(x.python_name for x in steps),
+                     wire_names=tuple(x.wire_name for x in steps),
+                     python_type=python_type)
+
+
+def _shortest_path(source: Type[Any], target: Type[Any], typer: _TypeConstructor) -> List[FieldInfo]:
+    """ Fields that lead from one structure to another one, without passing through sequences.
+    """
+    visited = {source}
+    queue = deque([(source, [])])
+    while queue:
+        typ, path = queue.popleft()
+        if typ is target:
+            return path
+        for field in struct_fields(typ, typer):
+            inner, _ = unwrap_optional(field.python_type)
+            if is_structure(inner) and inner not in visited:
+                visited.add(inner)
+                queue.append((inner, path + [field]))
+    raise AttrNotFound(f"{target} is reachable from {source} only through a sequence")
@@ -0,0 +1,163 @@
+""" Timings and counters of query construction and (de)serialization.
+
+Instrumentation is opt-in: the constructor records construction phases and wraps (de)serializers
+of the queries it compiles only when it has an instrument, so queries built without one
+run exactly the same code as before.
+"""
+import random
+import sys
+from abc import ABC, abstractmethod
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, TextIO, TypeVar
+
+
+__all__ = (
+    'TYPER',
+    'BINDINGS',
+    'TRANSLATION',
+    'ENCODE',
+    'DECODE',
+    'CACHE_HIT',
+    'CACHE_MISS',
+    'Instrument',
+    'Recorder',
+    'Summary',
+    'instrument_query',
+    'timed',
+)
+
+
+# construction of (de)serializers of input and result types
+TYPER = 'typer'
+BINDINGS = 'bindings'
+TRANSLATION = 'translation'
+# serialization of query inputs
+ENCODE = 'encode'
+# decoding of results
+DECODE = 'decode'
+# lookups of compiled queries in the constructor cache
+CACHE_HIT = 'cache.hit'
+CACHE_MISS = 'cache.miss'
+
+
+class Instrument(ABC):
+    """ Receiver of instrumentation events, e.g. an adapter to a metrics client.
+    """
+    @abstractmethod
+    def record(self, event: str, seconds: float) -> None:
+        """ Records the duration of an operation.
+        """
+
+    @abstractmethod
+    def count(self, event: str) -> None:
+        """ Records an occurrence of an event that has no duration.
+        """
+
+
+@contextmanager
+def timed(instrument: Instrument, event: str) -> Iterator[None]:
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        instrument.record(event, perf_counter() - start)
+
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+def _timed_callable(instrument: Instrument, event: str, fn: F) -> F:
+    def wrapper(*args: Any) -> Any:
+        start = perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            instrument.record(event, perf_counter() - start)
+    return wrapper  # type: ignore
+
+
+def instrument_query(query: Any, instrument: Instrument) -> Any:
+    """ Returns a copy of a compiled query whose input serializer and result decoder are timed.
+    Suitable for ahead-of-time compiled queries as well.
+    """
+    return query._replace(get_input_vars=_timed_callable(instrument, ENCODE, query.get_input_vars),
+                          get_result=_timed_callable(instrument, DECODE, query.get_result))
+
+
+class Summary(NamedTuple):
+    count: int
+    total: float
+    # percentile => seconds
+    percentiles: Mapping[float, float]
+
+
+class Recorder(Instrument):
+    """ In-process aggregator of timings and counters.
+
+    Every event keeps a uniform sample of at most ``max_samples`` durations, percentiles are computed
+    from the sample, whereas counts and totals are exact.
+    """
+    def __init__(self, max_samples: int = 10_000) -> None:
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._totals: Dict[str, float] = {}
+
+    def record(self, event: str, seconds: float) -> None:
+        with self._lock:
+            n = self._counts.get(event, 0) + 1
+            self._counts[event] = n
+            self._totals[event] = self._totals.get(event, 0.0) + seconds
+            try:
+                samples = self._samples[event]
+            except KeyError:
+                samples = self._samples[event] = []
+            if n <= self.max_samples:
+                samples.append(seconds)
+            else:
+                # reservoir sampling
+                i = random.randrange(n)
+                if i < self.max_samples:
+                    samples[i] = seconds
+
+    def count(self, event: str) -> None:
+        with self._lock:
+            self._counts[event] = self._counts.get(event, 0) + 1
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Summary]:
+        with self._lock:
+            samples = {k: sorted(v) for k, v in self._samples.items()}
+            counts = dict(self._counts)
+            totals = dict(self._totals)
+        return {
+            event: Summary(count=count,
+                           total=totals.get(event, 0.0),
+                           percentiles={p: _percentile(samples[event], p) for p in percentiles}
+                           if samples.get(event) else {})
+            for event, count in sorted(counts.items())
+        }
+
+    def dump(self, out: Optional[TextIO] = None, percentiles: Sequence[float] = (50, 90, 99)) -> None:
+        """ Writes a table of counts, totals and percentiles, in milliseconds.
+        """
+        out = out or sys.stderr
+        header = ''.join(f'{f"p{p:g}":>10}' for p in percentiles)
+        out.write(f'{"event":<16}{"count":>10}{"total":>12}{header}\n')
+        for event, x in self.summary(percentiles).items():
+            row = ''.join(f'{x.percentiles[p] * 1000:>10.3f}' if x.percentiles else f'{"-":>10}' for p in percentiles)
+            out.write(f'{event:<16}{x.count:>10}{x.total * 1000:>12.3f}{row}\n')
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._totals.clear()
+
+
+def _percentile(ordered: List[float], p: float) -> float:
+    # nearest-rank
+    rank = max(int(-(-p * len(ordered) // 100)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
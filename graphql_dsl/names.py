@@ -0,0 +1,78 @@
+""" Interned table of wire names of fields.
+
+The table is the global name overrider of the default typer, therefore the translator,
+the binding resolver and the (de)serializers share the names it computes.
+"""
+import sys
+from typing import Any, Callable, Dict, Iterable, Mapping, Tuple, Type, Union, get_type_hints
+
+import inflection
+
+
+__all__ = (
+    'WireNames',
+    'WIRE_NAMES',
+    'camelize',
+)
+
+
+def camelize(python_name: str) -> str:
+    return inflection.camelize(python_name, uppercase_first_letter=False)
+
+
+class WireNames:
+    """ Memoized mapping of Python attribute names to wire names.
+
+    Every name is converted only once, subsequent calls are plain dictionary lookups.
+    The table can be seeded with names from compiled artifacts, and frozen
+    to make sure that no more names are converted at runtime.
+    """
+    def __init__(self, convert: Callable[[str], str] = camelize) -> None:
+        self.convert = convert
+        self.frozen = False
+        self._names: Dict[str, str] = {}
+
+    def __call__(self, python_name: str) -> str:
+        try:
+            return self._names[python_name]
+        except KeyError:
+            pass
+        if self.frozen:
+            raise KeyError(f'"{python_name}" is not in the frozen table of wire names')
+        wire_name = sys.intern(self.convert(python_name))
+        # concurrent callers compute the same value, the first one stored wins
+        return self._names.setdefault(sys.intern(python_name), wire_name)
+
+    # there's no __len__ on purpose: typeit flags treat falsy settings as absent ones
+
+    def __contains__(self, python_name: str) -> bool:
+        return python_name in self._names
+
+    def register_type(self, typ: Type[Any]) -> None:
+        """ Fills the table with names of all fields of a type at once.
+        """
+        for python_name in get_type_hints(typ):
+            self(python_name)
+
+    def seed(self, names: Union[Mapping[str, str], Iterable[Tuple[str, str]]]) -> None:
+        """ Adds precomputed names, e.g. the ``__wire_names__`` of an ahead-of-time compiled module.
+        """
+        items = names.items() if isinstance(names, Mapping) else names
+        for python_name, wire_name in items:
+            existing = self._names.get(python_name)
+            if existing is not None:
+                if existing != wire_name:
+                    raise ValueError(f'Conflicting wire names of "{python_name}": "{existing}" and "{wire_name}"')
+                continue
+            if self.frozen:
+                raise ValueError('Cannot seed a frozen table of wire names')
+            self._names[sys.intern(python_name)] = sys.intern(wire_name)
+
+    def freeze(self) -> None:
+        self.frozen = True
+
+    def snapshot(self) -> Dict[str, str]:
+        return dict(self._names)
+
+
+WIRE_NAMES = WireNames()
@@ -0,0 +1,214 @@
+""" Cursor-based pagination of queries that follow the GraphQL connection conventions.
+
+Pages are fetched ahead of the consumer, so that decoding of a page and iteration over its nodes
+overlap with fetching of the next pages.
+"""
+import asyncio
+import dataclasses
+import queue
+import threading
+from typing import Any, AsyncIterator, Callable, Iterator, NamedTuple, Optional, Sequence, Tuple, Union
+
+from .index import FieldReference, field_index, resolve_path
+from .typeinfo import unwrap_optional, sequence_item, struct_fields
+
+
+__all__ = (
+    'Pagination',
+    'pagination',
+    'paginate',
+    'apaginate',
+)
+
+
+PathSpec = Union[FieldReference, Sequence[FieldReference]]
+
+# page info fields, as defined by the GraphQL Cursor Connections Specification
+HAS_NEXT_PAGE = 'hasNextPage'
+END_CURSOR = 'endCursor'
+
+
+class Pagination(NamedTuple):
+    """ Locations of the cursor, page info and nodes of a paginated query.
+    """
+    cursor_attr: str
+    page_info: Tuple[str, ...]
+    has_next_page: str
+    end_cursor: str
+    nodes: Tuple[str, ...]
+
+    def next_input(self, query_input: Any, cursor: Optional[str]) -> Any:
+        if dataclasses.is_dataclass(query_input):
+            return dataclasses.replace(query_input, **{self.cursor_attr: cursor})
+        return query_input._replace(**{self.cursor_attr: cursor})
+
+    def page_nodes(self, result: Any) -> Sequence[Any]:
+        return _follow(result, self.nodes) or ()
+
+    def next_cursor(self, result: Any) -> Tuple[bool, Optional[str]]:
+        page_info = _follow(result, self.page_info)
+        if page_info is None or not getattr(page_info, self.has_next_page):
+            return False, None
+        return True, getattr(page_info, self.end_cursor)
+
+
+def _follow(value: Any, path: Tuple[str, ...]) -> Any:
+    for attr in path:
+        if value is None:
+            return None
+        value = getattr(value, attr)
+    return value
+
+
+def _as_path(spec: PathSpec) -> Sequence[FieldReference]:
+    # dataclass fields are referenced with (type, name) tuples
+    if isinstance(spec, (list, tuple)) and not (len(spec) == 2 and isinstance(spec[1], str)):
+        return spec
+    return (spec,)
+
+
+def pagination(query: Any, cursor: FieldReference, page_info: PathSpec, nodes: PathSpec) -> Pagination:
+    """ Resolves locations of the pagination fields of ``query``.
+
+    ``cursor`` is an input field that is bound to the query with ``TO``, ``page_info`` and ``nodes``
+    are references to the respective fields of the result, optionally preceded by disambiguating fields.
+    """
+    expr, constructor = query.expr, query.constructor
+    if expr is None or constructor is None:
+        raise TypeError(f'Query {query.name} has no type information to paginate its results')
+    if not any(x.input_field == cursor for x in expr.bindings):
+        raise ValueError(f'{cursor} is not bound to any field of {query.name}')
+    cursor_field = field_index(constructor.typer).lookup(expr.input, cursor)
+    if cursor_field is None:
+        raise ValueError(f'{cursor} is not a field of {expr.input}')
+
+    page_info_path = resolve_path(expr.query, _as_path(page_info), constructor.typer)
+    page_info_type, _ = unwrap_optional(page_info_path.python_type)
+    names = {x.wire_name: x.python_name for x in struct_fields(page_info_type, constructor.typer)}
+    try:
+        has_next_page, end_cursor = names[HAS_NEXT_PAGE], names[END_CURSOR]
+    except KeyError as e:
+        raise ValueError(f'{page_info_type} should have both {HAS_NEXT_PAGE} and {END_CURSOR} fields') from e
+
+    nodes_path = resolve_path(expr.query, _as_path(nodes), constructor.typer)
+    if sequence_item(unwrap_optional(nodes_path.python_type)[0]) is None:
+        raise TypeError(f'{".".join(nodes_path.python_names)} of {expr.query} is not a sequence')
+
+    return Pagination(cursor_attr=cursor_field.python_name,
+                      page_info=page_info_path.python_names,
+                      has_next_page=has_next_page,
+                      end_cursor=end_cursor,
+                      nodes=nodes_path.python_names)
+
+
+_DONE = object()
+
+
+def paginate(execute: Callable[[Any, Any], Any],
+             query: Any,
+             query_input: Any,
+             cursor: FieldReference,
+             page_info: PathSpec,
+             nodes: PathSpec,
+             prefetch: int = 1) -> Iterator[Any]:
+    """ Lazily yields nodes of all pages, starting from ``query_input``. ``execute(query, query_input)``
+    returns a typed result, e.g. ``Executor.execute``. Up to ``prefetch`` pages are fetched by
+    a background thread ahead of the consumer, in addition to the page that the consumer iterates over.
+    """
+    if prefetch < 1:
+        raise ValueError('Prefetch should be a positive number')
+    spec = pagination(query, cursor, page_info, nodes)
+    return _iter_pages(execute, query, query_input, spec, prefetch)
+
+
+def _iter_pages(execute: Callable[[Any, Any], Any],
+                query: Any,
+                query_input: Any,
+                spec: Pagination,
+                prefetch: int) -> Iterator[Any]:
+    pages: 'queue.SimpleQueue[Any]' = queue.SimpleQueue()
+    # a page is fetched only when there is room for it, so that no more than ``prefetch`` pages
+    # wait for the consumer, the consumer frees a slot when it takes a page
+    slots = threading.Semaphore(prefetch)
+    stopped = threading.Event()
+
+    def fetch() -> None:
+        current = query_input
+        try:
+            while True:
+                slots.acquire()
+                if stopped.is_set():
+                    return
+                result = execute(query, current)
+                has_next, end_cursor = spec.next_cursor(result)
+                pages.put(spec.page_nodes(result))
+                if not has_next:
+                    break
+                current = spec.next_input(current, end_cursor)
+        except Exception as e:
+            pages.put(e)
+            return
+        pages.put(_DONE)
+
+    producer = threading.Thread(target=fetch, name=f'paginate-{query.name}', daemon=True)
+    producer.start()
+    try:
+        while True:
+            page = pages.get()
+            if page is _DONE:
+                return
+            if isinstance(page, BaseException):
+                raise page
+            slots.release()
+            yield from page
+    finally:
+        # the consumer may stop early, the producer is woken up to exit then
+        stopped.set()
+        slots.release()
+
+
+async def apaginate(execute: Callable[[Any, Any], Any],
+                    query: Any,
+                    query_input: Any,
+                    cursor: FieldReference,
+                    page_info: PathSpec,
+                    nodes: PathSpec,
+                    prefetch: int = 1) -> AsyncIterator[Any]:
+    """ Asynchronous version of ``paginate``, ``execute`` is a coroutine function,
+    e.g. ``AsyncExecutor.execute``.
+    """
+    if prefetch < 1:
+        raise ValueError('Prefetch should be a positive number')
+    spec = pagination(query, cursor, page_info, nodes)
+    pages: 'asyncio.Queue[Any]' = asyncio.Queue()
+    slots = asyncio.Semaphore(prefetch)
+
+    async def fetch() -> None:
+        current = query_input
+        try:
+            while True:
+                await slots.acquire()
+                result = await execute(query, current)
+                has_next, end_cursor = spec.next_cursor(result)
+                pages.put_nowait(spec.page_nodes(result))
+                if not has_next:
+                    break
+                current = spec.next_input(current, end_cursor)
+        except Exception as e:
+            pages.put_nowait(e)
+            return
+        pages.put_nowait(_DONE)
+
+    producer = asyncio.ensure_future(fetch())
+    try:
+        while True:
+            page = await pages.get()
+            if page is _DONE:
+                return
+            if isinstance(page, BaseException):
+                raise page
+            slots.release()
+            for node in page:
+                yield node
+    finally:
+        producer.cancel()
@@ -1,7 +1,16 @@
 import graphql
 
+from .cache import Definition, Schema, load
+
+
+__all__ = (
+    'Definition',
+    'Schema',
+    'load',
+    'parse',
+)
+
 
 def parse(src: str) -> graphql.DocumentNode:
-    schema = graphql.parse(src)
-    schema.definitions[0].operation_types[0].type.name.value
-    return schema
+    # locations let the code generator take the source text of definitions instead of printing them
+    return graphql.parse(src)
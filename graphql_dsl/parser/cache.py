@@ -0,0 +1,169 @@
+""" On-disk cache of parsed schemas.
+
+A cached schema consists of the source text of each definition, which is enough to generate code,
+and a compact encoding of the whole AST, which is decoded only on demand. Cache files are memory-mapped,
+so loading a cached schema costs a hash of the source and a single read of the definitions table.
+The map is owned by the loaded schema, which should be closed once it's no longer needed.
+"""
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Type, Union
+
+import graphql
+from graphql.language import ast
+
+
+__all__ = (
+    'Definition',
+    'Schema',
+    'load',
+)
+
+
+class Definition(NamedTuple):
+    # e.g. object_type_definition
+    kind: str
+    name: Optional[str]
+    # the source text of the definition
+    sdl: str
+
+
+class Schema(NamedTuple):
+    sha256: str
+    definitions: Tuple[Definition, ...]
+    # bytes, or a view of the memory-mapped cache file
+    encoded_ast: Any
+    # the map of the cache file that the schema was loaded from, see close()
+    mapped: Optional[mmap.mmap] = None
+
+    def document(self) -> graphql.DocumentNode:
+        """ Decodes the full AST.
+        """
+        if self.mapped is not None and self.mapped.closed:
+            raise ValueError(f'Schema {self.sha256} is closed, its AST can no longer be decoded')
+        return _decode(marshal.loads(self.encoded_ast))
+
+    def close(self) -> None:
+        """ Unmaps the cache file. Definitions remain available, the AST can't be decoded afterwards.
+        """
+        if self.mapped is not None and not self.mapped.closed:
+            self.encoded_ast.release()
+            self.mapped.close()
+
+    def __enter__(self) -> 'Schema':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+_NODE_CLASSES: Tuple[Type[ast.Node], ...] = tuple(sorted(
+    (x for x in vars(ast).values() if isinstance(x, type) and issubclass(x, ast.Node) and x is not ast.Node),
+    key=lambda x: x.__name__,
+))
+_NODE_INDEX: Dict[Type[ast.Node], int] = {cls: n for n, cls in enumerate(_NODE_CLASSES)}
+# locations are never encoded
+_NODE_KEYS: Tuple[Tuple[str, ...], ...] = tuple(tuple(k for k in x.keys if k != 'loc') for x in _NODE_CLASSES)
+# nodes of graphql-core < 3.3 use __slots__ rather than instance dicts
+_HAS_DICT: Tuple[bool, ...] = tuple(x.__dictoffset__ != 0 for x in _NODE_CLASSES)
+
+# the encoding depends on the set of node classes and on the marshal format of the interpreter
+_VERSION = hashlib.sha256(
+    f'1:{graphql.version}:{sys.version_info[:2]}:{[x.__name__ for x in _NODE_CLASSES]}'.encode('utf-8')
+).digest()[:8]
+_MAGIC = b'GQLDSL\x00\x01'
+# magic, version, sha256 of the source, length of the definitions table
+_HEADER = struct.Struct('<8s8s32sQ')
+
+
+def _encode(value: Any) -> Any:
+    """ Nodes become tuples that start with an index of the node class,
+    sequences of nodes become lists.
+    """
+    if isinstance(value, ast.Node):
+        index = _NODE_INDEX[value.__class__]
+        return (index,) + tuple(_encode(getattr(value, k)) for k in _NODE_KEYS[index])
+    if isinstance(value, (list, tuple)):
+        return [_encode(x) for x in value]
+    if isinstance(value, (str, bool, int, float)) or value is None:
+        return value
+    # enums of operation types
+    return value.value
+
+
+def _decode(value: Any) -> Any:
+    # node constructors are bypassed, it's several times faster
+    index = value[0]
+    cls = _NODE_CLASSES[index]
+    fields = dict(zip(_NODE_KEYS[index], [
+        _decode(x) if type(x) is tuple else tuple([_decode(y) for y in x]) if type(x) is list else x
+        for x in value[1:]
+    ]))
+    if cls is ast.OperationDefinitionNode or cls is ast.OperationTypeDefinitionNode:
+        fields['operation'] = ast.OperationType(fields['operation'])
+    node = object.__new__(cls)
+    if _HAS_DICT[index]:
+        node.__dict__.update(fields)
+    else:
+        fields['loc'] = None
+        for k, v in fields.items():
+            object.__setattr__(node, k, v)
+    return node
+
+
+def _build(src: str, sha256: bytes) -> Tuple[Schema, bytes]:
+    document = graphql.parse(src)
+    definitions = tuple(
+        Definition(kind=x.kind,
+                   name=x.name.value if getattr(x, 'name', None) is not None else None,
+                   sdl=src[x.loc.start:x.loc.end])
+        for x in document.definitions
+    )
+    table = marshal.dumps(tuple(tuple(x) for x in definitions))
+    encoded_ast = marshal.dumps(_encode(document))
+    data = _HEADER.pack(_MAGIC, _VERSION, sha256, len(table)) + table + encoded_ast
+    return Schema(sha256.hex(), definitions, encoded_ast), data
+
+
+def _read(path: Path, sha256: bytes) -> Optional[Schema]:
+    try:
+        with path.open('rb') as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        # a missing or empty file
+        return None
+    if len(buf) < _HEADER.size:
+        buf.close()
+        return None
+    magic, version, digest, table_size = _HEADER.unpack_from(buf)
+    if (magic, version, digest) != (_MAGIC, _VERSION, sha256):
+        buf.close()
+        return None
+    with memoryview(buf) as view:
+        table = marshal.loads(view[_HEADER.size:_HEADER.size + table_size])
+        encoded_ast = view[_HEADER.size + table_size:]
+    return Schema(sha256.hex(), tuple(Definition(*x) for x in table), encoded_ast, buf)
+
+
+def load(src: str, cache_path: Union[Path, str, None] = None) -> Schema:
+    """ Parses a schema, or loads it from ``cache_path`` when the file was created from the same source.
+    The cache file is replaced otherwise. A loaded schema keeps the file mapped until it's closed,
+    e.g. ``with load(src, path) as schema: ...``.
+    """
+    sha256 = hashlib.sha256(src.encode('utf-8')).digest()
+    path = Path(cache_path) if cache_path is not None else None
+    if path is not None:
+        schema = _read(path, sha256)
+        if schema is not None:
+            return schema
+    schema, data = _build(src, sha256)
+    if path is not None:
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    return schema
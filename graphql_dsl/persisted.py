@@ -0,0 +1,109 @@
+""" Automatic persisted queries.
+
+A client sends only the sha256 hash of a query. If the server doesn't know the hash yet, it replies
+with ``PersistedQueryNotFound``, and the client repeats the request with the full query text, so that
+the server can register it under the hash.
+"""
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Generator, Iterable, Mapping, Optional
+
+
+__all__ = (
+    'PERSISTED_QUERY_VERSION',
+    'query_hash',
+    'persisted_payload',
+    'is_persisted_query_not_found',
+    'persisted_exchange',
+    'send_persisted',
+    'asend_persisted',
+    'manifest',
+    'dump_manifest',
+)
+
+
+PERSISTED_QUERY_VERSION = 1
+
+_NOT_FOUND = frozenset(['PersistedQueryNotFound', 'PERSISTED_QUERY_NOT_FOUND'])
+
+
+def query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+def persisted_payload(payload: Mapping[str, Any], sha256: str, include_query: bool = False) -> Dict[str, Any]:
+    """ Turns a regular request payload into a persisted one. The query text is dropped,
+    unless the query should be registered on the server.
+    """
+    rv = dict(payload)
+    if not include_query:
+        del rv['query']
+    rv['extensions'] = {'persistedQuery': {'version': PERSISTED_QUERY_VERSION, 'sha256Hash': sha256}}
+    return rv
+
+
+def is_persisted_query_not_found(response: Mapping[str, Any]) -> bool:
+    """ Whether the server doesn't know the hash of a persisted query.
+    Both the message and the error code are recognized, as servers differ in what they report.
+    """
+    for error in response.get('errors') or ():
+        if not isinstance(error, Mapping):
+            continue
+        if error.get('message') in _NOT_FOUND:
+            return True
+        extensions = error.get('extensions')
+        if isinstance(extensions, Mapping) and extensions.get('code') in _NOT_FOUND:
+            return True
+    return False
+
+
+Exchange = Generator[Mapping[str, Any], Mapping[str, Any], Mapping[str, Any]]
+
+
+def persisted_exchange(payload: Mapping[str, Any], sha256: str) -> Exchange:
+    """ The protocol of persisted queries, independent of the transport: yields payloads to send,
+    receives decoded responses, and returns the final response.
+    The full text is sent only when the server replies with ``PersistedQueryNotFound``.
+    """
+    response = yield persisted_payload(payload, sha256)
+    if is_persisted_query_not_found(response):
+        response = yield persisted_payload(payload, sha256, include_query=True)
+    return response
+
+
+def send_persisted(send: Callable[[Mapping[str, Any]], Mapping[str, Any]],
+                   payload: Mapping[str, Any],
+                   sha256: str) -> Mapping[str, Any]:
+    """ Sends the hash of a query via ``send``, which posts a payload and returns a decoded response.
+    """
+    exchange = persisted_exchange(payload, sha256)
+    request = next(exchange)
+    while True:
+        try:
+            request = exchange.send(send(request))
+        except StopIteration as e:
+            return e.value
+
+
+async def asend_persisted(send: Callable[[Mapping[str, Any]], Awaitable[Mapping[str, Any]]],
+                          payload: Mapping[str, Any],
+                          sha256: str) -> Mapping[str, Any]:
+    """ Same as ``send_persisted``, with an asynchronous ``send``.
+    """
+    exchange = persisted_exchange(payload, sha256)
+    request = next(exchange)
+    while True:
+        try:
+            request = exchange.send(await send(request))
+        except StopIteration as e:
+            return e.value
+
+
+def manifest(queries: Iterable[Any]) -> Dict[str, str]:
+    """ Returns a mapping of query hashes to query texts, suitable for whitelisting queries on the server.
+    """
+    return {q.sha256 or query_hash(q.query): q.query for q in queries}
+
+
+def dump_manifest(queries: Iterable[Any], indent: Optional[int] = 2) -> str:
+    return json.dumps(manifest(queries), indent=indent, sort_keys=True)
@@ -0,0 +1,148 @@
+""" Compiled queries. The module doesn't depend on the query constructor, so that executing queries
+that were compiled ahead of time doesn't involve importing it.
+"""
+import json
+from enum import Enum
+from typing import NamedTuple, Any, Callable, Dict, Mapping, Optional, TypeVar, Iterator, AsyncIterator, AsyncIterable, \
+    Sequence, Tuple, Union, TYPE_CHECKING
+
+from .persisted import persisted_payload, query_hash
+from .streaming import Source, iter_sequence, aiter_sequence
+
+if TYPE_CHECKING:
+    from .cost import CostEstimator, QueryCost
+    from .dsl import Expr, GraphQLQueryConstructor
+    from .index import FieldReference
+
+
+__all__ = (
+    'GraphQLQuery',
+    'mk_payload_prefix',
+)
+
+
+T = TypeVar('T')
+
+
+def _identity(x: T) -> T:
+    return x
+
+
+def wire_value(value: Any) -> Any:
+    """ JSON value of a literal variable.
+    """
+    return value.value if isinstance(value, Enum) else value
+
+
+def mk_payload_prefix(name: str, query: str) -> bytes:
+    return b'{"operationName":%s,"query":%s,"variables":' % (
+        json.dumps(name).encode('utf-8'), json.dumps(query).encode('utf-8')
+    )
+
+
+class GraphQLQuery(NamedTuple):
+    query: str
+    name: str
+    get_input_vars: Callable[[T], Mapping[str, Any]]
+    get_result: Callable[[Mapping[str, Any]], Any]
+    # the source expression and the constructor, absent in ahead-of-time compiled queries
+    expr: Optional['Expr'] = None
+    constructor: Optional['GraphQLQueryConstructor'] = None
+    # sha256 of the query text, computed once by the constructor
+    sha256: Optional[str] = None
+    # pre-encoded constant part of the JSON request body
+    payload_prefix: Optional[bytes] = None
+    # static estimate of the cost, absent in ahead-of-time compiled queries
+    cost: Optional['QueryCost'] = None
+    # values of the variables that are bound to literals, which are sent with every request,
+    # see graphql_dsl.dsl.DEFAULT
+    defaults: Optional[Mapping[str, Any]] = None
+    # estimates the cost for other values of the literals, absent in ahead-of-time compiled queries
+    cost_estimator: Optional['CostEstimator'] = None
+
+    def request_payload(self,
+                        query_input: Optional[T] = None,
+                        variables: Optional[Mapping[str, Any]] = None) -> Mapping[str, Any]:
+        """ ``variables`` override the values of literal variables, the query text stays the same.
+        """
+        in_ = self.get_input_vars(query_input) if query_input else {}
+        if self.defaults:
+            in_ = self._with_literals(in_, variables)
+        elif variables:
+            raise ValueError(f'Query {self.name} has no literal variables')
+        return { "operationName": self.name
+               , "variables":     in_
+               , "query":         self.query
+               }
+
+    def request_payload_bytes(self,
+                              query_input: Optional[T] = None,
+                              variables: Optional[Mapping[str, Any]] = None) -> bytes:
+        """ Same as ``request_payload``, but encoded into a JSON request body.
+        """
+        in_ = self.get_input_vars(query_input) if query_input else {}
+        if self.defaults:
+            in_ = self._with_literals(in_, variables)
+        elif variables:
+            raise ValueError(f'Query {self.name} has no literal variables')
+        prefix = self.payload_prefix or mk_payload_prefix(self.name, self.query)
+        return b'%s%s}' % (prefix, json.dumps(in_, separators=(',', ':')).encode('utf-8'))
+
+    def persisted_payload(self,
+                          query_input: Optional[T] = None,
+                          include_query: bool = False,
+                          variables: Optional[Mapping[str, Any]] = None) -> Mapping[str, Any]:
+        """ Same as ``request_payload``, but the query is identified by its hash.
+        """
+        return persisted_payload(self.request_payload(query_input, variables),
+                                 self.sha256 or query_hash(self.query),
+                                 include_query)
+
+    def iter_results(self, source: Source, *path: 'FieldReference') -> Iterator[Any]:
+        """ Decodes elements of a sequence from a raw response one by one, without loading the entire
+        response in memory. The source may be bytes, a string, a file-like object, or an iterable of chunks.
+
+        ``path`` ends with a reference to the sequence field, e.g. ``q.iter_results(response.raw, Issues.nodes)``.
+        """
+        wire_path, decode = self._sequence_decoder(path)
+        return iter_sequence(source, wire_path, decode)
+
+    def aiter_results(self, source: AsyncIterable[Union[bytes, str]], *path: 'FieldReference') -> AsyncIterator[Any]:
+        """ Same as ``iter_results``, for asynchronous iterables of response chunks.
+        """
+        wire_path, decode = self._sequence_decoder(path)
+        return aiter_sequence(source, wire_path, decode)
+
+    def columns(self, source: Union[Source, Mapping[str, Any]], *path: 'FieldReference',
+                numpy: bool = False) -> Dict[str, Any]:
+        """ Collects the fields of a sequence of structures into a buffer per field, without building
+        an instance for every element. Numeric fields are collected into ``array.array``, or into NumPy arrays
+        with ``numpy=True``, nested structures are flattened into dot-separated columns, e.g. ``author.login``.
+
+        ``source`` is either a decoded response, or anything that ``iter_results`` accepts.
+        """
+        if self.constructor is None or self.expr is None:
+            raise TypeError(f'Query {self.name} has no type information to collect columns')
+        wire_path, builder = self.constructor.column_builder(self.expr.query, path)
+        if isinstance(source, Mapping):
+            rows = source
+            for key in wire_path:
+                rows = rows[key]
+        else:
+            rows = iter_sequence(source, wire_path, _identity)
+        return builder.build(rows, numpy=numpy)
+
+    def _with_literals(self, in_: Mapping[str, Any], variables: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+        rv = dict(in_)
+        rv.update(self.defaults or ())
+        if variables:
+            unknown = set(variables).difference(self.defaults or ())
+            if unknown:
+                raise ValueError(f'Query {self.name} has no literal variables {", ".join(sorted(unknown))}')
+            rv.update((k, wire_value(v)) for k, v in variables.items())
+        return rv
+
+    def _sequence_decoder(self, path: Sequence['FieldReference']) -> Tuple[Tuple[str, ...], Callable[[Any], Any]]:
+        if self.constructor is None or self.expr is None:
+            raise TypeError(f'Query {self.name} has no type information to decode results incrementally')
+        return self.constructor.sequence_decoder(self.expr.query, path)
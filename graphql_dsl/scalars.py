@@ -0,0 +1,19 @@
+""" Scalar types that don't depend on the type constructor, so that ahead-of-time compiled
+queries can refer to them without importing it.
+"""
+from typing import Mapping, Type, Any
+
+
+__all__ = ('ID', 'GQL_SCALARS')
+
+
+GQL_SCALARS: Mapping[Type[Any], str] = {
+    str: 'String',
+    int: 'Int',
+    float: 'Float',
+    bool: 'Boolean',
+}
+
+
+class ID(str):
+    pass
@@ -0,0 +1,293 @@
+""" Incremental decoding of sequences from large GraphQL responses.
+
+Only the elements of the requested sequence are materialized, one at a time,
+the rest of the document is scanned through without building any objects.
+"""
+import codecs
+import json
+import re
+from typing import Any, AsyncIterable, Callable, Generator, Iterable, Iterator, AsyncIterator, List, Optional, \
+    Sequence, Union, IO
+
+from .errors import DecodingError
+
+
+__all__ = (
+    'iter_sequence',
+    'aiter_sequence',
+)
+
+
+Source = Union[bytes, str, IO[bytes], IO[str], Iterable[bytes], Iterable[str]]
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SCALAR = re.compile(r'[^ \t\n\r,}\]]+')
+_STRUCTURE = re.compile(r'["{}\[\]]')
+_decoder = json.JSONDecoder()
+
+
+class _Buffer:
+    __slots__ = ('text', 'pos', 'chunks', 'pending', 'closed', 'errors', 'found')
+
+    def __init__(self) -> None:
+        self.text = ''
+        self.pos = 0
+        # chunks that haven't been appended to the text yet, and their total length
+        self.chunks: List[str] = []
+        self.pending = 0
+        self.closed = False
+        self.errors: Any = None
+        # whether the sequence has been found, even an empty one
+        self.found = False
+
+
+# yielded by the scanner when it runs out of data, the elements of the sequence are yielded as they are
+_MORE = object()
+
+
+def _more(buf: _Buffer, need: int = 1) -> Generator[Any, None, None]:
+    """ Suspends the scanner until at least ``need`` more characters arrive. The consumed part
+    of the text is dropped and the pending chunks are appended to the rest only once enough of them arrive,
+    so that a value that spans many chunks is not copied on every chunk.
+    """
+    while not buf.closed and buf.pending < need:
+        yield _MORE
+    if not buf.chunks:
+        raise DecodingError('Unexpected end of the JSON document')
+    buf.text = buf.text[buf.pos:] + ''.join(buf.chunks)
+    buf.pos = 0
+    buf.chunks = []
+    buf.pending = 0
+
+
+def _peek(buf: _Buffer) -> Generator[Any, None, str]:
+    while True:
+        buf.pos = _WHITESPACE.match(buf.text, buf.pos).end()
+        if buf.pos < len(buf.text):
+            return buf.text[buf.pos]
+        yield from _more(buf)
+
+
+def _expect(buf: _Buffer, char: str) -> Generator[Any, None, None]:
+    c = yield from _peek(buf)
+    if c != char:
+        raise DecodingError(f'Expected "{char}" at position {buf.pos}, got "{c}"')
+    buf.pos += 1
+
+
+def _read_string(buf: _Buffer, decode: bool = True) -> Generator[Any, None, Optional[str]]:
+    c = yield from _peek(buf)
+    if c != '"':
+        raise DecodingError(f'Expected a string at position {buf.pos}, got "{c}"')
+    while True:
+        match = _STRING.match(buf.text, buf.pos)
+        if match is not None:
+            buf.pos = match.end()
+            return json.loads(match.group()) if decode else None
+        # an incomplete string is matched again only when it doubles, to keep the total time linear
+        yield from _more(buf, len(buf.text) - buf.pos)
+
+
+def _read_value(buf: _Buffer) -> Generator[Any, None, Any]:
+    yield from _peek(buf)
+    while True:
+        try:
+            value, end = _decoder.raw_decode(buf.text, buf.pos)
+        except json.JSONDecodeError as e:
+            if buf.closed:
+                raise DecodingError(f'Malformed JSON document: {e}') from e
+        else:
+            # a number at the very end of the buffer may continue in the next chunk
+            if end < len(buf.text) or buf.closed:
+                buf.pos = end
+                return value
+        # an incomplete value is decoded again only when it doubles, to keep the total decoding time linear
+        yield from _more(buf, len(buf.text) - buf.pos)
+
+
+def _skip_value(buf: _Buffer) -> Generator[Any, None, None]:
+    c = yield from _peek(buf)
+    if c == '"':
+        yield from _read_string(buf, decode=False)
+        return
+    if c not in '{[':
+        while True:
+            match = _SCALAR.match(buf.text, buf.pos)
+            if match is None:
+                raise DecodingError(f'Unexpected "{c}" at position {buf.pos}')
+            if match.end() < len(buf.text) or buf.closed:
+                buf.pos = match.end()
+                return
+            yield from _more(buf)
+
+    depth = 0
+    while True:
+        match = _STRUCTURE.search(buf.text, buf.pos)
+        if match is None:
+            buf.pos = len(buf.text)
+            yield from _more(buf)
+            continue
+        c = match.group()
+        if c == '"':
+            buf.pos = match.start()
+            yield from _read_string(buf, decode=False)
+            continue
+        buf.pos = match.end()
+        depth += 1 if c in '{[' else -1
+        if depth == 0:
+            return
+
+
+def _scan(buf: _Buffer, path: Sequence[str]) -> Generator[Any, None, None]:
+    """ Scans the topmost object of a response. The scan stops as soon as the sequence is read,
+    otherwise it proceeds to the end of the document to collect the reported errors.
+    """
+    yield from _expect(buf, '{')
+    while True:
+        c = yield from _peek(buf)
+        if c == '}':
+            buf.pos += 1
+            return
+        if c == ',':
+            buf.pos += 1
+            continue
+        key = yield from _read_string(buf)
+        yield from _expect(buf, ':')
+        if key == path[0]:
+            found = yield from _scan_value(buf, path[1:])
+            if found:
+                return
+        elif key == 'errors':
+            buf.errors = yield from _read_value(buf)
+        else:
+            yield from _skip_value(buf)
+
+
+def _scan_value(buf: _Buffer, path: Sequence[str]) -> Generator[Any, None, bool]:
+    c = yield from _peek(buf)
+    if c == 'n':
+        # null on the way to the sequence
+        yield from _skip_value(buf)
+        return False
+
+    if not path:
+        yield from _expect(buf, '[')
+        buf.found = True
+        while True:
+            c = yield from _peek(buf)
+            if c == ']':
+                buf.pos += 1
+                return True
+            if c == ',':
+                buf.pos += 1
+                continue
+            item = yield from _read_value(buf)
+            yield item
+
+    yield from _expect(buf, '{')
+    while True:
+        c = yield from _peek(buf)
+        if c == '}':
+            buf.pos += 1
+            return False
+        if c == ',':
+            buf.pos += 1
+            continue
+        key = yield from _read_string(buf)
+        yield from _expect(buf, ':')
+        if key == path[0]:
+            found = yield from _scan_value(buf, path[1:])
+            if found:
+                return True
+        else:
+            yield from _skip_value(buf)
+
+
+class _Scanner:
+    """ Push-based scanner that can be driven by both synchronous and asynchronous sources.
+    Elements of the sequence are returned as soon as they are read, and the returned iterators
+    should be exhausted before the next chunk is fed.
+    """
+    def __init__(self, path: Sequence[str]) -> None:
+        self.buf = _Buffer()
+        self.path = path
+        self._scan: Optional[Generator[Any, None, None]] = _scan(self.buf, path)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    def feed(self, chunk: Union[bytes, str]) -> Iterator[Any]:
+        if self._scan is None:
+            # the sequence has been read entirely, the rest of the document is irrelevant
+            return iter(())
+        if isinstance(chunk, bytes):
+            chunk = self._utf8.decode(chunk)
+        if chunk:
+            self.buf.chunks.append(chunk)
+            self.buf.pending += len(chunk)
+        return self._resume()
+
+    def close(self) -> Iterator[Any]:
+        if self._scan is not None:
+            rest = self._utf8.decode(b'', final=True)
+            if rest:
+                self.buf.chunks.append(rest)
+                self.buf.pending += len(rest)
+            self.buf.closed = True
+            yield from self._resume()
+            if self._scan is not None:
+                raise DecodingError('Unexpected end of the JSON document')
+        if not self.buf.found and self.buf.errors:
+            raise DecodingError(f'The response has no {".".join(self.path)}: {self.buf.errors}')
+
+    def _resume(self) -> Iterator[Any]:
+        while self._scan is not None:
+            try:
+                item = next(self._scan)
+            except StopIteration:
+                self._scan = None
+                return
+            if item is _MORE:
+                return
+            yield item
+
+
+def _iter_chunks(source: Source) -> Iterator[Union[bytes, str]]:
+    if isinstance(source, (bytes, str)):
+        # slices rather than the whole source, so that the first elements are decoded before the rest is scanned
+        for n in range(0, len(source), CHUNK_SIZE):
+            yield source[n:n + CHUNK_SIZE]
+    elif hasattr(source, 'read'):
+        read = source.read
+        while True:
+            chunk = read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        yield from source
+
+
+def iter_sequence(source: Source, path: Sequence[str], decode: Callable[[Any], Any]) -> Iterator[Any]:
+    """ Yields decoded elements of a sequence that resides at ``path`` of a JSON document.
+    """
+    scanner = _Scanner(path)
+    for chunk in _iter_chunks(source):
+        for item in scanner.feed(chunk):
+            yield decode(item)
+    for item in scanner.close():
+        yield decode(item)
+
+
+async def aiter_sequence(source: AsyncIterable[Union[bytes, str]],
+                         path: Sequence[str],
+                         decode: Callable[[Any], Any]) -> AsyncIterator[Any]:
+    """ Asynchronous version of ``iter_sequence``.
+    """
+    scanner = _Scanner(path)
+    async for chunk in source:
+        for item in scanner.feed(chunk):
+            yield decode(item)
+    for item in scanner.close():
+        yield decode(item)
@@ -0,0 +1,31 @@
+""" Locks that survive ``os.fork()``.
+
+A lock that is held by another thread at the time of a fork stays locked forever in the child process,
+therefore every lock of the package is replaced in the child right after a fork.
+"""
+import os
+from typing import Any, Callable, List
+
+
+__all__ = (
+    'after_fork_in_child',
+)
+
+
+_callbacks: List[Callable[[], None]] = []
+
+
+def after_fork_in_child(callback: Callable[[], Any]) -> Callable[[], Any]:
+    """ Registers a callback that resets the state of a module in a forked child. Usable as a decorator.
+    """
+    _callbacks.append(callback)
+    return callback
+
+
+def _run_callbacks() -> None:
+    for callback in _callbacks:
+        callback()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_run_callbacks)
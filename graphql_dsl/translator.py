@@ -1,21 +1,31 @@
 from itertools import chain
-from typing import Type, Any, Generator, Mapping, Callable
+from typing import Type, Any, Generator, Mapping, Callable, NamedTuple, Optional, Tuple, FrozenSet, Dict, List
+from weakref import WeakKeyDictionary
 
 from typeit.combinator.constructor import _TypeConstructor
 from typeit.tokenizer import iter_tokens, Token, BeginType, EndType, BeginAttribute, EndAttribute
 
+from .typeinfo import type_schema, unwrap_optional, sequence_item
+
 __all__ = (
     'translate',
+    'translate_selection',
+    'translate_variables',
+    'translate_with_fragments',
 )
 
 
+def _declare_variables(bindings: Mapping[Any, Any]) -> str:
+    # a variable that is passed to several arguments is declared once
+    declared: Dict[str, str] = {}
+    for x in chain.from_iterable(bindings.values()):
+        if x.attr_name not in declared:
+            declared[x.attr_name] = f'${x.attr_name}:{x.type_name}{"" if x.is_optional else "!"}'
+    return ','.join(declared.values())
+
+
 def translate_begin_type(x: Token, bindings: Mapping[Any, Any]) -> str:
-    if bindings:
-        all_bindings = chain.from_iterable(bindings.values())
-        vars = ','.join(f'${x.attr_name}:{x.type_name}{"" if x.is_optional else "!"}' for x in all_bindings)
-        vars = f'({vars})'
-    else:
-        vars = ''
+    vars = f'({_declare_variables(bindings)})' if bindings else ''
     return f'{x.python_name}{vars}{{'
 
 
@@ -65,6 +75,8 @@ def translate_tokens_to_graphql(
     """
     query_type_began = False
     previous_token_pair = (None, None)
+    # the tokenizer constructs unknown types without the typer lock
+    type_schema(typer, typ)
     for token in iter_tokens(typ, typer=typer):
         for token_type, do_translate in translation_map.items():
             if isinstance(token, token_type):
@@ -93,5 +105,263 @@ def translate_tokens_to_graphql(
             raise ValueError(f'Unhandled token: {token}')
 
 
+class FragmentAttribute(NamedTuple):
+    wire_name: str
+    # selection set of a compound attribute, None for scalars
+    fragment: Optional['TypeFragment']
+
+
+class TypeFragment(NamedTuple):
+    """ Precomputed selection set of a type.
+    """
+    python_name: str
+    attributes: Tuple[FragmentAttribute, ...]
+    # wire names of all attributes of the type and its nested types
+    wire_names: FrozenSet[str]
+    # the selection set without any bindings
+    text: str
+    python_type: Any = None
+
+
+class _Frame:
+    __slots__ = ('python_type', 'python_name', 'attributes', 'pending_name', 'pending_type', 'child')
+
+    def __init__(self, python_type: Any, python_name: str) -> None:
+        self.python_type = python_type
+        self.python_name = python_name
+        self.attributes: List[FragmentAttribute] = []
+        self.pending_name = ''
+        self.pending_type: Any = None
+        self.child: Optional[TypeFragment] = None
+
+
+# Fragments are keyed by (type, is_nested) for every typer, because the tokenizer
+# may describe nested types differently from the topmost one.
+_fragments: 'WeakKeyDictionary[_TypeConstructor, Dict[Tuple[Any, bool], TypeFragment]]' = WeakKeyDictionary()
+
+
+def _mk_fragment(frame: _Frame) -> TypeFragment:
+    attributes = tuple(frame.attributes)
+    wire_names = frozenset(chain(
+        (x.wire_name for x in attributes),
+        chain.from_iterable(x.fragment.wire_names for x in attributes if x.fragment is not None),
+    ))
+    return TypeFragment(python_name=frame.python_name,
+                        attributes=attributes,
+                        wire_names=wire_names,
+                        text=_render_body(attributes, {}),
+                        python_type=frame.python_type)
+
+
+def type_fragment(typ: Type[Any], typer: _TypeConstructor) -> TypeFragment:
+    """ Returns a precomputed selection set of the topmost query type. Fragments of nested types
+    are collected from the same single pass over the token stream and reused by other queries that share them.
+    """
+    try:
+        fragments = _fragments[typer]
+    except KeyError:
+        fragments = _fragments.setdefault(typer, {})
+    try:
+        return fragments[(typ, False)]
+    except KeyError:
+        pass
+
+    stack: List[_Frame] = []
+    result: Optional[TypeFragment] = None
+
+    def begin_type(token: BeginType) -> None:
+        if stack:
+            parent = stack[-1]
+            inner, _ = unwrap_optional(parent.pending_type)
+            stack.append(_Frame(sequence_item(inner) or inner, token.python_name))
+        else:
+            stack.append(_Frame(typ, token.python_name))
+
+    def end_type(token: EndType) -> None:
+        nonlocal result
+        frame = stack.pop()
+        key = (frame.python_type, bool(stack))
+        try:
+            fragment = fragments[key]
+        except KeyError:
+            fragment = fragments.setdefault(key, _mk_fragment(frame))
+        if stack:
+            stack[-1].child = fragment
+        else:
+            result = fragment
+
+    def begin_attribute(token: BeginAttribute) -> None:
+        frame = stack[-1]
+        frame.pending_name = token.wire_name
+        frame.pending_type = token.python_type
+        frame.child = None
+
+    def end_attribute(token: EndAttribute) -> None:
+        frame = stack[-1]
+        frame.attributes.append(FragmentAttribute(wire_name=frame.pending_name, fragment=frame.child))
+
+    dispatch: Mapping[Any, Callable[[Any], None]] = {
+        BeginType: begin_type,
+        EndType: end_type,
+        BeginAttribute: begin_attribute,
+        EndAttribute: end_attribute,
+    }
+    # the tokenizer constructs unknown types without the typer lock
+    type_schema(typer, typ)
+    for token in iter_tokens(typ, typer=typer):
+        try:
+            handler = dispatch[token.__class__]
+        except KeyError:
+            raise ValueError(f'Unhandled token: {token}')
+        handler(token)
+
+    assert result is not None
+    return result
+
+
+def _render_body(attributes: Tuple[FragmentAttribute, ...], bindings: Mapping[Any, Any]) -> str:
+    out: List[str] = []
+    _write_body(out, attributes, bindings)
+    return ''.join(out)
+
+
+def _write_body(out: List[str],
+                attributes: Tuple[FragmentAttribute, ...],
+                bindings: Mapping[Any, Any],
+                alias_prefix: str = '',
+                spreads: Optional[Mapping[Any, str]] = None) -> None:
+    write = out.append
+    write('{')
+    previous_is_scalar = False
+    for attr in attributes:
+        # subsequent attributes are separated with a space, unless the previous one
+        # ends with a curly brace, as in "previous_attribute{...}current_attribute"
+        if previous_is_scalar:
+            write(' ')
+        if alias_prefix:
+            write(f'{alias_prefix}{attr.wire_name}:')
+        write(attr.wire_name)
+        try:
+            vars = bindings[attr.wire_name]
+        except KeyError:
+            pass
+        else:
+            expr = ','.join(f'{v.input_attr_name}:${v.attr_name}' for v in vars)
+            if expr:
+                write(f'({expr})')
+
+        fragment = attr.fragment
+        if fragment is None:
+            previous_is_scalar = True
+            continue
+        previous_is_scalar = False
+        if spreads:
+            try:
+                write(f'{{...{spreads[fragment.python_type]}}}')
+            except KeyError:
+                _write_body(out, fragment.attributes, bindings, spreads=spreads)
+        elif bindings and not fragment.wire_names.isdisjoint(bindings):
+            _write_body(out, fragment.attributes, bindings)
+        else:
+            write(fragment.text)
+    write('}')
+
+
+def translate_selection(typ: Type[Any],
+                        bindings: Mapping[Any, Any],
+                        typer: _TypeConstructor,
+                        alias_prefix: str = '') -> str:
+    """ Translates a query type into a selection set, the topmost fields
+    may be aliased with a common prefix.
+    """
+    fragment = type_fragment(typ, typer)
+    if not alias_prefix and not (bindings and not fragment.wire_names.isdisjoint(bindings)):
+        return fragment.text
+    out: List[str] = []
+    _write_body(out, fragment.attributes, bindings, alias_prefix)
+    return ''.join(out)
+
+
+def translate_variables(bindings: Mapping[Any, Any]) -> str:
+    """ Translates bindings into a declaration of operation variables.
+    """
+    if not bindings:
+        return ''
+    return f'({_declare_variables(bindings)})'
+
+
 def translate(typ: Type[Any], bindings: Mapping[Any, Any], typer: _TypeConstructor) -> str:
-    return ''.join(translate_tokens_to_graphql(typ, bindings, typer))
+    """ Translates a query type into the body of a GraphQL query.
+
+    The output is identical to the one of ``translate_tokens_to_graphql``, however the tokenizer
+    runs only once per type, subsequent translations are assembled from precomputed fragments.
+    """
+    fragment = type_fragment(typ, typer)
+    out: List[str] = [fragment.python_name, translate_variables(bindings)]
+    if bindings and not fragment.wire_names.isdisjoint(bindings):
+        _write_body(out, fragment.attributes, bindings)
+    else:
+        out.append(fragment.text)
+    return ''.join(out)
+
+
+def _extract_fragments(root: TypeFragment) -> Dict[Any, TypeFragment]:
+    """ Selects nested types that are worth extracting into named fragments.
+
+    Every distinct selection set is visited once, therefore a type that is referenced only once
+    is inlined into the single place where it's rendered, whether it's the operation or another fragment.
+    """
+    refs: Dict[Any, int] = {}
+    distinct: Dict[Any, TypeFragment] = {}
+
+    def walk(fragment: TypeFragment) -> None:
+        for attr in fragment.attributes:
+            child = attr.fragment
+            if child is None:
+                continue
+            if child.python_type in refs:
+                refs[child.python_type] += 1
+            else:
+                refs[child.python_type] = 1
+                distinct[child.python_type] = child
+                walk(child)
+
+    walk(root)
+    rv = {}
+    for key, fragment in distinct.items():
+        n = refs[key]
+        # "...Name" in place of every occurrence and "fragment Name on Name" once
+        spread_size = n * (len(fragment.python_name) + 3) + 2 * len(fragment.python_name) + 14
+        if n > 1 and n * len(fragment.text) > spread_size + len(fragment.text):
+            rv[key] = fragment
+    return rv
+
+
+def translate_with_fragments(typ: Type[Any], bindings: Mapping[Any, Any], typer: _TypeConstructor) -> str:
+    """ Same as ``translate``, but selection sets of types that occur more than once in the query tree
+    are emitted as named fragment definitions that follow the operation.
+
+    Type conditions of fragments are the names of the Python types, hence the names should match the schema.
+    """
+    fragment = type_fragment(typ, typer)
+    extracted = _extract_fragments(fragment)
+    if not extracted:
+        return translate(typ, bindings, typer)
+
+    spreads: Dict[Any, str] = {}
+    taken = set()
+    for key, x in extracted.items():
+        name = x.python_name
+        n = 1
+        while name in taken:
+            n += 1
+            name = f'{x.python_name}{n}'
+        taken.add(name)
+        spreads[key] = name
+
+    out: List[str] = [fragment.python_name, translate_variables(bindings)]
+    _write_body(out, fragment.attributes, bindings, spreads=spreads)
+    for key, x in extracted.items():
+        out.append(f' fragment {spreads[key]} on {x.python_name}')
+        _write_body(out, x.attributes, bindings, spreads=spreads)
+    return ''.join(out)
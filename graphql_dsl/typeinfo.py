@@ -0,0 +1,133 @@
+""" Introspection helpers that describe user-defined query types in the same terms
+that the type constructor uses for (de)serialization.
+"""
+import collections.abc
+import inspect
+import types
+import threading
+from dataclasses import is_dataclass
+from typing import NamedTuple, Type, Any, Tuple, Optional, Union, get_type_hints, get_origin, get_args
+
+from typeit.combinator.constructor import _TypeConstructor
+from weakref import WeakKeyDictionary
+
+from .sync import after_fork_in_child
+
+
+__all__ = (
+    'NO_DEFAULT',
+    'FieldInfo',
+    'construct',
+    'type_schema',
+    'struct_fields',
+    'is_structure',
+    'unwrap_optional',
+    'sequence_item',
+)
+
+
+NO_DEFAULT = inspect.Parameter.empty
+
+
+class FieldInfo(NamedTuple):
+    python_name: str
+    wire_name: str
+    python_type: Any
+    default: Any = NO_DEFAULT
+
+
+def is_structure(typ: Any) -> bool:
+    """ NamedTuples and dataclasses are the only structures that queries are composed of.
+    """
+    return isinstance(typ, type) and (hasattr(typ, '_fields') or is_dataclass(typ))
+
+
+def unwrap_optional(typ: Any) -> Tuple[Any, bool]:
+    """ Optional[X] => (X, True), X => (X, False)
+    """
+    if get_origin(typ) in _UNION_ORIGINS:
+        args = get_args(typ)
+        inner = [x for x in args if x is not type(None)]
+        if len(inner) == 1 and len(args) == 2:
+            return inner[0], True
+    return typ, False
+
+
+_UNION_ORIGINS = frozenset([Union, getattr(types, 'UnionType', Union)])
+_SEQUENCE_ORIGINS = frozenset([list, collections.abc.Sequence])
+
+
+def sequence_item(typ: Any) -> Optional[Any]:
+    """ Sequence[X] and List[X] => X, anything else => None
+    """
+    if get_origin(typ) in _SEQUENCE_ORIGINS:
+        args = get_args(typ)
+        if len(args) == 1:
+            return args[0]
+    return None
+
+
+# The memo of a typer is a persistent map that the typer replaces after constructing a type, therefore
+# it's safe to read without locking. Constructions are serialized, so that concurrent ones don't discard
+# each other's additions to the memo.
+_typer_locks: 'WeakKeyDictionary[_TypeConstructor, threading.RLock]' = WeakKeyDictionary()
+_typer_locks_lock = threading.Lock()
+
+
+@after_fork_in_child
+def _reset_typer_locks() -> None:
+    global _typer_locks_lock
+    _typer_locks_lock = threading.Lock()
+    _typer_locks.clear()
+
+
+def _typer_lock(typer: _TypeConstructor) -> 'threading.RLock':
+    try:
+        return _typer_locks[typer]
+    except KeyError:
+        with _typer_locks_lock:
+            return _typer_locks.setdefault(typer, threading.RLock())
+
+
+def construct(typer: _TypeConstructor, typ: Any) -> Tuple[Any, Any]:
+    """ Thread-safe ``typer ^ typ``, returns the constructor and the serializer of a type.
+    """
+    with _typer_lock(typer):
+        return typer ^ typ
+
+
+def type_schema(typer: _TypeConstructor, typ: Any) -> Any:
+    """ Returns the memoized schema node of a type, the type is constructed first if it isn't memoized yet.
+    Anything that reads the memo, e.g. ``typeit.tokenizer.iter_tokens``, should go through it.
+    """
+    try:
+        return typer.memo[typ]
+    except KeyError:
+        with _typer_lock(typer):
+            _ = typer ^ typ
+            return typer.memo[typ]
+
+
+def struct_fields(typ: Type[Any], typer: _TypeConstructor) -> Tuple[FieldInfo, ...]:
+    """ Lists the fields of a structure in their declaration order, together with the names
+    that the typer assigns to them on the wire.
+    """
+    schema = type_schema(typer, typ)
+    structure = schema.typ
+    hints = get_type_hints(typ)
+    # the same source of defaults that the typer relies on
+    defaults_source = typ.__new__ if hasattr(typ, '_fields') else typ.__init__
+    defaults = {
+        k: v.default
+        for k, v in inspect.signature(defaults_source).parameters.items()
+        if k != 'self' and v.default is not NO_DEFAULT
+    }
+    rv = []
+    for attr_node in schema.children:
+        wire_name = attr_node.name
+        python_name = structure.deserialize_overrides.get(wire_name, wire_name)
+        rv.append(FieldInfo(python_name=python_name,
+                            wire_name=wire_name,
+                            python_type=hints[python_name],
+                            default=defaults.get(python_name, NO_DEFAULT)))
+    return tuple(rv)
@@ -1,11 +1,9 @@
 import typeit
 
+from .scalars import ID, GQL_SCALARS
 
-__all__ = ('NewIDType', 'ID')
 
-
-class ID(str):
-    pass
+__all__ = ('NewIDType', 'ID', 'GQL_SCALARS')
 
 
 class IDSchema(typeit.schema.primitives.Str):
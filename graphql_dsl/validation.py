@@ -0,0 +1,181 @@
+""" Offline validation of queries against a schema.
+
+The schema is indexed once, queries are checked by walking their precomputed selection sets
+alongside the index, which is much cheaper than parsing and validating the text of every query.
+"""
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Set, Tuple, Union
+
+import graphql
+
+from .errors import ValidationError
+from .parser import Schema
+from .translator import TypeFragment
+
+
+__all__ = (
+    'SchemaIndex',
+    'schema_index',
+)
+
+
+class TypeRef(NamedTuple):
+    """ A reference to a named type, e.g. [Issue!]! is TypeRef('Issue', non_null=True, list_depth=1)
+    """
+    name: str
+    non_null: bool
+    list_depth: int
+    # printed as in the schema
+    text: str
+
+
+class ArgumentDef(NamedTuple):
+    type: TypeRef
+    has_default: bool
+
+
+class FieldDef(NamedTuple):
+    type: TypeRef
+    arguments: Mapping[str, ArgumentDef]
+
+
+class TypeDef(NamedTuple):
+    # graphql-core kind of the definition, e.g. object_type_definition
+    kind: str
+    fields: Mapping[str, FieldDef]
+
+
+_LEAF_KINDS = frozenset({'scalar_type_definition', 'enum_type_definition'})
+_INPUT_KINDS = _LEAF_KINDS | {'input_object_type_definition'}
+_BUILTIN_SCALARS = ('String', 'Int', 'Float', 'Boolean', 'ID')
+
+
+def _type_ref(node: graphql.TypeNode) -> TypeRef:
+    non_null = isinstance(node, graphql.NonNullTypeNode)
+    if non_null:
+        node = node.type
+    if isinstance(node, graphql.ListTypeNode):
+        inner = _type_ref(node.type)
+        return TypeRef(inner.name, non_null, inner.list_depth + 1, f'[{inner.text}]{"!" if non_null else ""}')
+    name = node.name.value
+    return TypeRef(name, non_null, 0, f'{name}{"!" if non_null else ""}')
+
+
+class SchemaIndex:
+    """ Types of a schema and their fields, with a memo of the selection sets
+    that have been validated already.
+    """
+    def __init__(self, document: graphql.DocumentNode) -> None:
+        self.types: Dict[str, TypeDef] = {x: TypeDef('scalar_type_definition', {}) for x in _BUILTIN_SCALARS}
+        self.roots: Dict[str, str] = {'query': 'Query', 'mutation': 'Mutation'}
+        extensions = []
+        for definition in document.definitions:
+            if isinstance(definition, graphql.SchemaDefinitionNode):
+                for op in definition.operation_types:
+                    self.roots[op.operation.value] = op.type.name.value
+            elif isinstance(definition, graphql.TypeExtensionNode):
+                extensions.append(definition)
+            elif isinstance(definition, graphql.TypeDefinitionNode):
+                self.types[definition.name.value] = TypeDef(definition.kind, self._fields(definition))
+        for extension in extensions:
+            existing = self.types.get(extension.name.value)
+            if existing is not None:
+                existing.fields.update(self._fields(extension))
+        # (python type, schema type) pairs whose selection sets are valid
+        self._valid: Set[Tuple[Any, str]] = set()
+
+    @staticmethod
+    def _fields(definition: Any) -> Dict[str, FieldDef]:
+        return {
+            x.name.value: FieldDef(
+                type=_type_ref(x.type),
+                arguments={
+                    a.name.value: ArgumentDef(_type_ref(a.type), a.default_value is not None)
+                    for a in getattr(x, 'arguments', None) or ()
+                },
+            )
+            for x in getattr(definition, 'fields', None) or ()
+        }
+
+    def validate(self,
+                 operation: str,
+                 fragment: TypeFragment,
+                 bindings: Mapping[str, Iterable[Any]]) -> None:
+        """ Checks the selection set of an operation, and the variables that are bound to its fields.
+        Raises ``ValidationError`` with all the problems that were found.
+        """
+        errors: List[str] = []
+        root = self.roots.get(operation)
+        if root is None or root not in self.types:
+            errors.append(f'The schema has no {operation} type')
+        else:
+            self._walk(fragment, root, bindings, fragment.python_name, errors)
+        if errors:
+            raise ValidationError(fragment.python_name, tuple(errors))
+
+    def _walk(self,
+              fragment: TypeFragment,
+              type_name: str,
+              bindings: Mapping[str, Iterable[Any]],
+              path: str,
+              errors: List[str]) -> None:
+        key = (fragment.python_type, type_name)
+        bound = bool(bindings) and not fragment.wire_names.isdisjoint(bindings)
+        if key in self._valid and not bound:
+            return
+        typ = self.types[type_name]
+        n_errors = len(errors)
+        for attr in fragment.attributes:
+            attr_path = f'{path}.{attr.wire_name}'
+            field = typ.fields.get(attr.wire_name)
+            if field is None:
+                errors.append(f'{attr_path}: type {type_name} has no field "{attr.wire_name}"')
+                continue
+            self._check_arguments(field, bindings.get(attr.wire_name, ()), attr_path, errors)
+            field_type = self.types.get(field.type.name)
+            if field_type is None:
+                errors.append(f'{attr_path}: unknown type {field.type.name}')
+            elif field_type.kind in _LEAF_KINDS:
+                if attr.fragment is not None:
+                    errors.append(f'{attr_path}: {field.type.text} has no fields to select')
+            elif attr.fragment is None:
+                errors.append(f'{attr_path}: {field.type.text} requires a selection of fields')
+            else:
+                self._walk(attr.fragment, field.type.name, bindings, attr_path, errors)
+        if len(errors) == n_errors and not bound:
+            self._valid.add(key)
+
+    def _check_arguments(self, field: FieldDef, bound: Iterable[Any], path: str, errors: List[str]) -> None:
+        names = set()
+        for binding in bound:
+            names.add(binding.input_attr_name)
+            arg = field.arguments.get(binding.input_attr_name)
+            if arg is None:
+                errors.append(f'{path}: no argument "{binding.input_attr_name}"')
+                continue
+            var_type = f'{binding.type_name}{"" if binding.is_optional else "!"}'
+            var_def = self.types.get(binding.type_name)
+            if var_def is None or var_def.kind not in _INPUT_KINDS:
+                errors.append(f'{path}: ${binding.attr_name} is of type {var_type}, which is not an input type')
+            elif arg.type.name != binding.type_name or arg.type.list_depth:
+                errors.append(f'{path}: ${binding.attr_name} of type {var_type} '
+                              f'cannot be passed to "{binding.input_attr_name}" of type {arg.type.text}')
+            elif arg.type.non_null and binding.is_optional and not arg.has_default:
+                errors.append(f'{path}: ${binding.attr_name} is optional, '
+                              f'but "{binding.input_attr_name}" is of type {arg.type.text}')
+        for name, arg in field.arguments.items():
+            if arg.type.non_null and not arg.has_default and name not in names:
+                errors.append(f'{path}: the required argument "{name}" is not bound')
+
+
+_indexes: Dict[str, SchemaIndex] = {}
+
+
+def schema_index(schema: Union[Schema, graphql.DocumentNode]) -> SchemaIndex:
+    """ Returns an index of a schema, cached schemas are indexed only once per process.
+    """
+    if not isinstance(schema, Schema):
+        return SchemaIndex(schema)
+    try:
+        return _indexes[schema.sha256]
+    except KeyError:
+        return _indexes.setdefault(schema.sha256, SchemaIndex(schema.document()))
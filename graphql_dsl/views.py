@@ -0,0 +1,53 @@
+""" Runtime support of lazy result views, see ``ResultDecoding.LAZY``.
+
+Views are generated by ``graphql_dsl.compiler.Emitter``, this module holds the parts that don't depend
+on the types of a query.
+"""
+from collections.abc import Sequence
+from typing import Any, Callable, List, Optional, Union, overload
+
+
+__all__ = (
+    'ViewSequence',
+)
+
+
+class ViewSequence(Sequence):
+    """ A sequence of raw objects of a response that wraps every element into a view on first access.
+    """
+    __slots__ = ('_view', '_items', '_views')
+
+    def __init__(self, view: Callable[[Any], Any], items: List[Any]) -> None:
+        self._view = view
+        self._items = items
+        self._views: List[Optional[Any]] = [None] * len(items)
+
+    @overload
+    def __getitem__(self, index: int) -> Any: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Any]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self[n] for n in range(*index.indices(len(self._items)))]
+        view = self._views[index]
+        if view is None:
+            item = self._items[index]
+            view = self._views[index] = None if item is None else self._view(item)
+        return view
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Any:
+        for n in range(len(self._items)):
+            yield self[n]
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Sequence):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'ViewSequence({list(self)!r})'
@@ -51,6 +51,10 @@ setup(name='graphql-dsl',
       test_suite='tests',
       tests_require=['pytest', 'coverage'],
       install_requires=requires,
+      extras_require={
+          # NumPy arrays of columnar results
+          'numpy': ['numpy'],
+      },
       entry_points={
           'console_scripts': [
               'graphql-dsl = graphql_dsl.cli:main'
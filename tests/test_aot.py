@@ -0,0 +1,120 @@
+import io
+import json
+from enum import Enum
+from types import ModuleType
+from typing import NamedTuple, Sequence, Optional
+
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.aot import compile_module
+from graphql_dsl.cli import main
+from graphql_dsl.compiler import DecodingError
+
+
+class State(Enum):
+    OPEN = 'OPEN'
+    CLOSED = 'CLOSED'
+
+
+class Node(NamedTuple):
+    id: ID
+    number: int
+    title: str
+    state: str
+    comments: int = 0
+
+
+class PageInfo(NamedTuple):
+    has_next_page: bool
+    end_cursor: str
+
+
+class Issues(NamedTuple):
+    nodes: Sequence[Node]
+    page_info: PageInfo
+
+
+class Repository(NamedTuple):
+    issues: Issues
+
+
+class ListIssues(NamedTuple):
+    repository: Repository
+
+
+class Input(NamedTuple):
+    owner: str
+    repo_name: str
+    states: Sequence[State]
+    after: Optional[str] = None
+
+
+LIST_ISSUES = GQL( QUERY | ListIssues
+                 | WITH  | Input
+                 | PASS  | Input.owner     * TO * ListIssues.repository
+                         & Input.repo_name * TO * ListIssues.repository * AS * 'name'
+                         & Input.states    * TO * Repository.issues
+                         & Input.after     * TO * Repository.issues )
+
+
+RESPONSE = {'data': {'repository': {'issues': {
+    'nodes': [
+        {'id': 'MDU6', 'number': 1, 'title': 'First', 'state': 'OPEN', 'comments': 3},
+        {'id': 'MDU7', 'number': 2, 'title': 'Second', 'state': 'CLOSED'},
+    ],
+    'pageInfo': {'hasNextPage': False, 'endCursor': 'Y3Vy'},
+}}}}
+
+
+def load_compiled() -> ModuleType:
+    module = ModuleType('compiled_queries')
+    exec(compile_module(__name__), module.__dict__)
+    return module
+
+
+def test_compiled_module_matches_runtime_query():
+    compiled = load_compiled()
+    assert compiled.__all__ == ('LIST_ISSUES',)
+    q = compiled.LIST_ISSUES
+    assert q.query == LIST_ISSUES.query
+    assert q.name == LIST_ISSUES.name
+
+    result = q.get_result(RESPONSE)
+    assert result == LIST_ISSUES.get_result(RESPONSE)
+    assert isinstance(result.repository.issues.nodes[0].id, ID)
+
+    query_input = Input(owner='avanov', repo_name='graphql-dsl', states=[State.OPEN])
+    assert q.request_payload(query_input) == LIST_ISSUES.request_payload(query_input)
+
+
+def test_compiled_module_rejects_malformed_results():
+    compiled = load_compiled()
+    with pytest.raises(DecodingError):
+        compiled.LIST_ISSUES.get_result({'data': {'repository': None}})
+    with pytest.raises(DecodingError):
+        compiled.LIST_ISSUES.get_result({'data': {'repository': {'issues': {'nodes': [], 'pageInfo': {}}}}})
+
+
+def test_compile_command(tmp_path):
+    target = tmp_path / 'compiled.py'
+    out = io.StringIO()
+    main(['compile', '-m', __name__, '-o', str(target)], out_channel=out)
+    assert target.read_text() == compile_module(__name__)
+    with pytest.raises(FileExistsError):
+        main(['compile', '-m', __name__, '-o', str(target)], out_channel=out)
+
+
+def test_compiled_queries_keep_their_hashes(tmp_path):
+    compiled = load_compiled()
+    assert compiled.LIST_ISSUES.sha256 == LIST_ISSUES.sha256
+
+    target = tmp_path / 'manifest.json'
+    main(['compile', '-m', __name__, '-M', str(target)], out_channel=io.StringIO())
+    assert json.loads(target.read_text()) == {LIST_ISSUES.sha256: LIST_ISSUES.query}
+
+
+def test_compiled_module_lists_wire_names():
+    compiled = load_compiled()
+    assert compiled.__wire_names__['repo_name'] == 'repoName'
+    assert compiled.__wire_names__['page_info'] == 'pageInfo'
@@ -0,0 +1,81 @@
+from typing import NamedTuple, Sequence
+
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.dsl import GraphQLBatch, GraphQLQueryConstructor
+from graphql_dsl.cache import QueryCache
+
+
+class Node(NamedTuple):
+    number: int
+
+
+class Issues(NamedTuple):
+    nodes: Sequence[Node]
+
+
+class Repository(NamedTuple):
+    issues: Issues
+
+
+class ListIssues(NamedTuple):
+    repository: Repository
+
+
+class Viewer(NamedTuple):
+    login: str
+
+
+class GetViewer(NamedTuple):
+    viewer: Viewer
+
+
+class Input(NamedTuple):
+    owner: str
+    num_first: int
+
+
+LIST_ISSUES = ( QUERY | ListIssues
+              | WITH  | Input
+              | PASS  | Input.owner * TO * ListIssues.repository
+                      & Input.num_first * TO * Repository.issues * AS * 'first' )
+
+
+def test_batch_document():
+    batch = GQL.batch(LIST_ISSUES, QUERY | GetViewer, LIST_ISSUES)
+    assert isinstance(batch, GraphQLBatch)
+    assert batch.query == (
+        'query Batch($q0_owner:String!,$q0_numFirst:Int!,$q2_owner:String!,$q2_numFirst:Int!)'
+        '{q0_repository:repository(owner:$q0_owner){issues(first:$q0_numFirst){nodes{number}}} '
+        'q1_viewer:viewer{login} '
+        'q2_repository:repository(owner:$q2_owner){issues(first:$q2_numFirst){nodes{number}}}}'
+    )
+    payload = batch.request_payload(Input(owner='a', num_first=1), None, Input(owner='b', num_first=2))
+    assert payload['operationName'] == 'Batch'
+    assert payload['variables'] == {'q0_owner': 'a', 'q0_numFirst': 1, 'q2_owner': 'b', 'q2_numFirst': 2}
+
+    issues, viewer, other_issues = batch.get_result({'data': {
+        'q0_repository': {'issues': {'nodes': [{'number': 1}]}},
+        'q1_viewer': {'login': 'x'},
+        'q2_repository': {'issues': {'nodes': []}},
+    }})
+    assert issues == ListIssues(repository=Repository(issues=Issues(nodes=[Node(number=1)])))
+    assert viewer == GetViewer(viewer=Viewer(login='x'))
+    assert other_issues.repository.issues.nodes == []
+
+
+def test_batch_combinator_is_cached():
+    constructor = GraphQLQueryConstructor(cache=QueryCache())
+    batch = constructor((QUERY | GetViewer) & LIST_ISSUES)
+    assert batch.query.startswith('query Batch($q1_owner:String!,$q1_numFirst:Int!){q0_viewer:viewer{login} ')
+    assert constructor.batch(QUERY | GetViewer, LIST_ISSUES) is batch
+    # member queries are compiled and cached as usual
+    assert batch.queries[1] is constructor(LIST_ISSUES)
+
+
+def test_batch_rejects_mixed_operations():
+    with pytest.raises(ValueError):
+        GQL.batch(QUERY | GetViewer, MUTATE | GetViewer)
+    with pytest.raises(ValueError):
+        GQL.batch()
@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from typing import NamedTuple, Sequence
+
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.dsl import AttrNotFound, _DefaultTyper
+from graphql_dsl.index import field_index
+
+
+class Node(NamedTuple):
+    number: int
+
+
+class Issues(NamedTuple):
+    nodes: Sequence[Node]
+
+
+class Repository(NamedTuple):
+    issues: Issues
+
+
+class ListIssues(NamedTuple):
+    repository: Repository
+
+
+class Input(NamedTuple):
+    num_first: int
+
+
+def test_nested_binding_is_resolved_via_index():
+    q = GQL( QUERY | ListIssues
+           | WITH  | Input
+           | PASS  | Input.num_first * TO * Repository.issues * AS * 'first' )
+    assert q.query == 'query ListIssues($numFirst:Int!){repository{issues(first:$numFirst){nodes{number}}}}'
+
+    index = field_index(_DefaultTyper)
+    assert index.register_tree(ListIssues) == {ListIssues, Repository, Issues, Node}
+    field = index.find(ListIssues, Repository.issues)
+    assert (field.owner, field.python_name, field.wire_name) == (Repository, 'issues', 'issues')
+    assert index.find(ListIssues, Input.num_first) is None
+
+
+def test_nested_dataclass_binding():
+    @dataclass
+    class Droid:
+        name: str
+
+    @dataclass
+    class Episode:
+        droid: Droid
+
+    @dataclass
+    class Show:
+        episode: Episode
+
+    @dataclass
+    class Input:
+        droid_id: ID
+
+    q = GQL( QUERY | Show
+           | WITH  | Input
+           | PASS  | (Input, 'droid_id') * TO * (Episode, 'droid') * AS * 'id' )
+    assert q.query == 'query Show($droidId:ID!){episode{droid(id:$droidId){name}}}'
+
+
+def test_binding_outside_of_query_tree():
+    class Unrelated(NamedTuple):
+        repository: str
+
+    with pytest.raises(AttrNotFound):
+        GQL( QUERY | ListIssues
+           | WITH  | Input
+           | PASS  | Input.num_first * TO * Unrelated.repository )
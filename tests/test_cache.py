@@ -0,0 +1,113 @@
+import os
+from typing import NamedTuple
+
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.cache import QueryCache
+from graphql_dsl.dsl import GraphQLQueryConstructor
+from graphql_dsl.types import NewIDType
+
+
+class Droid(NamedTuple):
+    name: str
+
+
+class Input(NamedTuple):
+    droid_id: ID
+
+
+class DroidById(NamedTuple):
+    droid: Droid
+
+
+def mk_expr():
+    return ( QUERY | DroidById
+           | WITH  | Input
+           | PASS  | Input.droid_id * TO * DroidById.droid * AS * 'id' )
+
+
+def test_same_instance_on_hit():
+    constructor = GraphQLQueryConstructor(cache=QueryCache())
+    q1 = constructor(mk_expr())
+    q2 = constructor(mk_expr())
+    assert q1 is q2
+    info = constructor.cache.info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+
+
+def test_lru_eviction():
+    class Other(NamedTuple):
+        droid: Droid
+
+    constructor = GraphQLQueryConstructor(cache=QueryCache(maxsize=1))
+    q1 = constructor(mk_expr())
+    constructor(QUERY | Other)
+    assert len(constructor.cache) == 1
+    q2 = constructor(mk_expr())
+    assert q1 is not q2
+    assert q1.query == q2.query
+    assert constructor.cache.info().misses == 3
+
+
+def test_derived_constructors_do_not_share_entries():
+    cache = QueryCache()
+    constructor = GraphQLQueryConstructor(cache=cache)
+    derived = constructor._replace(typer=constructor.typer & {DroidById.droid: 'robot'})
+    assert constructor(mk_expr()).query != derived(mk_expr()).query
+    assert cache.info().misses == 2
+
+
+def test_concurrent_compilation_with_a_fresh_typer():
+    from concurrent.futures import ThreadPoolExecutor
+    from typeit import TypeConstructor
+
+    types = [NamedTuple(f'Query{n}', [('droid', Droid), (f'count{n}', int)]) for n in range(32)]
+    constructor = GraphQLQueryConstructor(typer=TypeConstructor & NewIDType, cache=QueryCache())
+    with ThreadPoolExecutor(8) as pool:
+        queries = list(pool.map(lambda t: constructor(QUERY | t), types))
+    assert [q.name for q in queries] == [t.__name__ for t in types]
+    for typ in types:
+        assert typ in constructor.typer.memo
+
+
+def test_warm():
+    import gc
+
+    constructor = GraphQLQueryConstructor(cache=QueryCache())
+    frozen = gc.get_freeze_count()
+    q, = constructor.warm([mk_expr()])
+    # the process is frozen only on request
+    assert gc.get_freeze_count() == frozen
+    assert constructor(mk_expr()) is q
+    assert constructor.cache.info().hits == 1
+    try:
+        constructor.warm([mk_expr()], freeze=True)
+        assert gc.get_freeze_count() > frozen
+    finally:
+        gc.unfreeze()
+
+
+def test_warm_beyond_cache_size():
+    class Other(NamedTuple):
+        droid: Droid
+
+    constructor = GraphQLQueryConstructor(cache=QueryCache(maxsize=1))
+    with pytest.raises(ValueError):
+        constructor.warm([mk_expr(), QUERY | Other])
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='os.fork() is not available')
+def test_cache_is_usable_after_fork():
+    constructor = GraphQLQueryConstructor(cache=QueryCache())
+    q, = constructor.warm([mk_expr()])
+    # a fork while another thread holds the lock
+    constructor.cache._lock.acquire()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if constructor(mk_expr()) is q else 1)
+    finally:
+        constructor.cache._lock.release()
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
@@ -0,0 +1,192 @@
+import importlib
+import io
+import sys
+from typing import get_type_hints, Optional, Sequence
+
+import graphql
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.cli import main
+from graphql_dsl.codegen import generate
+from graphql_dsl.parser import load as load_schema, parse
+
+
+SCHEMA = '''
+scalar DateTime
+
+"""A repository"""
+type Repository implements Node {
+    id: ID!
+    name: String!
+    createdAt: DateTime
+    HTMLUrl: String
+    issues(first: Int): [Issue!]!
+}
+
+interface Node {
+    id: ID!
+}
+
+type Issue {
+    number: Int!
+    state: IssueState!
+}
+
+union SearchResult = Repository | Issue
+
+enum IssueState {
+    OPEN
+    CLOSED
+}
+
+input IssueFilter {
+    states: [IssueState!]
+    first: Int!
+}
+
+schema {
+    query: Repository
+}
+'''
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    return tmp_path / 'cache' / 'graphql-dsl'
+
+
+@pytest.fixture
+def load(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    def load(name):
+        for module in [x for x in sys.modules if x == name or x.startswith(f'{name}.')]:
+            del sys.modules[module]
+        importlib.invalidate_caches()
+        return importlib.import_module(name)
+    return load
+
+
+def test_generated_package(tmp_path, load):
+    report = generate(parse(SCHEMA), tmp_path / 'client')
+    assert report.types == 7
+    client = load('client')
+
+    assert get_type_hints(client.IssueFilter) == {'first': int, 'states': Optional[Sequence[client.IssueState]]}
+    assert client.IssueFilter(first=1).states is None
+    assert client.Repository.__doc__.strip() == 'A repository'
+    assert client.SCALARS['ID'] is ID
+    assert client.SCALARS['DateTime'].__supertype__ is str
+    assert client.IssueState('OPEN') is client.IssueState.OPEN
+    assert client.OVERRIDES == {client.Repository.html_url: 'HTMLUrl'}
+
+    mk_repo, _ = GQL.typer & client.OVERRIDES ^ client.Repository
+    repo = mk_repo({'id': 'R', 'name': 'n', 'createdAt': None, 'HTMLUrl': 'h',
+                    'issues': [{'number': 1, 'state': 'OPEN'}]})
+    assert repo.html_url == 'h'
+    assert repo.issues[0].state is client.IssueState.OPEN
+
+
+def _module_of(target, name):
+    return next(x.name for x in target.glob('_defs_*.py') if f'class {name}(' in x.read_text())
+
+
+def test_unchanged_definitions_are_not_rendered(tmp_path):
+    target = tmp_path / 'client'
+    first = generate(parse(SCHEMA), target)
+    assert first.rendered == 7
+    issue_module = _module_of(target, 'Issue')
+    assert issue_module in first.written
+
+    mtime = (target / issue_module).stat().st_mtime_ns
+    second = generate(parse(SCHEMA), target)
+    assert second.written == ()
+    assert second.rendered == 0
+    assert (target / issue_module).stat().st_mtime_ns == mtime
+
+    third = generate(parse(SCHEMA.replace('number: Int!', 'number: Int!\n    title: String')), target)
+    assert third.written == (issue_module,)
+    assert third.rendered == 1
+    assert 'title' in (target / issue_module).read_text()
+
+
+def test_parallel_rendering(tmp_path, load):
+    report = generate(parse(SCHEMA), tmp_path / 'client', modules=3, jobs=2, cache_path=':memory:')
+    assert report.rendered == 7
+    assert len(list((tmp_path / 'client').glob('_defs_*.py'))) <= 3
+    client = load('client')
+    assert get_type_hints(client.Repository)['issues'] == Sequence[client.Issue]
+
+
+def test_modified_files_require_force(tmp_path):
+    target = tmp_path / 'client'
+    generate(parse(SCHEMA), target)
+    module = _module_of(target, 'Repository')
+    (target / module).write_text('# edited by hand\n')
+    with pytest.raises(FileExistsError):
+        generate(parse(SCHEMA), target)
+    generate(parse(SCHEMA), target, force=True)
+    assert 'class Repository' in (target / module).read_text()
+
+    foreign = tmp_path / 'foreign'
+    foreign.mkdir()
+    (foreign / 'module.py').write_text('')
+    with pytest.raises(FileExistsError):
+        generate(parse(SCHEMA), foreign)
+
+
+def test_gen_command(tmp_path, cache_home):
+    source = tmp_path / 'schema.graphql'
+    source.write_text(SCHEMA)
+    out = io.StringIO()
+    main(['gen', '-s', str(source), '-o', str(tmp_path), '-n', 'client'], out_channel=out)
+    assert out.getvalue().startswith('Successfully generated 7 types')
+    assert (tmp_path / 'client' / '__init__.py').exists()
+    # caches are kept out of the package
+    assert {x.name for x in (tmp_path / 'client').iterdir() if x.name.startswith('.')} == {'.graphql-dsl.json'}
+    assert (cache_home / 'rendered.sqlite3').exists()
+    assert len(list(cache_home.glob('schema-*'))) == 1
+
+
+def test_schema_cache(tmp_path, load):
+    cache = tmp_path / 'schema.cache'
+    first = load_schema(SCHEMA, cache)
+    second = load_schema(SCHEMA, cache)
+    assert second.definitions == first.definitions
+    assert isinstance(second.encoded_ast, memoryview)
+    assert second.document() == graphql.parse(SCHEMA, no_location=True)
+    assert load_schema(SCHEMA + 'scalar URI', cache).definitions[-1].name == 'URI'
+
+    report = generate(second, tmp_path / 'client')
+    assert report.types == 7
+    assert generate(load_schema(SCHEMA, cache), tmp_path / 'client').rendered == 0
+    client = load('client')
+    assert client.OVERRIDES == {client.Repository.html_url: 'HTMLUrl'}
+
+
+def test_schema_cache_is_unmapped_on_close(tmp_path):
+    cache = tmp_path / 'schema.cache'
+    load_schema(SCHEMA, cache)
+    with load_schema(SCHEMA, cache) as schema:
+        assert schema.mapped is not None
+        schema.document()
+    assert schema.mapped.closed
+    assert schema.definitions[0].name
+    with pytest.raises(ValueError):
+        schema.document()
+    # schemas that were parsed rather than loaded have nothing to unmap
+    with load_schema(SCHEMA + 'scalar URI', cache) as parsed:
+        assert parsed.mapped is None
+    assert parsed.document().definitions[-1].name.value == 'URI'
+
+
+def test_schema_cache_decodes_slotted_nodes(tmp_path, monkeypatch):
+    from graphql_dsl.parser import cache
+
+    # graphql-core < 3.3 nodes have no instance dicts
+    monkeypatch.setattr(cache, '_HAS_DICT', (False,) * len(cache._NODE_CLASSES))
+    document = load_schema(SCHEMA, tmp_path / 'schema.cache').document()
+    assert document == graphql.parse(SCHEMA, no_location=True)
+    assert document.definitions[0].loc is None
@@ -0,0 +1,93 @@
+import json
+from array import array
+from enum import Enum
+from typing import NamedTuple, Optional, Sequence
+
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.columns import column_builder
+
+
+class State(Enum):
+    OPEN = 'OPEN'
+    CLOSED = 'CLOSED'
+
+
+class Author(NamedTuple):
+    login: str
+
+
+class Node(NamedTuple):
+    id: ID
+    number: int
+    author: Author
+    locked: bool = False
+
+
+class Issues(NamedTuple):
+    nodes: Sequence[Node]
+
+
+class ListIssues(NamedTuple):
+    issues: Issues
+
+
+ROWS = [
+    {'id': f'I{n}', 'number': n, 'author': {'login': f'user{n % 3}'}, 'locked': n == 3}
+    for n in range(5)
+]
+del ROWS[0]['locked']
+RESPONSE = {'data': {'issues': {'nodes': ROWS}}}
+
+
+def test_columns():
+    columns = GQL(QUERY | ListIssues).columns(RESPONSE, Issues.nodes)
+    assert list(columns) == ['id', 'number', 'author.login', 'locked']
+    assert columns['number'] == array('q', range(5))
+    assert list(columns['locked']) == [0, 0, 0, 1, 0]
+    assert isinstance(columns['id'][0], ID)
+    assert columns['author.login'][4] == 'user1'
+
+    streamed = GQL(QUERY | ListIssues).columns(json.dumps(RESPONSE).encode('utf-8'), ListIssues.issues, Issues.nodes)
+    assert streamed == columns
+
+
+class Row(NamedTuple):
+    number: Optional[int]
+    author: Optional[Author]
+    state: State
+    score: float
+
+
+ROWS_WITH_NULLS = [
+    {'number': None, 'author': {'login': 'a'}, 'state': 'OPEN', 'score': 0.5},
+    {'number': 1, 'state': 'CLOSED', 'score': 1},
+]
+
+
+def test_nullable_fields_are_collected_into_lists():
+    columns = column_builder(Row, GQL.typer).build(ROWS_WITH_NULLS)
+    assert columns == {
+        'number': [None, 1],
+        'author': [{'login': 'a'}, None],
+        'state': [State.OPEN, State.CLOSED],
+        'score': array('d', [0.5, 1]),
+    }
+
+
+def test_numpy():
+    np = pytest.importorskip('numpy')
+    columns = GQL(QUERY | ListIssues).columns(RESPONSE, Issues.nodes, numpy=True)
+    assert columns['number'].dtype == np.int64
+    assert columns['number'].sum() == 10
+    assert columns['locked'].dtype == np.bool_
+    assert columns['id'].dtype == object
+
+    columns = column_builder(Row, GQL.typer).build(ROWS_WITH_NULLS, numpy=True)
+    assert columns['score'].dtype == np.float64
+
+
+def test_not_a_sequence_of_structures():
+    with pytest.raises(TypeError):
+        GQL(QUERY | ListIssues).columns(RESPONSE, ListIssues.issues)
@@ -0,0 +1,58 @@
+from typing import NamedTuple, Sequence
+
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.cost import QueryCost
+from graphql_dsl.errors import CostLimitExceeded
+
+
+class Label(NamedTuple):
+    name: str
+
+
+class Node(NamedTuple):
+    number: int
+    labels: Sequence[Label]
+
+
+class Issues(NamedTuple):
+    total: int
+    nodes: Sequence[Node]
+
+
+class Repository(NamedTuple):
+    name: str
+    issues: Issues
+
+
+class RepoQuery(NamedTuple):
+    repository: Repository
+
+
+class Input(NamedTuple):
+    name: str
+    first: int = 10
+
+
+EXPR = ( QUERY | RepoQuery
+       | WITH  | Input
+       | PASS  | Input.name  * TO * RepoQuery.repository
+               & Input.first * TO * Repository.issues )
+
+
+def test_estimate():
+    # repository: 1, issues: 1, nodes: 10, labels: 10 * 100
+    gql = GQL._replace(cache=None)
+    assert gql(EXPR).cost == QueryCost(depth=5, fields=8, nodes=1012)
+    assert gql._replace(default_list_size=5)(EXPR).cost.nodes == 62
+    # without a bound page size, the connection is assumed to be as large as any list
+    assert gql(QUERY | RepoQuery).cost.nodes == 1 + 1 + 100 + 100 * 100
+
+
+def test_limit():
+    gql = GQL._replace(cache=None, cost_limit=1000)
+    with pytest.raises(CostLimitExceeded) as e:
+        gql(EXPR)
+    assert e.value.cost.nodes == 1012
+    assert gql._replace(default_list_size=5)(EXPR).cost.nodes == 62
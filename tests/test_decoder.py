@@ -0,0 +1,112 @@
+import json
+from typing import NamedTuple, Sequence, Mapping, Optional
+
+import pytest
+import typeit
+
+from graphql_dsl import *
+from graphql_dsl.decoder import ResultDecoding, compile_decoder, compile_view
+from graphql_dsl.dsl import GraphQLQueryConstructor
+
+
+class Node(NamedTuple):
+    id: ID
+    number: int
+    title: str
+    locked: bool = False
+
+
+class Issues(NamedTuple):
+    nodes: Sequence[Node]
+    total_count: int
+
+
+class ListIssues(NamedTuple):
+    issues: Issues
+
+
+RESPONSE = {'data': {'issues': {
+    'totalCount': 2,
+    'nodes': [
+        {'id': 'MDU6', 'number': 1, 'title': 'First', 'locked': True},
+        {'id': 'MDU7', 'number': 2, 'title': 'Second'},
+    ],
+}}}
+
+
+@pytest.mark.parametrize('decoding', [ResultDecoding.COMPILED, ResultDecoding.TRUSTED])
+def test_compiled_decoding_matches_typeit(decoding):
+    q = GraphQLQueryConstructor(decoding=decoding)(QUERY | ListIssues)
+    result = q.get_result(RESPONSE)
+    assert result == GQL(QUERY | ListIssues).get_result(RESPONSE)
+    assert isinstance(result.issues.nodes[0], Node)
+    assert isinstance(result.issues.nodes[0].id, ID)
+
+
+def test_invalid_values():
+    malformed = {'data': {'issues': {'totalCount': '2', 'nodes': []}}}
+    q = GraphQLQueryConstructor(decoding=ResultDecoding.COMPILED)(QUERY | ListIssues)
+    # the error is reported by the typer, as it would be without compiled decoders
+    with pytest.raises(typeit.Error):
+        q.get_result(malformed)
+
+    q = GraphQLQueryConstructor(decoding=ResultDecoding.TRUSTED)(QUERY | ListIssues)
+    assert q.get_result(malformed).issues.total_count == '2'
+
+
+def test_exotic_types_fall_back_to_typer():
+    class Stats(NamedTuple):
+        counters: Mapping[str, int]
+        total: int
+
+    decode = compile_decoder(Stats, GQL.typer)
+    assert decode({'counters': {'a': 1}, 'total': 1}) == Stats(counters={'a': 1}, total=1)
+    with pytest.raises(typeit.Error):
+        decode({'counters': {'a': 'b'}, 'total': 1})
+
+
+class Input(NamedTuple):
+    repo_name: str
+    labels: Sequence[str]
+    after: Optional[str] = None
+
+
+@pytest.mark.parametrize('decoding', [ResultDecoding.COMPILED, ResultDecoding.TRUSTED])
+def test_compiled_input_encoding_matches_typeit(decoding):
+    expr = ( QUERY | ListIssues
+           | WITH  | Input
+           | PASS  | Input.repo_name * TO * ListIssues.issues * AS * 'name' )
+    q = GraphQLQueryConstructor(decoding=decoding)(expr)
+    reference = GQL(expr)
+    query_input = Input(repo_name='graphql-dsl', labels=['bug'])
+    assert q.get_input_vars(query_input) == reference.get_input_vars(query_input) == \
+        {'repoName': 'graphql-dsl', 'labels': ['bug'], 'after': None}
+    assert json.loads(q.request_payload_bytes(query_input)) == q.request_payload(query_input)
+    assert json.loads(reference.request_payload_bytes()) == reference.request_payload()
+
+
+def test_lazy_views():
+    q = GraphQLQueryConstructor(decoding=ResultDecoding.LAZY)(QUERY | ListIssues)
+    result = q.get_result(RESPONSE)
+    assert result.__view_of__ is ListIssues
+    nodes = result.issues.nodes
+    assert result.issues.nodes is nodes
+    assert len(nodes) == 2
+    assert nodes[0] is nodes[0]
+    assert isinstance(nodes[0].id, ID)
+    assert [x.locked for x in nodes] == [True, False]
+    assert not hasattr(nodes[0], '__dict__')
+    assert result.issues._materialize() == GQL(QUERY | ListIssues).get_result(RESPONSE).issues
+
+
+def test_lazy_views_decode_on_access():
+    class Stats(NamedTuple):
+        labels: Sequence[str]
+        parent: Optional[Node]
+
+    view = compile_view(Stats, GQL.typer)({'labels': ['bug'], 'parent': {'id': 1}})
+    assert view.labels == ['bug']
+    # malformed values surface only when they are accessed
+    assert view.parent.id == ID(1)
+    with pytest.raises(KeyError):
+        view.parent.number
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.executor import Executor, AsyncExecutor, ExecutionError
+
+
+class Viewer(NamedTuple):
+    login: str
+
+
+class GetViewer(NamedTuple):
+    viewer: Viewer
+
+
+class Input(NamedTuple):
+    login: str
+
+
+GET_VIEWER = GQL( QUERY | GetViewer
+                | WITH  | Input
+                | PASS  | Input.login * TO * GetViewer.viewer )
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), Handler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.persisted = {}
+        self.requests = []
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/graphql'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.requests.append(payload)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        time.sleep(0.01)
+        with server.lock:
+            server.in_flight -= 1
+
+        persisted = payload.get('extensions', {}).get('persistedQuery')
+        if persisted:
+            if 'query' in payload:
+                server.persisted[persisted['sha256Hash']] = payload['query']
+            elif persisted['sha256Hash'] not in server.persisted:
+                return self.respond({'errors': [{'message': 'PersistedQueryNotFound'}]})
+        login = payload['variables'].get('login')
+        if login is None:
+            return self.respond({'data': None, 'errors': [{'message': 'login is required'}]})
+        self.respond({'data': {'viewer': {'login': login}}})
+
+    def respond(self, response) -> None:
+        body = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = Server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_sync_executor(server):
+    with Executor(server.url, concurrency=3) as executor:
+        assert executor.execute(GET_VIEWER, Input(login='a')) == GetViewer(viewer=Viewer(login='a'))
+        results = executor.execute_all((GET_VIEWER, Input(login=str(n))) for n in range(20))
+        assert [x.viewer.login for x in results] == [str(n) for n in range(20)]
+        with pytest.raises(ExecutionError) as e:
+            executor.execute(GET_VIEWER)
+        assert e.value.errors == [{'message': 'login is required'}]
+    assert server.connections <= 3
+    assert server.max_in_flight <= 3
+
+
+def test_async_executor(server):
+    async def run():
+        async with AsyncExecutor(server.url, concurrency=3) as executor:
+            results = await executor.execute_all((GET_VIEWER, Input(login=str(n))) for n in range(20))
+            again = await executor.execute(GET_VIEWER, Input(login='a'))
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert [x.viewer.login for x in results] == [str(n) for n in range(20)]
+    assert again == GetViewer(viewer=Viewer(login='a'))
+    assert server.connections <= 3
+    assert server.max_in_flight <= 3
+
+
+def test_persisted_queries(server):
+    with Executor(server.url, persisted=True) as executor:
+        assert executor.execute(GET_VIEWER, Input(login='a')).viewer.login == 'a'
+        assert executor.execute(GET_VIEWER, Input(login='b')).viewer.login == 'b'
+    assert ['query' in x for x in server.requests] == [False, True, False]
+
+
+def raw_exchange(response: bytes):
+    """ Runs AsyncExecutor.post against a server that replies with ``response`` as is,
+    returns the outcome and the request head.
+    """
+    requests = []
+
+    async def handle(reader, writer):
+        head = await reader.readuntil(b'\r\n\r\n')
+        requests.append(head)
+        length = [x for x in head.split(b'\r\n') if x.lower().startswith(b'content-length')][0]
+        await reader.readexactly(int(length.split(b':')[1]))
+        writer.write(response)
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            async with AsyncExecutor(f'http://127.0.0.1:{port}/graphql') as executor:
+                return await executor.post(b'{}')
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    return asyncio.run(run()), requests[0]
+
+
+def test_async_executor_skips_informational_responses():
+    body = b'{"data":{}}'
+    (status, data), head = raw_exchange(
+        b'HTTP/1.1 100 Continue\r\n\r\n'
+        b'HTTP/1.1 103 Early Hints\r\nLink: </style.css>; rel=preload\r\n\r\n'
+        b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body)
+    )
+    assert (status, data) == (200, body)
+    assert b'\r\nHost: 127.0.0.1:' in head
+
+
+def test_async_executor_limits():
+    with pytest.raises(ExecutionError):
+        raw_exchange(b'HTTP/1.1 200 OK\r\nX-Large: ' + b'x' * 70000 + b'\r\nContent-Length: 0\r\n\r\n')
+    with pytest.raises(ExecutionError):
+        raw_exchange(b'HTTP/1.1 200 OK\r\n' + b'X-Many: 1\r\n' * 101 + b'Content-Length: 0\r\n\r\n')
+    with pytest.raises(ExecutionError):
+        raw_exchange(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n' + b'1' * 70000 + b'\r\n')
+
+
+def test_host_header_omits_default_port():
+    assert AsyncExecutor('https://example.com/graphql')._head.split(b'\r\n')[1] == b'Host: example.com'
+    assert AsyncExecutor('http://example.com:8080/graphql')._head.split(b'\r\n')[1] == b'Host: example.com:8080'
@@ -0,0 +1,29 @@
+import subprocess
+import sys
+
+import pytest
+
+
+HEAVY = ('typeit', 'colander', 'pyrsistent', 'inflection', 'infix', 'pkg_resources', 'graphql')
+
+
+def imported_packages(statement: str) -> set:
+    code = f'{statement}\nimport sys\nprint("\\n".join(sys.modules))'
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    return {x.split('.')[0] for x in out.split()}
+
+
+@pytest.mark.parametrize('statement', [
+    'import graphql_dsl',
+    'from graphql_dsl import ID',
+    'from graphql_dsl.query import GraphQLQuery',
+    'from graphql_dsl.errors import DecodingError',
+    'import graphql_dsl.executor',
+    'import graphql_dsl.cli',
+])
+def test_runtime_path_is_light(statement):
+    assert imported_packages(statement).isdisjoint(HEAVY)
+
+
+def test_dsl_is_imported_on_first_access():
+    assert 'typeit' in imported_packages('from graphql_dsl import GQL')
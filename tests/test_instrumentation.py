@@ -0,0 +1,77 @@
+import io
+from typing import NamedTuple, Sequence
+
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.cache import QueryCache
+from graphql_dsl.instrumentation import Instrument, Recorder, instrument_query
+
+
+class Language(NamedTuple):
+    code: str
+    name: str
+
+
+class LanguagesQuery(NamedTuple):
+    languages: Sequence[Language]
+
+
+class Input(NamedTuple):
+    code: str
+
+
+EXPR = QUERY | LanguagesQuery | WITH | Input | PASS | Input.code * TO * LanguagesQuery.languages
+RESPONSE = {'data': {'languages': [{'code': 'en', 'name': 'English'}]}}
+
+
+def test_disabled_instrumentation_leaves_queries_intact():
+    query = GQL._replace(cache=None)(EXPR)
+    assert query.get_result.__qualname__ != 'wrapper'
+
+
+def test_recorder():
+    recorder = Recorder()
+    gql = GQL._replace(cache=QueryCache(), instrument=recorder)
+    query = gql(EXPR)
+    assert gql(EXPR) is query
+    query.request_payload(Input(code='en'))
+    for _ in range(3):
+        assert query.get_result(RESPONSE).languages[0].name == 'English'
+
+    summary = recorder.summary()
+    assert {k: v.count for k, v in summary.items()} == {
+        'bindings': 1, 'cache.hit': 1, 'cache.miss': 1, 'decode': 3, 'encode': 1, 'translation': 1, 'typer': 1,
+    }
+    assert summary['decode'].percentiles[50] <= summary['decode'].percentiles[99]
+    assert summary['cache.hit'].percentiles == {}
+
+    out = io.StringIO()
+    recorder.dump(out)
+    assert out.getvalue().splitlines()[0].split() == ['event', 'count', 'total', 'p50', 'p90', 'p99']
+
+
+def test_reservoir_and_percentiles():
+    recorder = Recorder(max_samples=100)
+    for n in range(1, 1001):
+        recorder.record('x', n / 1000)
+    summary = recorder.summary((0, 100))['x']
+    assert summary.count == 1000
+    assert abs(summary.total - 500.5) < 1e-6
+    assert 0 < summary.percentiles[0] <= summary.percentiles[100] <= 1
+
+
+def test_instrument_compiled_queries():
+    recorder = Recorder()
+    query = instrument_query(GQL(EXPR), recorder)
+    query.get_result(RESPONSE)
+    assert recorder.summary()['decode'].count == 1
+
+
+def test_instruments_implement_both_methods():
+    class Timings(Instrument):
+        def record(self, event, seconds):
+            pass
+
+    with pytest.raises(TypeError):
+        Timings()
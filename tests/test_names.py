@@ -0,0 +1,64 @@
+from typing import NamedTuple
+
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.dsl import _DefaultTyper, GraphQLQueryConstructor
+from graphql_dsl.names import WireNames, WIRE_NAMES
+from graphql_dsl.index import field_index
+from typeit import TypeConstructor, flags
+
+
+class Droid(NamedTuple):
+    primary_function: str
+
+
+class GetDroid(NamedTuple):
+    droid: Droid
+
+
+class Input(NamedTuple):
+    droid_id: ID
+
+
+def test_names_are_converted_once():
+    calls = []
+
+    def convert(name):
+        calls.append(name)
+        return name.upper()
+
+    names = WireNames(convert)
+    assert names('a_b') == 'A_B'
+    assert names('a_b') is names('a_b')
+    assert calls == ['a_b']
+
+    names.register_type(Droid)
+    assert 'primary_function' in names
+    names.seed({'droid_id': 'DROID_ID', 'a_b': 'A_B'})
+    with pytest.raises(ValueError):
+        names.seed({'a_b': 'aB'})
+
+    names.freeze()
+    assert names('droid_id') == 'DROID_ID'
+    with pytest.raises(KeyError):
+        names('unknown_name')
+    with pytest.raises(ValueError):
+        names.seed({'unknown_name': 'x'})
+
+
+def test_default_typer_shares_the_table():
+    q = GQL( QUERY | GetDroid
+           | WITH  | Input
+           | PASS  | Input.droid_id * TO * GetDroid.droid * AS * 'id' )
+    assert q.query == 'query GetDroid($droidId:ID!){droid(id:$droidId){primary_function}}'
+    assert {'droid_id', 'primary_function'} <= WIRE_NAMES.snapshot().keys()
+    assert field_index(_DefaultTyper).name_overrider is WIRE_NAMES
+
+
+def test_custom_table():
+    names = WireNames(lambda x: x.replace('_', '-'))
+    constructor = GraphQLQueryConstructor(typer=TypeConstructor & flags.GlobalNameOverride(names))
+    assert constructor(QUERY | GetDroid).get_result({'data': {'droid': {'primary-function': 'x'}}}) == \
+        GetDroid(droid=Droid(primary_function='x'))
+    assert 'primary_function' in names
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+from typing import NamedTuple, Sequence, Optional
+
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.pagination import paginate, apaginate
+
+
+class Node(NamedTuple):
+    number: int
+
+
+class PageInfo(NamedTuple):
+    has_next_page: bool
+    end_cursor: str
+
+
+class Issues(NamedTuple):
+    nodes: Sequence[Node]
+    page_info: PageInfo
+
+
+class Repository(NamedTuple):
+    issues: Issues
+
+
+class ListIssues(NamedTuple):
+    repository: Repository
+
+
+class Input(NamedTuple):
+    owner: str
+    after: Optional[str] = None
+    label: str = ''
+
+
+LIST_ISSUES = GQL( QUERY | ListIssues
+                 | WITH  | Input
+                 | PASS  | Input.owner * TO * ListIssues.repository
+                         & Input.after * TO * Repository.issues )
+
+PAGES = 5
+PAGE_SIZE = 3
+
+
+def response(query_input):
+    page = int(query_input.after or 0)
+    has_next = page + 1 < PAGES
+    return {'data': {'repository': {'issues': {
+        'nodes': [{'number': page * PAGE_SIZE + n} for n in range(PAGE_SIZE)],
+        'pageInfo': {'hasNextPage': has_next, 'endCursor': str(page + 1) if has_next else ''},
+    }}}}
+
+
+class FakeExecutor:
+    def __init__(self):
+        self.inputs = []
+        self.lock = threading.Lock()
+
+    def execute(self, query, query_input):
+        with self.lock:
+            self.inputs.append(query_input)
+        return query.get_result(response(query_input))
+
+    async def aexecute(self, query, query_input):
+        await asyncio.sleep(0)
+        return self.execute(query, query_input)
+
+
+def test_paginate():
+    executor = FakeExecutor()
+    nodes = paginate(executor.execute, LIST_ISSUES, Input(owner='o'),
+                     cursor=Input.after, page_info=Issues.page_info, nodes=Issues.nodes, prefetch=2)
+    assert [x.number for x in nodes] == list(range(PAGES * PAGE_SIZE))
+    assert [x.after for x in executor.inputs] == [None, '1', '2', '3', '4']
+    assert {x.owner for x in executor.inputs} == {'o'}
+
+
+def test_paginate_stops_early_and_reports_errors():
+    executor = FakeExecutor()
+    nodes = paginate(executor.execute, LIST_ISSUES, Input(owner='o'),
+                     cursor=Input.after, page_info=Issues.page_info, nodes=Issues.nodes)
+    assert next(nodes).number == 0
+    # give the producer a chance to run ahead
+    time.sleep(0.05)
+    # the current page and a single prefetched page at most
+    assert len(executor.inputs) <= 2
+    nodes.close()
+
+    def fail(query, query_input):
+        raise ConnectionError('boom')
+
+    with pytest.raises(ConnectionError):
+        list(paginate(fail, LIST_ISSUES, Input(owner='o'),
+                      cursor=Input.after, page_info=Issues.page_info, nodes=Issues.nodes))
+
+    with pytest.raises(ValueError):
+        paginate(executor.execute, LIST_ISSUES, Input(owner='o'),
+                 cursor=Input.label, page_info=Issues.page_info, nodes=Issues.nodes)
+
+
+def test_apaginate():
+    executor = FakeExecutor()
+
+    async def run():
+        return [x.number async for x in apaginate(executor.aexecute, LIST_ISSUES, Input(owner='o'),
+                                                  cursor=Input.after,
+                                                  page_info=(Repository.issues, Issues.page_info),
+                                                  nodes=Issues.nodes)]
+
+    assert asyncio.run(run()) == list(range(PAGES * PAGE_SIZE))
@@ -0,0 +1,58 @@
+import hashlib
+from typing import NamedTuple
+
+from graphql_dsl import *
+from graphql_dsl.persisted import is_persisted_query_not_found, send_persisted, manifest
+
+
+class Viewer(NamedTuple):
+    login: str
+
+
+class GetViewer(NamedTuple):
+    viewer: Viewer
+
+
+NOT_FOUND = {'errors': [{'message': 'PersistedQueryNotFound',
+                         'extensions': {'code': 'PERSISTED_QUERY_NOT_FOUND'}}]}
+
+
+def test_hash_is_computed_at_construction():
+    q = GQL(QUERY | GetViewer)
+    assert q.sha256 == hashlib.sha256(q.query.encode()).hexdigest()
+    payload = q.persisted_payload()
+    assert 'query' not in payload
+    assert payload['extensions'] == {'persistedQuery': {'version': 1, 'sha256Hash': q.sha256}}
+    assert q.persisted_payload(include_query=True)['query'] == q.query
+
+    batch = GQL.batch(QUERY | GetViewer, QUERY | GetViewer)
+    assert batch.persisted_payload(None, None)['extensions']['persistedQuery']['sha256Hash'] == batch.sha256
+
+
+def test_fallback_to_full_query():
+    q = GQL(QUERY | GetViewer)
+    registered = {}
+    sent = []
+
+    def send(payload):
+        sent.append(payload)
+        sha256 = payload['extensions']['persistedQuery']['sha256Hash']
+        if 'query' in payload:
+            registered[sha256] = payload['query']
+        if sha256 not in registered:
+            return NOT_FOUND
+        return {'data': {'viewer': {'login': 'x'}}}
+
+    response = send_persisted(send, q.request_payload(), q.sha256)
+    assert q.get_result(response) == GetViewer(viewer=Viewer(login='x'))
+    assert ['query' in x for x in sent] == [False, True]
+
+    send_persisted(send, q.request_payload(), q.sha256)
+    assert ['query' in x for x in sent] == [False, True, False]
+    assert not is_persisted_query_not_found({'errors': [{'message': 'Boom'}]})
+    assert not is_persisted_query_not_found({'data': None})
+
+
+def test_manifest():
+    q = GQL(QUERY | GetViewer)
+    assert manifest([q, q]) == {q.sha256: q.query}
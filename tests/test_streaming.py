@@ -0,0 +1,122 @@
+import asyncio
+import io
+import json
+from typing import NamedTuple, Sequence
+
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.compiler import DecodingError
+from graphql_dsl.decoder import ResultDecoding
+from graphql_dsl.dsl import GraphQLQueryConstructor
+
+
+class Label(NamedTuple):
+    name: str
+
+
+class Node(NamedTuple):
+    number: int
+    title: str
+    labels: Sequence[Label]
+
+
+class PageInfo(NamedTuple):
+    has_next_page: bool
+    end_cursor: str
+
+
+class Issues(NamedTuple):
+    page_info: PageInfo
+    nodes: Sequence[Node]
+
+
+class Repository(NamedTuple):
+    description: str
+    issues: Issues
+
+
+class ListIssues(NamedTuple):
+    repository: Repository
+
+
+RESPONSE = {'data': {'repository': {
+    'description': 'Quotes " and \\\\ escapes, {braces} and [brackets], юникод ✓',
+    'issues': {
+        'pageInfo': {'hasNextPage': True, 'endCursor': 'Y3Vy"c29y'},
+        'nodes': [
+            {'number': n, 'title': f'Issue {n} {{}}[] ✓', 'labels': [{'name': 'bug'}] * (n % 3)}
+            for n in range(50)
+        ],
+    },
+}}}
+PAYLOAD = json.dumps(RESPONSE, ensure_ascii=False, indent=1).encode('utf-8')
+
+
+def chunks(data: bytes, size: int):
+    for n in range(0, len(data), size):
+        yield data[n:n + size]
+
+
+@pytest.mark.parametrize('decoding', list(ResultDecoding))
+def test_stream_matches_full_result(decoding):
+    q = GraphQLQueryConstructor(decoding=decoding)(QUERY | ListIssues)
+    expected = list(q.get_result(RESPONSE).repository.issues.nodes)
+    assert list(q.iter_results(PAYLOAD, Issues.nodes)) == expected
+    assert list(q.iter_results(io.BytesIO(PAYLOAD), Issues.nodes)) == expected
+    for size in (1, 7, 64):
+        assert list(q.iter_results(chunks(PAYLOAD, size), Repository.issues, Issues.nodes)) == expected
+
+
+def test_async_stream():
+    q = GQL(QUERY | ListIssues)
+
+    async def source():
+        for chunk in chunks(PAYLOAD, 13):
+            await asyncio.sleep(0)
+            yield chunk
+
+    async def collect():
+        return [x async for x in q.aiter_results(source(), Issues.nodes)]
+
+    assert asyncio.run(collect()) == list(q.get_result(RESPONSE).repository.issues.nodes)
+
+
+def test_errors_and_bad_paths():
+    q = GQL(QUERY | ListIssues)
+    failed = json.dumps({'data': None, 'errors': [{'message': 'Not found'}]}).encode()
+    with pytest.raises(DecodingError, match='Not found'):
+        list(q.iter_results(failed, Issues.nodes))
+    with pytest.raises(DecodingError):
+        list(q.iter_results(PAYLOAD[:len(PAYLOAD) // 2], Issues.nodes))
+    with pytest.raises(TypeError):
+        q.iter_results(PAYLOAD, Issues.page_info)
+    with pytest.raises(TypeError):
+        q.iter_results(PAYLOAD, Issues.nodes, Node.labels)
+
+
+def test_elements_are_yielded_before_the_rest_is_read():
+    q = GQL(QUERY | ListIssues)
+    read = []
+
+    def source():
+        for chunk in chunks(PAYLOAD, 64):
+            read.append(len(chunk))
+            yield chunk
+
+    results = q.iter_results(source(), Issues.nodes)
+    assert next(results).number == 0
+    assert sum(read) < len(PAYLOAD) // 4
+    assert [x.number for x in results] == list(range(1, 50))
+
+
+def test_whole_sources_are_fed_in_slices(monkeypatch):
+    from graphql_dsl import streaming
+
+    monkeypatch.setattr(streaming, 'CHUNK_SIZE', 64)
+    assert [len(x) for x in streaming._iter_chunks(b'x' * 130)] == [64, 64, 2]
+    q = GQL(QUERY | ListIssues)
+    results = q.iter_results(PAYLOAD, Issues.nodes)
+    assert next(results).number == 0
+    # only the consumed part of the source has been buffered
+    assert len(results.gi_frame.f_locals['scanner'].buf.text) < len(PAYLOAD) // 4
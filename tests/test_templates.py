@@ -0,0 +1,123 @@
+from enum import Enum
+from typing import NamedTuple, Sequence
+
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.cache import QueryCache
+from graphql_dsl.dsl import GraphQLQueryConstructor
+from graphql_dsl.errors import CostLimitExceeded
+
+
+class State(Enum):
+    OPEN = 'OPEN'
+    CLOSED = 'CLOSED'
+
+
+class Node(NamedTuple):
+    number: int
+
+
+class Issues(NamedTuple):
+    nodes: Sequence[Node]
+
+
+class Repository(NamedTuple):
+    issues: Issues
+    discussions: Issues
+
+
+class ListIssues(NamedTuple):
+    repository: Repository
+
+
+class Input(NamedTuple):
+    name: str
+
+
+def mk_expr(first=100):
+    return ( QUERY   | ListIssues
+           | WITH    | Input
+           | PASS    | Input.name * TO * ListIssues.repository
+           | DEFAULT | first * TO * Repository.issues * AS * 'first'
+                     & State.OPEN * TO * Repository.issues * AS * 'states' )
+
+
+def test_literals_are_sent_as_variables():
+    q = GQL(mk_expr())
+    assert q.query == ('query ListIssues($name:String!,$first:Int!,$states:State!)'
+                       '{repository(name:$name){issues(first:$first,states:$states){nodes{number}}'
+                       'discussions{nodes{number}}}}')
+    assert q.request_payload(Input(name='graphql-dsl'))['variables'] == {
+        'name': 'graphql-dsl', 'first': 100, 'states': 'OPEN',
+    }
+    assert q.cost.nodes == 1 + 1 + 100 + 1 + 100
+
+
+def test_expressions_that_differ_in_literals_share_the_compiled_query():
+    constructor = GraphQLQueryConstructor(cache=QueryCache())
+    q100 = constructor(mk_expr(100))
+    q10 = constructor(mk_expr(10))
+    assert q10.query == q100.query
+    assert q10.get_result is q100.get_result
+    assert constructor.cache.info().currsize == 1
+    assert q10.request_payload(Input(name='x'))['variables']['first'] == 10
+    assert q100.request_payload(Input(name='x'))['variables']['first'] == 100
+    assert (q10.cost.nodes, q100.cost.nodes) == (1 + 1 + 10 + 1 + 100, 1 + 1 + 100 + 1 + 100)
+    assert constructor(mk_expr(100)) is q100
+
+    limited = constructor._replace(cost_limit=500)
+    limited(mk_expr(100))
+    with pytest.raises(CostLimitExceeded):
+        limited(mk_expr(1000))
+
+
+def test_literals_are_bound_without_resolving_the_expression_again(monkeypatch):
+    constructor = GraphQLQueryConstructor(cache=QueryCache())
+    constructor(mk_expr(100))
+    calls = []
+    prepare_bindings = GraphQLQueryConstructor.prepare_bindings
+    monkeypatch.setattr(GraphQLQueryConstructor, 'prepare_bindings',
+                        lambda self, expr: calls.append(expr) or prepare_bindings(self, expr))
+    assert constructor(mk_expr(10)).cost.nodes == 1 + 1 + 10 + 1 + 100
+    assert constructor(mk_expr(20)).cost.nodes == 1 + 1 + 20 + 1 + 100
+    assert calls == []
+
+
+def test_literals_are_overridden_in_variables():
+    q = GQL(mk_expr())
+    payload = q.request_payload(Input(name='graphql-dsl'), variables={'first': 10, 'states': State.CLOSED})
+    assert payload['variables'] == {'name': 'graphql-dsl', 'first': 10, 'states': 'CLOSED'}
+    assert payload['query'] == q.query
+    with pytest.raises(ValueError):
+        q.request_payload(Input(name='graphql-dsl'), variables={'last': 10})
+
+
+def test_batches():
+    batch = GQL.batch(mk_expr(100), mk_expr(10))
+    payload = batch.request_payload(Input(name='a'), Input(name='b'), variables={'q1_first': 5})
+    assert payload['variables'] == {
+        'q0_name': 'a', 'q0_first': 100, 'q0_states': 'OPEN',
+        'q1_name': 'b', 'q1_first': 5, 'q1_states': 'OPEN',
+    }
+    assert GQL.batch(mk_expr(1), mk_expr(2)).query == batch.query
+    with pytest.raises(ValueError):
+        batch.request_payload(variables={'first': 5})
+
+
+def test_arguments_may_share_a_variable():
+    q = GQL( QUERY   | ListIssues
+           | DEFAULT | 10 * TO * Repository.issues * AS * 'first'
+                     & 10 * TO * Repository.discussions * AS * 'first' )
+    assert q.defaults == {'first': 10}
+    assert q.query == ('query ListIssues($first:Int!){repository{issues(first:$first){nodes{number}}'
+                       'discussions(first:$first){nodes{number}}}}')
+
+
+def test_conflicting_variables():
+    with pytest.raises(ValueError):
+        GQL( QUERY   | ListIssues
+           | DEFAULT | 10 * TO * Repository.issues * AS * 'first'
+                     & 20 * TO * Repository.discussions * AS * 'first' )
+    with pytest.raises(ValueError):
+        GQL(QUERY | ListIssues | DEFAULT | 10 * TO * Repository.issues)
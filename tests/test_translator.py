@@ -0,0 +1,148 @@
+from typing import NamedTuple, Sequence
+
+from graphql_dsl import *
+from graphql_dsl.translator import translate, translate_tokens_to_graphql, type_fragment
+
+
+class Language(NamedTuple):
+    code: str
+    name: str
+
+
+class Country(NamedTuple):
+    code: str
+    name: str
+    languages: Sequence[Language]
+    native_name: str
+
+
+class Continent(NamedTuple):
+    code: str
+    countries: Sequence[Country]
+
+
+class CountriesQuery(NamedTuple):
+    continents: Sequence[Continent]
+    countries: Sequence[Country]
+    languages: Sequence[Language]
+
+
+class Input(NamedTuple):
+    continent_code: str
+    country_code: str
+
+
+def reference(typ, bindings):
+    return ''.join(translate_tokens_to_graphql(typ, bindings, GQL.typer))
+
+
+def test_output_is_identical_to_token_translator():
+    expressions = [
+        QUERY | CountriesQuery,
+        ( QUERY | CountriesQuery
+        | WITH  | Input
+        | PASS  | Input.continent_code * TO * CountriesQuery.continents * AS * 'code' ),
+        ( QUERY | CountriesQuery
+        | WITH  | Input
+        | PASS  | Input.continent_code * TO * CountriesQuery.continents * AS * 'code'
+                & Input.country_code   * TO * Continent.countries       * AS * 'code' ),
+    ]
+    for expr in expressions:
+        bindings = GQL.prepare_bindings(expr)
+        assert translate(expr.query, bindings, GQL.typer) == reference(expr.query, bindings)
+
+
+def test_nested_fragments_are_shared_between_queries():
+    class LanguagesQuery(NamedTuple):
+        languages: Sequence[Language]
+
+    fragment = type_fragment(CountriesQuery, GQL.typer)
+    other = type_fragment(LanguagesQuery, GQL.typer)
+    assert other.attributes[0].fragment is fragment.attributes[2].fragment
+    assert fragment.text == '{continents{code countries{code name languages{code name}native_name}}' \
+                            'countries{code name languages{code name}native_name}languages{code name}}'
+
+
+def test_repeated_types_are_extracted_into_fragments():
+    class PageInfo(NamedTuple):
+        has_next_page: bool
+        has_previous_page: bool
+        start_cursor: str
+        end_cursor: str
+
+    class Issue(NamedTuple):
+        title: str
+        body: str
+
+    class IssueConnection(NamedTuple):
+        page_info: PageInfo
+        nodes: Sequence[Issue]
+
+    class LanguageConnection(NamedTuple):
+        page_info: PageInfo
+        nodes: Sequence[Language]
+
+    class Repository(NamedTuple):
+        issues: IssueConnection
+        pull_requests: IssueConnection
+        languages: LanguageConnection
+
+    class RepositoryQuery(NamedTuple):
+        repository: Repository
+
+    class Input(NamedTuple):
+        num_first: int
+
+    constructor = GQL._replace(cache=None, fragments=True)
+    plain = GQL._replace(cache=None)
+    expr = ( QUERY | RepositoryQuery
+           | WITH  | Input
+           | PASS  | Input.num_first * TO * Repository.issues * AS * 'first' )
+    q = constructor(expr)
+    page_info = '{has_next_page has_previous_page start_cursor end_cursor}'
+    assert q.query == (
+        'query RepositoryQuery($numFirst:Int!){repository{issues(first:$numFirst){...IssueConnection}'
+        'pull_requests{...IssueConnection}languages{page_info{...PageInfo}nodes{code name}}}} '
+        'fragment IssueConnection on IssueConnection{page_info{...PageInfo}nodes{title body}} '
+        f'fragment PageInfo on PageInfo{page_info}'
+    )
+    assert len(q.query) < len(plain(expr).query)
+    # small selection sets are inlined
+    assert constructor(QUERY | CountriesQuery).query == plain(QUERY | CountriesQuery).query
+
+
+def test_concurrent_translation_of_fresh_types(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from threading import Barrier
+    from typeit import TypeConstructor
+    from graphql_dsl import translator
+    from graphql_dsl.types import NewIDType
+
+    typer = TypeConstructor & NewIDType
+    unconstructed = []
+    tokenize = translator.iter_tokens
+
+    def iter_tokens(typ, typer):
+        # the tokenizer would construct the type without the typer lock
+        if typ not in typer.memo:
+            unconstructed.append(typ)
+        return tokenize(typ, typer=typer)
+
+    monkeypatch.setattr(translator, 'iter_tokens', iter_tokens)
+    types = [NamedTuple(f'Query{n}', [('languages', Sequence[Language]), (f'count{n}', int)]) for n in range(32)]
+    barrier = Barrier(8)
+
+    def translate_fresh(n):
+        if n < 8:
+            barrier.wait()
+        typ = types[n]
+        if n % 2:
+            return type_fragment(typ, typer).text
+        return ''.join(translate_tokens_to_graphql(typ, {}, typer))
+
+    with ThreadPoolExecutor(8) as pool:
+        texts = list(pool.map(translate_fresh, range(len(types))))
+    assert unconstructed == []
+    for n, (typ, text) in enumerate(zip(types, texts)):
+        assert typ in typer.memo
+        assert f'count{n}' in text
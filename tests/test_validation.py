@@ -0,0 +1,132 @@
+from typing import NamedTuple, Optional, Sequence
+
+import pytest
+
+from graphql_dsl import *
+from graphql_dsl.errors import ValidationError
+from graphql_dsl.parser import load, parse
+from graphql_dsl.validation import schema_index
+
+
+SCHEMA = '''
+type Query {
+    continents(code: String): [Continent!]!
+    country(code: ID!): Country
+    languages(first: Int = 10): [Language!]!
+}
+
+type Continent {
+    code: ID!
+    countries: [Country!]!
+}
+
+type Country {
+    code: ID!
+    name: String!
+    languages: [Language!]!
+}
+
+type Language {
+    code: ID!
+    name: String
+}
+'''
+
+
+class Language(NamedTuple):
+    code: str
+    name: str
+
+
+class Country(NamedTuple):
+    code: str
+    name: str
+    languages: Sequence[Language]
+
+
+class Continent(NamedTuple):
+    code: str
+    countries: Sequence[Country]
+
+
+class ContinentsQuery(NamedTuple):
+    continents: Sequence[Continent]
+
+
+class LanguagesQuery(NamedTuple):
+    languages: Sequence[Language]
+
+
+class CountryQuery(NamedTuple):
+    country: Country
+
+
+class Input(NamedTuple):
+    code: str
+    first: Optional[int]
+
+
+@pytest.fixture
+def gql():
+    return GQL._replace(cache=None, schema=schema_index(parse(SCHEMA)))
+
+
+def test_valid_queries(gql):
+    gql(QUERY | ContinentsQuery | WITH | Input | PASS | Input.code * TO * ContinentsQuery.continents)
+    # optional variables may be passed to non-null arguments with defaults
+    gql(QUERY | LanguagesQuery | WITH | Input | PASS | Input.first * TO * LanguagesQuery.languages)
+
+
+def test_unknown_fields_and_selections(gql):
+    class Typo(NamedTuple):
+        code: str
+        countriez: Sequence[Country]
+
+    class Scalars(NamedTuple):
+        continents: str
+
+    class TypoQuery(NamedTuple):
+        continents: Sequence[Typo]
+
+    with pytest.raises(ValidationError) as e:
+        gql(QUERY | TypoQuery)
+    assert e.value.errors == ('TypoQuery.continents.countriez: type Continent has no field "countriez"',)
+
+    with pytest.raises(ValidationError) as e:
+        gql(QUERY | Scalars)
+    assert e.value.errors == ('Scalars.continents: [Continent!]! requires a selection of fields',)
+
+    with pytest.raises(ValidationError) as e:
+        gql(MUTATE | Scalars)
+    assert e.value.errors == ('The schema has no mutation type',)
+
+
+def test_bindings(gql):
+    class IDInput(NamedTuple):
+        code: ID
+
+    class OptionalInput(NamedTuple):
+        code: Optional[ID]
+
+    with pytest.raises(ValidationError) as e:
+        gql(QUERY | CountryQuery | WITH | OptionalInput | PASS | OptionalInput.code * TO * CountryQuery.country)
+    assert e.value.errors == ('CountryQuery.country: $code is optional, but "code" is of type ID!',)
+
+    gql(QUERY | CountryQuery | WITH | IDInput | PASS | IDInput.code * TO * CountryQuery.country)
+
+    with pytest.raises(ValidationError) as e:
+        gql(QUERY | CountryQuery | WITH | Input | PASS | Input.code * TO * CountryQuery.country)
+    assert e.value.errors == ('CountryQuery.country: $code of type String! cannot be passed to "code" of type ID!',)
+
+    with pytest.raises(ValidationError) as e:
+        gql(QUERY | CountryQuery)
+    assert e.value.errors == ('CountryQuery.country: the required argument "code" is not bound',)
+
+    with pytest.raises(ValidationError) as e:
+        gql(QUERY | CountryQuery | WITH | Input | PASS | Input.code * TO * CountryQuery.country * AS * 'id')
+    assert e.value.errors[0] == 'CountryQuery.country: no argument "id"'
+
+
+def test_cached_schemas_are_indexed_once(tmp_path):
+    schema = load(SCHEMA, tmp_path / 'schema.cache')
+    assert schema_index(schema) is schema_index(load(SCHEMA, tmp_path / 'schema.cache'))